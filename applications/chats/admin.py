@@ -1,7 +1,9 @@
 # Register your models here.
 
 from django.contrib import admin
-from .models import Chat, Message, File
+from .models import Chat, Message, File, Job
+from .repositories.chat_repository import ChatRepository
+from .services import SearchService
 
 
 @admin.register(Chat)
@@ -12,16 +14,37 @@ class ChatAdmin(admin.ModelAdmin):
     filter_horizontal = ("participants",)
     readonly_fields = ("created_at", "updated_at")
     ordering = ("-updated_at",)
+    chat_repository = ChatRepository()
+
+    def get_deleted_objects(self, objs, request):
+        # Listing every message and file on the confirmation page would load
+        # them all; they are purged in the background anyway.
+        objs = list(objs)
+        return [str(obj) for obj in objs], {"chats": len(objs)}, set(), []
+
+    def delete_model(self, request, obj):
+        self.chat_repository.delete_chat(obj.pk)
+
+    def delete_queryset(self, request, queryset):
+        for chat_id in queryset.values_list("pk", flat=True):
+            self.chat_repository.delete_chat(chat_id)
 
 
 @admin.register(Message)
 class MessageAdmin(admin.ModelAdmin):
     list_display = ("chat", "sender", "context_index", "created_at", "updated_at")
     list_filter = ("created_at", "updated_at", "context_index")
-    search_fields = ("content", "sender__username", "chat__title")
+    search_fields = ("content",)
+    search_help_text = "Full-text search over message content, by whole words"
     readonly_fields = ("created_at", "updated_at")
     ordering = ("-created_at",)
 
+    def get_search_results(self, request, queryset, search_term):
+        # The default LIKE '%term%' over content scans the whole table.
+        if not search_term:
+            return queryset, False
+        return SearchService().filter_messages(queryset, search_term), False
+
 
 @admin.register(File)
 class FileAdmin(admin.ModelAdmin):
@@ -37,3 +60,11 @@ class FileAdmin(admin.ModelAdmin):
     search_fields = ("file_name", "chat__title", "uploaded_by__username")
     readonly_fields = ("file_name", "file_type", "file_size", "uploaded_at")
     ordering = ("-uploaded_at",)
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("name", "status", "attempts", "available_at", "updated_at")
+    list_filter = ("status", "name")
+    readonly_fields = ("created_at", "updated_at", "locked_by", "last_error")
+    ordering = ("available_at",)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ChatsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "applications.chats"
+
+    def ready(self):
+        from . import jobs, signals  # noqa: F401
@@ -0,0 +1,36 @@
+from .dataset import Dataset, SeededData, seed_dataset
+from .cases import Case, all_cases, endpoint_cases, manager_cases, repository_cases
+from .runner import BenchmarkRunner, format_result
+from .load import LoadRunner, LoadScenario, format_load_result, load_scenarios
+from .baseline import BASELINE_PATH, compare, load_baseline, save_baseline
+from .sample_data import (
+    DISTRIBUTIONS,
+    SAMPLE_PASSWORD,
+    SampleData,
+    generate_sample_data,
+)
+
+__all__ = [
+    "Dataset",
+    "SeededData",
+    "seed_dataset",
+    "Case",
+    "all_cases",
+    "endpoint_cases",
+    "manager_cases",
+    "repository_cases",
+    "BenchmarkRunner",
+    "format_result",
+    "LoadRunner",
+    "LoadScenario",
+    "format_load_result",
+    "load_scenarios",
+    "BASELINE_PATH",
+    "compare",
+    "load_baseline",
+    "save_baseline",
+    "DISTRIBUTIONS",
+    "SAMPLE_PASSWORD",
+    "SampleData",
+    "generate_sample_data",
+]
@@ -0,0 +1,81 @@
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+
+def load_baseline(path: Path = BASELINE_PATH) -> Optional[dict]:
+    """Read a stored baseline, or None if there is none yet."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(results: Dict[str, dict], dataset: dict, path: Path = BASELINE_PATH):
+    """
+    Store results as the new baseline.
+
+    Args:
+        results: Results of ``BenchmarkRunner.run``
+        dataset: Sizes of the dataset they were measured on
+        path: File to write
+    """
+    with open(path, "w") as f:
+        json.dump({"dataset": dataset, "results": results}, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(
+    results: Dict[str, dict],
+    baseline: dict,
+    latency_threshold: Optional[float] = 0.5,
+    query_threshold: int = 0,
+    min_latency_delta: float = 2.0,
+    metric: str = "p50",
+) -> List[str]:
+    """
+    List the budgets the results exceed.
+
+    A case regresses when either query count grew by more than
+    ``query_threshold``, or its ``metric`` latency grew by more than
+    ``latency_threshold`` (a fraction of the baseline) *and* by more than
+    ``min_latency_delta`` milliseconds, so sub-millisecond noise never fails.
+    Cases missing from the baseline are new and have no budget yet.
+
+    Args:
+        results: Results of ``BenchmarkRunner.run``
+        baseline: Baseline as returned by ``load_baseline``
+        latency_threshold: Allowed relative slowdown; None to skip latencies
+        query_threshold: Allowed number of extra queries
+        min_latency_delta: Slowdowns below this many milliseconds are ignored
+        metric: Latency percentile compared, ``p50``, ``p95`` or ``p99``
+
+    Returns:
+        One line per exceeded budget
+    """
+    regressions = []
+    for name, result in results.items():
+        expected = baseline["results"].get(name)
+        if expected is None:
+            continue
+        for counter in ("queries", "warm_queries"):
+            if result[counter] > expected[counter] + query_threshold:
+                regressions.append(
+                    f"{name}: {result[counter]} {counter.replace('_', ' ')}, "
+                    f"budget {expected[counter] + query_threshold}"
+                )
+        if latency_threshold is None:
+            continue
+        budget = expected[metric] * (1 + latency_threshold)
+        if (
+            result[metric] > budget
+            and result[metric] - expected[metric] > min_latency_delta
+        ):
+            regressions.append(
+                f"{name}: {metric} {result[metric]:.2f} ms, "
+                f"baseline {expected[metric]:.2f} ms, budget {budget:.2f} ms"
+            )
+    return regressions
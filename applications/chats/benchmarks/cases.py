@@ -0,0 +1,285 @@
+from http import HTTPStatus
+from typing import Callable, List
+
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from ..models import Chat, ChatInbox, File, Message, UploadSession
+from ..repositories.chat_repository import ChatRepository
+from .dataset import SeededData
+
+# Rows evaluated from listing querysets, like one page of an endpoint.
+PAGE = 50
+
+
+class Case:
+    """
+    One timed operation.
+
+    Args:
+        name: Unique name, ``<kind>:<operation>``; baselines are keyed by it
+        func: Callable running the operation once
+        mutates: Run every repetition in a savepoint that is rolled back
+    """
+
+    def __init__(self, name: str, func: Callable[[], object], mutates: bool = False):
+        self.name = name
+        self.func = func
+        self.mutates = mutates
+
+
+class EndpointCall:
+    """A request through the full middleware stack as the dataset's owner."""
+
+    def __init__(self, client: Client, method: str, url: str, **kwargs):
+        self.client = client
+        self.method = method
+        self.url = url
+        self.kwargs = kwargs
+
+    def __call__(self):
+        response = getattr(self.client, self.method)(self.url, **self.kwargs)
+        if response.status_code >= HTTPStatus.BAD_REQUEST:
+            raise AssertionError(
+                f"{self.method.upper()} {self.url} returned {response.status_code}"
+            )
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        return response
+
+
+def endpoint_cases(data: SeededData) -> List[Case]:
+    """
+    Cases for the endpoints in ``urls.py``.
+
+    Left out: the event stream and long-poll, which wait by design, and the
+    chunked upload protocol, which is dominated by disk writes.
+    """
+    client = Client()
+    client.force_login(data.owner)
+    chat = data.chat.pk
+    json = {"content_type": "application/json"}
+
+    def call(method, name, kwargs=None, query="", **extra):
+        url = reverse(name, kwargs=kwargs) + query
+        return EndpointCall(client, method, url, **extra)
+
+    detail_etag = call("get", "chat-detail", {"pk": chat})()["ETag"]
+    messages_etag = call("get", "message-list", {"chat_pk": chat})()["ETag"]
+    cases = [
+        Case("endpoint:chat-list", call("get", "chat-list")),
+        Case("endpoint:chat-detail", call("get", "chat-detail", {"pk": chat})),
+        Case(
+            "endpoint:chat-detail-not-modified",
+            call("get", "chat-detail", {"pk": chat}, HTTP_IF_NONE_MATCH=detail_etag),
+        ),
+        Case(
+            "endpoint:chat-update",
+            call(
+                "patch",
+                "chat-detail",
+                {"pk": chat},
+                data={"title": "Renamed"},
+                **json,
+            ),
+            mutates=True,
+        ),
+        Case(
+            "endpoint:chat-add-participant",
+            call(
+                "post",
+                "chat-add-participant",
+                {"pk": chat},
+                data={"user_id": data.outsider.pk},
+                **json,
+            ),
+            mutates=True,
+        ),
+        Case(
+            "endpoint:chat-search",
+            call("get", "chat-search", query=f"?q={data.word}"),
+        ),
+        Case(
+            "endpoint:chat-search-messages",
+            call("get", "chat-search-messages", query=f"?q={data.word}"),
+        ),
+        Case("endpoint:inbox-list", call("get", "inbox-list")),
+        Case(
+            "endpoint:message-list",
+            call("get", "message-list", {"chat_pk": chat}),
+        ),
+        Case(
+            "endpoint:message-list-not-modified",
+            call(
+                "get",
+                "message-list",
+                {"chat_pk": chat},
+                HTTP_IF_NONE_MATCH=messages_etag,
+            ),
+        ),
+        Case(
+            "endpoint:message-detail",
+            call("get", "message-detail", {"chat_pk": chat, "pk": data.message.pk}),
+        ),
+        Case(
+            "endpoint:message-context",
+            call("get", "message-context", {"chat_pk": chat}, "?context_index=1"),
+        ),
+        Case(
+            "endpoint:message-create",
+            call(
+                "post",
+                "message-list",
+                {"chat_pk": chat},
+                data={"chat_id": chat, "content": "Benchmark", "context_index": 0},
+                **json,
+            ),
+            mutates=True,
+        ),
+        Case(
+            "endpoint:message-bulk-create",
+            call(
+                "post",
+                "message-bulk-create",
+                {"chat_pk": chat},
+                data={
+                    "messages": [
+                        {"content": f"Bulk {i}", "context_index": i}
+                        for i in range(PAGE)
+                    ]
+                },
+                **json,
+            ),
+            mutates=True,
+        ),
+        Case(
+            "endpoint:message-bulk-delete",
+            call(
+                "post",
+                "message-bulk-delete",
+                {"chat_pk": chat},
+                data={"context_index_from": 0, "context_index_to": 4},
+                **json,
+            ),
+            mutates=True,
+        ),
+        Case("endpoint:file-list", call("get", "file-list", {"chat_pk": chat})),
+    ]
+    if data.file is not None:
+        file = {"chat_pk": chat, "pk": data.file.pk}
+        cases += [
+            Case("endpoint:file-detail", call("get", "file-detail", file)),
+            Case("endpoint:file-download", call("get", "file-download", file)),
+        ]
+    return cases
+
+
+def repository_cases(data: SeededData) -> List[Case]:
+    """Cases for every ``ChatRepository`` method touching the database."""
+    repository = ChatRepository()
+    chat, user, other_user = data.chat.pk, data.owner, data.users[-1]
+    return [
+        Case("repository:get_by_id", lambda: repository.get_by_id(chat)),
+        Case(
+            "repository:get_validators",
+            lambda: repository.get_validators(
+                chat, "updated_at", "messages_updated_at"
+            ),
+        ),
+        Case(
+            "repository:get_active_chats",
+            lambda: list(repository.get_active_chats()[:PAGE]),
+        ),
+        Case(
+            "repository:get_user_chats",
+            lambda: list(repository.get_user_chats(user)[:PAGE]),
+        ),
+        Case(
+            "repository:get_recent_chats",
+            lambda: list(repository.get_recent_chats(PAGE)),
+        ),
+        Case(
+            "repository:search_chats",
+            lambda: list(repository.search_chats(data.word)[:PAGE]),
+        ),
+        Case(
+            "repository:create",
+            lambda: repository.create("Benchmark", user, participants=data.users),
+            mutates=True,
+        ),
+        Case(
+            "repository:update_chat",
+            lambda: repository.update_chat(chat, title="Renamed"),
+            mutates=True,
+        ),
+        Case(
+            "repository:add_participant",
+            lambda: repository.add_participant(chat, data.outsider),
+            mutates=True,
+        ),
+        Case(
+            "repository:remove_participant",
+            lambda: repository.remove_participant(chat, other_user),
+            mutates=True,
+        ),
+        Case(
+            "repository:delete_chat",
+            lambda: repository.delete_chat(chat),
+            mutates=True,
+        ),
+    ]
+
+
+def manager_cases(data: SeededData) -> List[Case]:
+    """
+    Cases for every custom manager method, scoped the way the views use them.
+
+    Listing querysets are evaluated one page at a time.
+    """
+    chat, user = data.chat.pk, data.owner
+    messages = Message.objects.for_chat(chat)
+    files = File.objects.for_chat(chat)
+    querysets = {
+        "Chat.active": Chat.objects.active(),
+        "Chat.inactive": Chat.objects.inactive(),
+        "Chat.with_participant": Chat.objects.with_participant(user),
+        "Chat.created_by_user": Chat.objects.created_by_user(user),
+        "Chat.recent": Chat.objects.recent(),
+        "Chat.with_title": Chat.objects.with_title(data.word),
+        "Chat.in_inbox_of": Chat.objects.in_inbox_of(user),
+        "Chat.with_summary": Chat.objects.with_summary(),
+        "Chat.with_details": Chat.objects.with_details().filter(pk=chat),
+        "Chat.with_validators": Chat.objects.with_validators().filter(pk=chat),
+        "Message.for_chat": messages,
+        "Message.from_user": Message.objects.from_user(user),
+        "Message.with_context": messages.with_context(),
+        "Message.without_context": messages.without_context(),
+        "Message.recent": messages.recent(),
+        "Message.oldest": messages.oldest(),
+        "Message.between_dates": messages.between_dates(
+            data.chat.created_at, data.chat.updated_at
+        ),
+        "Message.as_rows": messages.as_rows(),
+        "File.for_chat": files,
+        "File.uploaded_by_user": File.objects.uploaded_by_user(user),
+        "File.by_file_type": files.by_file_type("application/octet-stream"),
+        "File.recent": files.recent(),
+        "File.oldest": files.oldest(),
+        "File.with_name": files.with_name("file"),
+        "File.larger_than": files.larger_than(1024),
+        "File.smaller_than": files.smaller_than(1024),
+        "ChatInbox.for_user": ChatInbox.objects.for_user(user),
+        "ChatInbox.for_chat": ChatInbox.objects.for_chat(chat),
+        "ChatInbox.newest_first": ChatInbox.objects.for_user(user).newest_first(),
+        "UploadSession.stale": UploadSession.objects.stale(timezone.now()),
+    }
+    return [
+        Case(f"manager:{name}", lambda queryset=queryset: list(queryset[:PAGE]))
+        for name, queryset in querysets.items()
+    ]
+
+
+def all_cases(data: SeededData) -> List[Case]:
+    """Every benchmark case, endpoints first."""
+    return endpoint_cases(data) + repository_cases(data) + manager_cases(data)
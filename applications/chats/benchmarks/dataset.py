@@ -0,0 +1,154 @@
+import random
+from typing import List
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from ..models import Chat, File, Message
+from ..services import BlobService, ChatCounterService, InboxService
+
+User = get_user_model()
+
+WORDS = (
+    "alpha beta gamma delta release deploy cache index query latency budget "
+    "replica shard cursor page token search upload chunk archive export"
+).split()
+
+INSERT_BATCH_SIZE = 2000
+
+
+class Dataset:
+    """
+    Sizes of a benchmark dataset: chats × messages × participants × files.
+
+    Every chat gets the same number of messages, participants and files, so
+    timings of per-chat endpoints do not depend on which chat is picked.
+    """
+
+    def __init__(
+        self,
+        chats: int = 20,
+        messages_per_chat: int = 200,
+        participants_per_chat: int = 5,
+        files_per_chat: int = 5,
+        file_size: int = 16 * 1024,
+        seed: int = 0,
+    ):
+        if min(chats, messages_per_chat, participants_per_chat) < 1:
+            raise ValueError(
+                "A dataset needs at least one chat, message and participant"
+            )
+        self.chats = chats
+        self.messages_per_chat = messages_per_chat
+        self.participants_per_chat = participants_per_chat
+        self.files_per_chat = files_per_chat
+        self.file_size = file_size
+        self.seed = seed
+
+    def as_dict(self) -> dict:
+        return {
+            "chats": self.chats,
+            "messages_per_chat": self.messages_per_chat,
+            "participants_per_chat": self.participants_per_chat,
+            "files_per_chat": self.files_per_chat,
+            "file_size": self.file_size,
+        }
+
+    def __str__(self):
+        return (
+            f"{self.chats} chats × {self.messages_per_chat} messages × "
+            f"{self.participants_per_chat} participants × "
+            f"{self.files_per_chat} files"
+        )
+
+
+class SeededData:
+    """What ``seed_dataset`` created, for benchmark cases to refer to."""
+
+    def __init__(self, dataset: Dataset, users: List, outsider, chats: List[Chat]):
+        self.dataset = dataset
+        self.users = users
+        self.owner = users[0]
+        self.outsider = outsider
+        self.chats = chats
+        self.chat = chats[0]
+        self.message = Message.objects.filter(chat=self.chat).order_by("id").first()
+        self.file = File.objects.filter(chat=self.chat).order_by("id").first()
+        self.word = WORDS[0]
+
+
+def seed_dataset(dataset: Dataset) -> SeededData:
+    """
+    Insert a dataset with bulk inserts, then fill counters and inboxes.
+
+    Participants are shared: every chat has the same ``participants_per_chat``
+    users, the first of whom created it; one more user is in no chat. Every
+    file has the same content, stored once as a blob in the default storage;
+    point ``MEDIA_ROOT`` somewhere disposable first.
+
+    Args:
+        dataset: Sizes of the dataset
+
+    Returns:
+        The created users and chats
+    """
+    rng = random.Random(dataset.seed)
+    users = [
+        User.objects.create(
+            username=f"benchmark-{dataset.seed}-{i}",
+            email=f"benchmark{i}@example.com",
+        )
+        for i in range(dataset.participants_per_chat)
+    ]
+    outsider = User.objects.create(username=f"benchmark-{dataset.seed}-outsider")
+    chats = Chat.objects.bulk_create(
+        Chat(
+            title=f"{' '.join(rng.choices(WORDS, k=3))} {i}",
+            prompt=" ".join(rng.choices(WORDS, k=20)),
+            created_by=users[0],
+        )
+        for i in range(dataset.chats)
+    )
+    Chat.participants.through.objects.bulk_create(
+        Chat.participants.through(chat_id=chat.pk, user_id=user.pk)
+        for chat in chats
+        for user in users
+    )
+
+    messages = (
+        Message(
+            chat_id=chat.pk,
+            sender_id=users[i % len(users)].pk,
+            content=" ".join(rng.choices(WORDS, k=rng.randint(5, 40))),
+            context_index=i % 10,
+        )
+        for chat in chats
+        for i in range(dataset.messages_per_chat)
+    )
+    Message.objects.bulk_create(messages, batch_size=INSERT_BATCH_SIZE)
+
+    blob_service = BlobService()
+    blob = blob_service.store(ContentFile(rng.randbytes(dataset.file_size)))
+    files = []
+    for chat in chats:
+        for i in range(dataset.files_per_chat):
+            files.append(
+                File(
+                    chat_id=chat.pk,
+                    file=blob.file.name,
+                    blob=blob,
+                    file_name=f"file-{i}.bin",
+                    file_type="application/octet-stream",
+                    file_size=dataset.file_size,
+                    uploaded_by_id=users[i % len(users)].pk,
+                )
+            )
+    File.objects.bulk_create(files, batch_size=INSERT_BATCH_SIZE)
+    # Counts the references bulk_create skipped.
+    blob_service.repair()
+
+    ChatCounterService().repair(batch_size=INSERT_BATCH_SIZE)
+    inbox_service = InboxService()
+    user_ids = [user.pk for user in users]
+    for chat in chats:
+        inbox_service.add_members(chat, user_ids)
+    return SeededData(dataset, users, outsider, chats)
@@ -0,0 +1,218 @@
+import asyncio
+import time
+from http import HTTPStatus
+from itertools import count
+from typing import Dict, Iterable, List, Optional
+
+from asgiref.sync import async_to_sync
+from django.core import signals
+from django.core.handlers.asgi import ASGIHandler
+from django.db import close_old_connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from .dataset import SeededData
+from .runner import percentile
+
+# Any 32 characters do as a CSRF secret, sent as both cookie and header.
+CSRF_TOKEN = "b" * 32
+
+
+class LoadScenario:
+    """
+    One request, sent over and over by concurrent clients.
+
+    Args:
+        name: Unique name, ``load:<operation>``
+        method: HTTP method
+        path: Path with its query string
+        body: JSON body (optional)
+    """
+
+    def __init__(self, name: str, method: str, path: str, body: bytes = b""):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.body = body
+
+
+def load_scenarios(data: SeededData) -> List[LoadScenario]:
+    """Scenarios for the routes served by async views (see ``urls.py``)."""
+    chat = data.chat.pk
+    messages = reverse("message-list", kwargs={"chat_pk": chat})
+    return [
+        LoadScenario("load:chat-list", "GET", reverse("chat-list")),
+        LoadScenario("load:chat-detail", "GET", reverse("chat-detail", args=[chat])),
+        LoadScenario("load:message-list", "GET", messages),
+        LoadScenario(
+            "load:message-detail",
+            "GET",
+            reverse("message-detail", kwargs={"chat_pk": chat, "pk": data.message.pk}),
+        ),
+        LoadScenario(
+            "load:message-create",
+            "POST",
+            messages,
+            f'{{"chat_id": {chat}, "content": "Load", "context_index": 0}}'.encode(),
+        ),
+    ]
+
+
+class LoadRunner:
+    """
+    Measures requests per second of one ASGI worker under concurrent load.
+
+    ``concurrency`` clients send a scenario's request ``requests`` times in
+    total, through Django's ``ASGIHandler`` and the full middleware stack,
+    as the dataset's owner. Each scenario runs twice: once through the DRF
+    viewsets (``CHATS_ASYNC_VIEWS`` disabled) and once through the async
+    views, preceded by ``concurrency`` untimed requests.
+
+    The event loop runs in its own thread while database work is done on
+    the calling thread, which holds the seeded transaction: like a worker
+    with a single database connection, queries never overlap, and only the
+    remaining work of the requests can.
+
+    Args:
+        data: Seeded dataset
+        concurrency: Requests in flight at once
+        requests: Timed requests per scenario and stack
+    """
+
+    def __init__(self, data: SeededData, concurrency: int = 32, requests: int = 500):
+        if concurrency < 1 or requests < 1:
+            raise ValueError("concurrency and requests must be at least 1")
+        self.concurrency = concurrency
+        self.requests = requests
+        client = Client()
+        client.force_login(data.owner)
+        cookies = {name: morsel.value for name, morsel in client.cookies.items()}
+        cookies["csrftoken"] = CSRF_TOKEN
+        self.headers = [
+            (b"host", b"testserver"),
+            (b"content-type", b"application/json"),
+            (
+                b"cookie",
+                "; ".join(
+                    f"{name}={value}" for name, value in cookies.items()
+                ).encode(),
+            ),
+            (b"x-csrftoken", CSRF_TOKEN.encode()),
+        ]
+
+    def run(self, scenarios: Iterable[LoadScenario], stdout=None) -> Dict[str, dict]:
+        """
+        Run every scenario on both stacks.
+
+        Args:
+            scenarios: Scenarios to run
+            stdout: Stream to report each result on (optional)
+
+        Returns:
+            Mapping of scenario name to ``sync`` and ``async`` results, each
+            with ``rps`` and ``p50``/``p95`` latencies in milliseconds, and
+            the ``speedup`` of async over sync in requests per second
+        """
+        # Like the test client: closing connections at the end of a request
+        # would break the transaction holding the dataset.
+        signals.request_started.disconnect(close_old_connections)
+        signals.request_finished.disconnect(close_old_connections)
+        try:
+            results = {}
+            for scenario in scenarios:
+                result = {}
+                for stack, enabled in (("sync", False), ("async", True)):
+                    with override_settings(CHATS_ASYNC_VIEWS={"ENABLED": enabled}):
+                        result[stack] = async_to_sync(self.run_scenario)(scenario)
+                result["speedup"] = round(
+                    result["async"]["rps"] / result["sync"]["rps"], 2
+                )
+                results[scenario.name] = result
+                if stdout is not None:
+                    stdout.write(format_load_result(scenario.name, result))
+            return results
+        finally:
+            signals.request_started.connect(close_old_connections)
+            signals.request_finished.connect(close_old_connections)
+
+    async def run_scenario(self, scenario: LoadScenario) -> dict:
+        handler = ASGIHandler()
+        await self.send_all(handler, scenario, self.concurrency)
+        durations: List[float] = []
+        start = time.perf_counter()
+        await self.send_all(handler, scenario, self.requests, durations)
+        elapsed = time.perf_counter() - start
+        return {
+            "rps": round(self.requests / elapsed, 1),
+            "p50": round(percentile(durations, 50), 3),
+            "p95": round(percentile(durations, 95), 3),
+        }
+
+    async def send_all(
+        self,
+        handler: ASGIHandler,
+        scenario: LoadScenario,
+        total: int,
+        durations: Optional[List[float]] = None,
+    ) -> None:
+        sent = count()
+
+        async def client():
+            while next(sent) < total:
+                start = time.perf_counter()
+                status = await self.send(handler, scenario)
+                if status >= HTTPStatus.BAD_REQUEST:
+                    raise AssertionError(
+                        f"{scenario.method} {scenario.path} returned {status}"
+                    )
+                if durations is not None:
+                    durations.append((time.perf_counter() - start) * 1000)
+
+        await asyncio.gather(*(client() for _ in range(self.concurrency)))
+
+    async def send(self, handler: ASGIHandler, scenario: LoadScenario) -> int:
+        path, _, query = scenario.path.partition("?")
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": scenario.method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [
+                *self.headers,
+                (b"content-length", str(len(scenario.body)).encode()),
+            ],
+            "client": ("127.0.0.1", 0),
+            "server": ("testserver", 80),
+        }
+        body = [{"type": "http.request", "body": scenario.body}]
+        disconnected = asyncio.Event()
+        status = 0
+
+        async def receive():
+            if body:
+                return body.pop()
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        await handler(scope, receive, send)
+        disconnected.set()
+        return status
+
+
+def format_load_result(name: str, result: dict) -> str:
+    sync, async_ = result["sync"], result["async"]
+    return (
+        f"{name:<28} sync {sync['rps']:>8.1f} req/s (p50 {sync['p50']:.1f} ms)  "
+        f"async {async_['rps']:>8.1f} req/s (p50 {async_['p50']:.1f} ms)  "
+        f"x{result['speedup']:.2f}"
+    )
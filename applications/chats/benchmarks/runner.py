@@ -0,0 +1,93 @@
+import math
+import time
+from typing import Dict, Iterable, List
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from ..cache import get_chat_cache, get_membership_cache
+from .cases import Case
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(durations: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list of durations."""
+    ordered = sorted(durations)
+    return ordered[max(math.ceil(pct / 100 * len(ordered)) - 1, 0)]
+
+
+class BenchmarkRunner:
+    """
+    Times benchmark cases and counts their SQL queries.
+
+    Caches are cleared before each case, so its first, untimed repetition
+    starts cold: that repetition's query count is reported as ``queries``,
+    and the count of the last one, with caches warm, as ``warm_queries``.
+    Then come ``warmup`` untimed repetitions and ``repeat`` timed ones, which
+    the latency percentiles are computed from.
+
+    Args:
+        repeat: Timed repetitions per case
+        warmup: Untimed repetitions per case after the cold one
+    """
+
+    def __init__(self, repeat: int = 20, warmup: int = 2):
+        if repeat < 1:
+            raise ValueError("repeat must be at least 1")
+        self.repeat = repeat
+        self.warmup = warmup
+
+    def run(self, cases: Iterable[Case], stdout=None) -> Dict[str, dict]:
+        """
+        Run every case.
+
+        Args:
+            cases: Cases to run
+            stdout: Stream to report each result on (optional)
+
+        Returns:
+            Mapping of case name to its ``queries``, ``warm_queries`` and
+            ``p50``/``p95``/``p99`` latencies in milliseconds
+        """
+        results = {}
+        for case in cases:
+            results[case.name] = self.run_case(case)
+            if stdout is not None:
+                stdout.write(format_result(case.name, results[case.name]))
+        return results
+
+    def run_case(self, case: Case) -> dict:
+        for cache in (get_chat_cache(), get_membership_cache()):
+            if cache is not None:
+                cache.clear()
+
+        durations, query_counts = [], []
+        for run in range(1 + self.warmup + self.repeat):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                self.execute(case)
+                duration = (time.perf_counter() - start) * 1000
+            query_counts.append(len(queries))
+            if run > self.warmup:
+                durations.append(duration)
+
+        result = {"queries": query_counts[0], "warm_queries": query_counts[-1]}
+        for pct in PERCENTILES:
+            result[f"p{pct}"] = round(percentile(durations, pct), 3)
+        return result
+
+    @staticmethod
+    def execute(case: Case) -> None:
+        if not case.mutates:
+            case.func()
+            return
+        with transaction.atomic():
+            case.func()
+            transaction.set_rollback(True)
+
+
+def format_result(name: str, result: dict) -> str:
+    return (
+        f"{name:<45} {result['queries']:>3} / {result['warm_queries']:>3} queries  "
+        + "  ".join(f"p{pct} {result[f'p{pct}']:>8.2f} ms" for pct in PERCENTILES)
+    )
@@ -0,0 +1,443 @@
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import lru_cache
+from itertools import accumulate
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import django
+
+try:
+    from faker import Faker
+except ImportError:  # pragma: no cover - development dependency
+    Faker = None
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, connections, transaction
+from django.utils import timezone
+from ..models import Chat, ChatInbox, File, Message
+from ..services.search_service import deferred_fulltext_index
+
+User = get_user_model()
+
+DISTRIBUTIONS = ("uniform", "zipf")
+
+SAMPLE_PASSWORD = "testpass123"
+
+FILE_TYPES = (
+    ("pdf", "application/pdf"),
+    ("png", "image/png"),
+    ("jpg", "image/jpeg"),
+    ("txt", "text/plain"),
+    ("csv", "text/csv"),
+    ("zip", "application/zip"),
+)
+
+# Distinct sentences message text is assembled from. Faker is called only to
+# fill this pool, never per row.
+SENTENCE_POOL_SIZE = 2000
+
+
+class SampleData:
+    """
+    Shape of a generated load-testing dataset.
+
+    Every chat is created by ``owner`` and joined by ``participants_per_chat
+    - 1`` of the generated users. Messages are spread evenly over the
+    chats with the ``uniform`` distribution, or by Zipf's law with ``zipf``:
+    the chat of rank r gets a share proportional to ``1 / r ** skew``, and
+    senders within a chat are skewed the same way. ``messages_per_chat``
+    is the mean either way. Files are metadata only; nothing is written to
+    storage, so downloading them fails.
+
+    Args:
+        users: Generated users, besides the owner
+        chats: Chats to create
+        messages_per_chat: Mean number of messages per chat
+        participants_per_chat: Members of every chat, the owner included
+        files_per_chat: File rows per chat
+        distribution: ``uniform`` or ``zipf``
+        skew: Exponent of the Zipf distribution
+        days: Messages are dated over this many days up to now
+        seed: Seed of the random generators; random if omitted
+    """
+
+    def __init__(
+        self,
+        users: int = 10,
+        chats: int = 5,
+        messages_per_chat: int = 30,
+        participants_per_chat: int = 3,
+        files_per_chat: int = 0,
+        distribution: str = "uniform",
+        skew: float = 1.1,
+        days: int = 7,
+        seed: Optional[int] = None,
+    ):
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"distribution must be one of {', '.join(DISTRIBUTIONS)}")
+        if participants_per_chat < 1 or participants_per_chat - 1 > users:
+            raise ValueError("participants_per_chat must be between 1 and users + 1")
+        if min(chats, messages_per_chat, files_per_chat, days) < 0:
+            raise ValueError("Sizes must not be negative")
+        self.users = users
+        self.chats = chats
+        self.messages_per_chat = messages_per_chat
+        self.participants_per_chat = participants_per_chat
+        self.files_per_chat = files_per_chat
+        self.distribution = distribution
+        self.skew = skew
+        self.days = days
+        self.seed = random.randrange(2**32) if seed is None else seed
+
+    @property
+    def total_messages(self) -> int:
+        return self.chats * self.messages_per_chat
+
+    def weights(self, count: int) -> List[float]:
+        """Relative frequency of each of ``count`` ranks."""
+        if self.distribution == "uniform":
+            return [1.0] * count
+        return [1 / (rank + 1) ** self.skew for rank in range(count)]
+
+    def message_counts(self, rng: random.Random) -> List[int]:
+        """Messages of every chat, summing to exactly ``total_messages``."""
+        weights = self.weights(self.chats)
+        total_weight = sum(weights)
+        shares = [self.total_messages * weight / total_weight for weight in weights]
+        counts = [int(share) for share in shares]
+        # Largest remainders get the messages rounding down left over.
+        leftover = self.total_messages - sum(counts)
+        for rank in sorted(
+            range(self.chats), key=lambda rank: counts[rank] - shares[rank]
+        )[:leftover]:
+            counts[rank] += 1
+        rng.shuffle(counts)
+        return counts
+
+
+class ChatSlice:
+    """Messages ``start`` to ``start + count`` of one chat, for one worker."""
+
+    def __init__(
+        self,
+        chat_id: int,
+        created_at,
+        participant_ids: Sequence[int],
+        total: int,
+        start: int,
+        count: int,
+    ):
+        self.chat_id = chat_id
+        self.created_at = created_at
+        self.participant_ids = list(participant_ids)
+        self.total = total
+        self.start = start
+        self.count = count
+
+    @property
+    def is_first(self) -> bool:
+        return self.start == 0
+
+    @property
+    def is_last(self) -> bool:
+        return self.start + self.count == self.total
+
+
+@lru_cache(maxsize=4)
+def sentence_pool(seed: int) -> List[str]:
+    if Faker is None:
+        rng = random.Random(seed)
+        words = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do".split()
+        return [
+            " ".join(rng.choices(words, k=rng.randint(4, 14))).capitalize() + "."
+            for _ in range(SENTENCE_POOL_SIZE)
+        ]
+    fake = Faker()
+    fake.seed_instance(seed)
+    return [fake.sentence(nb_words=10) for _ in range(SENTENCE_POOL_SIZE)]
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """
+    Let bulk inserts set ``auto_now`` and ``auto_now_add`` fields.
+
+    Django overwrites them with the current time on every insert; generated
+    history needs dates spread over the past instead.
+    """
+    fields = [
+        (field, field.auto_now, field.auto_now_add)
+        for model in models
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    for field, _, _ in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in fields:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def split_work(slices: Iterator[ChatSlice], size: int) -> Iterator[List[ChatSlice]]:
+    """Group slices into tasks of about ``size`` messages."""
+    task, messages = [], 0
+    for chat_slice in slices:
+        task.append(chat_slice)
+        messages += chat_slice.count
+        if messages >= size:
+            yield task
+            task, messages = [], 0
+    if task:
+        yield task
+
+
+def insert_task(
+    plan: SampleData, task_index: int, task: List[ChatSlice], batch_size: int, now
+) -> dict:
+    """
+    Insert the messages and files of one task, in one transaction.
+
+    Runs in worker processes. Message ``k`` of a chat is dated at the
+    ``k``-th step between the chat's creation and ``now``, so slices of one
+    chat inserted by different workers still interleave correctly.
+
+    Returns:
+        Counts of inserted rows, and for every chat whose last message or
+        files this task inserted, its counters
+    """
+    rng = random.Random(f"{plan.seed}:{task_index}")
+    sentences = sentence_pool(plan.seed)
+    messages, counters = [], {}
+    for chat_slice in task:
+        sender_weights = list(accumulate(plan.weights(len(chat_slice.participant_ids))))
+        step = (now - chat_slice.created_at) / (chat_slice.total + 1)
+        for index in range(chat_slice.start, chat_slice.start + chat_slice.count):
+            created_at = chat_slice.created_at + step * (index + 1)
+            messages.append(
+                Message(
+                    chat_id=chat_slice.chat_id,
+                    sender_id=rng.choices(
+                        chat_slice.participant_ids, cum_weights=sender_weights
+                    )[0],
+                    content=" ".join(rng.choices(sentences, k=rng.randint(1, 4))),
+                    context_index=index,
+                    created_at=created_at,
+                    updated_at=created_at,
+                )
+            )
+
+    files = []
+    for chat_slice in task:
+        if not chat_slice.is_first:
+            continue
+        for index in range(plan.files_per_chat):
+            extension, file_type = rng.choice(FILE_TYPES)
+            name = f"sample-{index}.{extension}"
+            files.append(
+                File(
+                    chat_id=chat_slice.chat_id,
+                    file=f"chat_files/{chat_slice.chat_id}/{name}",
+                    file_name=name,
+                    file_type=file_type,
+                    file_size=int(rng.lognormvariate(11, 1.5)),
+                    uploaded_by_id=rng.choice(chat_slice.participant_ids),
+                    uploaded_at=chat_slice.created_at
+                    + (now - chat_slice.created_at) * rng.random(),
+                )
+            )
+
+    with explicit_timestamps(Message, File), transaction.atomic():
+        Message.objects.bulk_create(messages, batch_size=batch_size)
+        File.objects.bulk_create(files, batch_size=batch_size)
+
+    position = 0
+    for chat_slice in task:
+        position += chat_slice.count
+        if chat_slice.is_last and chat_slice.count:
+            last = messages[position - 1]
+            counters.setdefault(chat_slice.chat_id, {}).update(
+                last_message_id=last.pk, last_message_at=last.created_at
+            )
+    for file in files:
+        chat_counters = counters.setdefault(file.chat_id, {})
+        chat_counters["file_count"] = chat_counters.get("file_count", 0) + 1
+        chat_counters["total_file_bytes"] = (
+            chat_counters.get("total_file_bytes", 0) + file.file_size
+        )
+    return {"messages": len(messages), "files": len(files), "counters": counters}
+
+
+def _setup_worker():
+    # Spawned workers start without Django; forked ones share nothing with
+    # the parent's connections, which it closed before starting them.
+    django.setup()
+
+
+def generate_sample_data(
+    plan: SampleData,
+    owner,
+    batch_size: int = 5000,
+    workers: int = 1,
+    progress=None,
+) -> Dict[str, int]:
+    """
+    Insert a generated dataset with bulk inserts.
+
+    Users, chats and memberships are inserted first, in this process. The
+    messages and files are then split into tasks of ``10 * batch_size``
+    messages, inserted by a pool of ``workers`` processes (in this process
+    when ``workers`` is 1), each task in its own transaction on its own
+    connection. Chat counters and inboxes are filled in last, since bulk
+    inserts send no signals. On SQLite, the full-text index is rebuilt once
+    at the end instead of row by row.
+
+    Generated users are named ``sample-<n>`` and reused by later runs; their
+    password is ``SAMPLE_PASSWORD``.
+
+    Args:
+        plan: Shape of the dataset
+        owner: User creating, and taking part in, every chat
+        batch_size: Rows per INSERT statement
+        workers: Processes inserting messages and files
+        progress: Called with ``(messages inserted, total, elapsed seconds)``
+            after every task (optional)
+
+    Returns:
+        Number of rows created per kind: users, chats, messages, files
+    """
+    rng = random.Random(plan.seed)
+    now = timezone.now()
+    sentences = sentence_pool(plan.seed)
+    started = time.perf_counter()
+
+    usernames = [f"sample-{index}" for index in range(plan.users)]
+    existing = set(
+        User.objects.filter(username__in=usernames).values_list("username", flat=True)
+    )
+    password = make_password(SAMPLE_PASSWORD)
+    User.objects.bulk_create(
+        [
+            User(username=name, email=f"{name}@example.com", password=password)
+            for name in usernames
+            if name not in existing
+        ],
+        batch_size=batch_size,
+    )
+    user_ids = dict(
+        User.objects.filter(username__in=usernames).values_list("username", "pk")
+    )
+    user_ids = [user_ids[name] for name in usernames]
+
+    message_counts = plan.message_counts(rng)
+    members = []
+    chats = []
+    for index in range(plan.chats):
+        created_at = now - timedelta(days=plan.days * rng.random())
+        members.append(
+            [owner.pk, *rng.sample(user_ids, plan.participants_per_chat - 1)]
+        )
+        chats.append(
+            Chat(
+                title=rng.choice(sentences)[:255],
+                prompt=" ".join(rng.choices(sentences, k=3)),
+                created_by_id=owner.pk,
+                created_at=created_at,
+                updated_at=created_at,
+            )
+        )
+
+    with deferred_fulltext_index(connection):
+        with explicit_timestamps(Chat), transaction.atomic():
+            Chat.objects.bulk_create(chats, batch_size=batch_size)
+            Chat.participants.through.objects.bulk_create(
+                (
+                    Chat.participants.through(chat_id=chat.pk, user_id=user_id)
+                    for chat, chat_members in zip(chats, members)
+                    for user_id in chat_members
+                ),
+                batch_size=batch_size,
+            )
+
+        task_size = batch_size * 10
+
+        def slices():
+            for chat, chat_members, total in zip(chats, members, message_counts):
+                for start in range(0, max(total, 1), task_size):
+                    yield ChatSlice(
+                        chat.pk,
+                        chat.created_at,
+                        chat_members,
+                        total,
+                        start,
+                        min(task_size, total - start),
+                    )
+
+        tasks = list(split_work(slices(), task_size))
+        results = []
+        inserted = 0
+        if workers > 1:
+            connections.close_all()
+            with ProcessPoolExecutor(workers, initializer=_setup_worker) as pool:
+                futures = [
+                    pool.submit(insert_task, plan, index, task, batch_size, now)
+                    for index, task in enumerate(tasks)
+                ]
+                for future in as_completed(futures):
+                    results.append(future.result())
+                    inserted += results[-1]["messages"]
+                    if progress is not None:
+                        progress(
+                            inserted,
+                            plan.total_messages,
+                            time.perf_counter() - started,
+                        )
+        else:
+            for index, task in enumerate(tasks):
+                results.append(insert_task(plan, index, task, batch_size, now))
+                inserted += results[-1]["messages"]
+                if progress is not None:
+                    progress(
+                        inserted, plan.total_messages, time.perf_counter() - started
+                    )
+
+    chats_by_id = {chat.pk: chat for chat in chats}
+    for chat, total in zip(chats, message_counts):
+        chat.message_count = total
+    for result in results:
+        for chat_id, counters in result["counters"].items():
+            chat = chats_by_id[chat_id]
+            for name, value in counters.items():
+                setattr(chat, name, value)
+            if chat.last_message_at is not None:
+                chat.updated_at = chat.last_message_at
+
+    with transaction.atomic():
+        Chat.objects.bulk_update(
+            chats, [*Chat.COUNTER_FIELDS, "updated_at"], batch_size=batch_size
+        )
+        ChatInbox.objects.bulk_create(
+            (
+                ChatInbox(
+                    user_id=user_id,
+                    chat_id=chat.pk,
+                    last_activity_at=chat.last_message_at or chat.created_at,
+                    last_message_id=chat.last_message_id,
+                )
+                for chat, chat_members in zip(chats, members)
+                for user_id in chat_members
+            ),
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+
+    return {
+        "users": plan.users - len(existing),
+        "chats": len(chats),
+        "messages": inserted,
+        "files": sum(result["files"] for result in results),
+    }
@@ -0,0 +1,13 @@
+from .lru_cache import LRUCache
+from .versioned_cache import VersionedCache, cache_from_settings
+from .chat_cache import ChatCache, get_chat_cache
+from .membership_cache import get_membership_cache
+
+__all__ = [
+    "LRUCache",
+    "VersionedCache",
+    "cache_from_settings",
+    "ChatCache",
+    "get_chat_cache",
+    "get_membership_cache",
+]
@@ -0,0 +1,38 @@
+import pickle
+from typing import Callable, Optional
+
+from .versioned_cache import VersionedCache, cache_from_settings
+
+
+class ChatCache(VersionedCache):
+    """
+    Chats with their creator and participants, keyed and versioned by chat id.
+
+    Chats are stored pickled, so every reader gets its own instance and may
+    modify it freely.
+    """
+
+    def get_chat(self, chat_id: int, load: Callable[[], Optional[object]]):
+        """
+        Return a chat from the cache, loading and caching it on a miss.
+
+        Args:
+            chat_id: ID of the chat
+            load: Callable loading the chat from the database, or None if absent
+
+        Returns:
+            Chat instance or None if not found
+        """
+        version = self.version(chat_id)
+        payload = self.get(chat_id, version)
+        if payload is not None:
+            return pickle.loads(payload)
+        chat = load()
+        if chat is not None:
+            self.set(chat_id, pickle.dumps(chat, pickle.HIGHEST_PROTOCOL), version)
+        return chat
+
+
+def get_chat_cache() -> Optional[ChatCache]:
+    """Return the process-wide chat cache, or None if ``CHATS_CHAT_CACHE`` disables it."""
+    return cache_from_settings("CHATS_CHAT_CACHE", "chats:chat", ChatCache)
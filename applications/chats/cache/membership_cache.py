@@ -0,0 +1,12 @@
+from typing import Optional
+
+from .versioned_cache import VersionedCache, cache_from_settings
+
+
+def get_membership_cache() -> Optional[VersionedCache]:
+    """
+    Return the process-wide cache of chat ids per user.
+
+    None if ``CHATS_MEMBERSHIP_CACHE`` disables it.
+    """
+    return cache_from_settings("CHATS_MEMBERSHIP_CACHE", "chats:membership")
@@ -0,0 +1,209 @@
+import threading
+import time
+from typing import Any, Hashable, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.db import connection, transaction
+from django.dispatch import receiver
+from .lru_cache import LRUCache
+
+
+class VersionedCache:
+    """
+    Read-through cache with per-key versions, in process and optionally shared.
+
+    Every key has a version, and values are stored under ``(key, version)``.
+    Invalidating a key bumps its version, so every copy of the old value
+    becomes unreachable at once, in this process and, when ``alias`` names a
+    Django cache, in every other process sharing it. Readers take the
+    version *before* loading from the database and store under it, so a value
+    loaded concurrently with a write is never served after the write commits.
+
+    Values are kept in a bounded in-process ``LRUCache``. With a shared cache,
+    a local miss falls back to the shared one and versions live there; each
+    read then costs one shared-cache lookup for the version.
+
+    A missing version is initialised from the clock rather than zero, so a
+    version lost to eviction can never make an old value reachable again.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        max_entries: int = 1024,
+        ttl: Optional[float] = 300,
+        alias: Optional[str] = None,
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.local = LRUCache(max_entries, ttl)
+        self.shared = caches[alias] if alias else None
+        self._versions = LRUCache(max_entries * 4, ttl=None)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+        self.invalidations = 0
+
+    def _version_key(self, key: Hashable) -> str:
+        return f"{self.namespace}:{key}:version"
+
+    def _value_key(self, key: Hashable, version: int) -> str:
+        return f"{self.namespace}:{key}:{version}"
+
+    def version(self, key: Hashable) -> int:
+        """Current version of a key; take it before loading the value."""
+        if self.shared is not None:
+            version_key = self._version_key(key)
+            version = self.shared.get(version_key)
+            if version is None:
+                self.shared.add(version_key, time.time_ns(), timeout=None)
+                version = self.shared.get(version_key)
+            return version
+
+        with self._lock:
+            version = self._versions.get(key)
+            if version is None:
+                version = time.time_ns()
+                self._versions.set(key, version)
+            return version
+
+    def get(self, key: Hashable, version: Optional[int] = None) -> Any:
+        """
+        Return the cached value of a key, or ``None`` on a miss.
+
+        Args:
+            key: Key to look up
+            version: Version read beforehand (optional; read now if omitted)
+        """
+        if version is None:
+            version = self.version(key)
+        value = self.local.get((key, version))
+        if value is None and self.shared is not None:
+            value = self.shared.get(self._value_key(key, version))
+            if value is not None:
+                self.shared_hits += 1
+                self.local.set((key, version), value)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, version: int) -> None:
+        """
+        Store a value under the version read before it was loaded.
+
+        Args:
+            key: Key to store
+            value: Value; must not be None
+            version: Version returned by ``version`` before loading the value
+        """
+        self.local.set((key, version), value)
+        if self.shared is not None:
+            self.shared.set(self._value_key(key, version), value, timeout=self.ttl)
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        Make the cached value of a key unreachable.
+
+        Inside a transaction the version is bumped again on commit, so that a
+        value read by another connection before the commit is dropped too.
+        """
+        self._bump(key)
+        if connection.in_atomic_block:
+            transaction.on_commit(lambda: self._bump(key))
+
+    def _bump(self, key: Hashable) -> None:
+        self.invalidations += 1
+        if self.shared is not None:
+            version_key = self._version_key(key)
+            try:
+                self.shared.incr(version_key)
+            except ValueError:
+                self.shared.add(version_key, time.time_ns(), timeout=None)
+            return
+
+        with self._lock:
+            version = self._versions.get(key)
+            self._versions.set(key, (version or time.time_ns()) + 1)
+        if version is not None:
+            self.local.delete((key, version))
+
+    def clear(self) -> None:
+        """Forget every value and version held in this process."""
+        self.local.clear()
+        self._versions.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters of this process, to size ``max_entries`` and ``ttl``."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared_hits": self.shared_hits,
+            "invalidations": self.invalidations,
+            "size": len(self.local),
+            "max_entries": self.local.max_entries,
+            "evictions": self.local.evictions,
+            "expirations": self.local.expirations,
+        }
+
+
+_configured = {}
+_configured_lock = threading.Lock()
+
+
+def cache_from_settings(setting: str, namespace: str, cache_class=None):
+    """
+    Return the process-wide cache configured by a ``CHATS_*_CACHE`` setting.
+
+    The setting is a dict with ``ENABLED``, ``MAX_ENTRIES``, ``TTL_SECONDS``
+    and ``BACKEND``, the alias of a ``CACHES`` entry every process shares.
+    A ``locmem`` alias is only correct when a single process serves the site.
+
+    Args:
+        setting: Name of the setting
+        namespace: Prefix of the cache keys
+        cache_class: VersionedCache subclass to build (optional)
+
+    Returns:
+        The cache, or None when it is disabled or the setting is absent
+
+    Raises:
+        ImproperlyConfigured: The cache is enabled without a ``BACKEND``
+    """
+    config = getattr(settings, setting, {})
+    if not config.get("ENABLED", False):
+        return None
+    if not config.get("BACKEND"):
+        # Signals invalidate entries in the process that made the change;
+        # copies cached by other processes would be served until they expire.
+        raise ImproperlyConfigured(
+            f"{setting} needs BACKEND, the alias of a cache shared by every "
+            "process, for invalidations to reach all of them"
+        )
+    cache = _configured.get(setting)
+    if cache is None:
+        with _configured_lock:
+            cache = _configured.get(setting)
+            if cache is None:
+                cache = _configured[setting] = (cache_class or VersionedCache)(
+                    namespace,
+                    max_entries=config.get("MAX_ENTRIES", 1024),
+                    ttl=config.get("TTL_SECONDS", 300),
+                    alias=config.get("BACKEND"),
+                )
+    return cache
+
+
+@receiver(setting_changed, dispatch_uid="chats_cache_setting_changed")
+def forget_configured_cache(sender, setting, **kwargs):
+    # Let override_settings switch a cache on, off or to another backend.
+    with _configured_lock:
+        if setting == "CACHES":
+            _configured.clear()
+        else:
+            _configured.pop(setting, None)
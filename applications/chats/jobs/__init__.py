@@ -0,0 +1,11 @@
+from .registry import JobRegistry, UnknownJobError, job, registry
+from . import chat_jobs, file_jobs
+
+__all__ = [
+    "JobRegistry",
+    "UnknownJobError",
+    "job",
+    "registry",
+    "chat_jobs",
+    "file_jobs",
+]
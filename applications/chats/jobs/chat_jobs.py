@@ -0,0 +1,17 @@
+from .registry import job
+
+
+@job("chats.purge_chat")
+def purge_chat(chat_id: int) -> None:
+    """
+    Purge a tombstoned chat, ``BATCHES_PER_JOB`` batches at a time.
+
+    Queues itself again until the chat is gone, so each run stays well
+    within its lease and other jobs get their turn in between.
+    """
+    # Services import the job queue, which imports this module.
+    from ..services.chat_deletion_service import ChatDeletionService, deletion_config
+
+    service = ChatDeletionService()
+    if not service.purge(chat_id, max_batches=deletion_config()["BATCHES_PER_JOB"]):
+        service.purge_later(chat_id)
@@ -0,0 +1,49 @@
+from ..models import File
+from .registry import job
+
+GENERIC_TYPE = "application/octet-stream"
+
+# Bytes read from the start of a file to recognize its type.
+SNIFF_BYTES = 16
+
+# Leading bytes of common formats. ZIP-based documents (docx, xlsx, ...)
+# are only recognized as ZIP, which is why declared types are kept.
+SIGNATURES = (
+    (b"%PDF-", "application/pdf"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"PK\x03\x04", "application/zip"),
+    (b"\x1f\x8b", "application/gzip"),
+    (b"OggS", "audio/ogg"),
+    (b"ID3", "audio/mpeg"),
+)
+
+
+def sniff_type(header: bytes):
+    """MIME type recognized from the leading bytes of a file, or None."""
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    for signature, file_type in SIGNATURES:
+        if header.startswith(signature):
+            return file_type
+    return None
+
+
+@job("chats.inspect_file")
+def inspect_file(file_id: int) -> None:
+    """
+    Fill in the type of an upload whose client did not declare one.
+
+    Reads the first bytes of the content, which ``File.save`` cannot afford
+    to do inline.
+    """
+    file_obj = File.objects.filter(pk=file_id, file_type=GENERIC_TYPE).first()
+    if file_obj is None:
+        # Deleted since, or its type was declared.
+        return
+    with file_obj.file.open("rb") as content:
+        file_type = sniff_type(content.read(SNIFF_BYTES))
+    if file_type is not None:
+        File.objects.filter(pk=file_id).update(file_type=file_type)
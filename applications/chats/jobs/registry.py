@@ -0,0 +1,42 @@
+from typing import Callable, Dict
+
+
+class UnknownJobError(LookupError):
+    """Raised when a job name has no registered handler."""
+
+
+class JobRegistry:
+    """
+    Handlers of background jobs, by name.
+
+    A handler is called with the job's payload as keyword arguments. Jobs
+    run at least once: a worker that dies mid-job leaves it to be run again
+    once its lease expires, so handlers must be safe to repeat.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, Callable] = {}
+
+    def register(self, name: str) -> Callable[[Callable], Callable]:
+        """Decorator registering a function as the handler of ``name``."""
+
+        def decorator(handler: Callable) -> Callable:
+            if self._handlers.get(name, handler) is not handler:
+                raise ValueError(f"A handler for job {name!r} is already registered")
+            self._handlers[name] = handler
+            return handler
+
+        return decorator
+
+    def get(self, name: str) -> Callable:
+        try:
+            return self._handlers[name]
+        except KeyError:
+            raise UnknownJobError(f"No handler registered for job {name!r}") from None
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._handlers
+
+
+registry = JobRegistry()
+job = registry.register
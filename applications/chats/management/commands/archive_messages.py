@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from applications.chats.services import ArchiveService
+from applications.chats.services.archive_service import CODECS, archive_config
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves old messages into compressed per-chat segments; archived "
+        "messages stay readable but are no longer searchable or editable"
+    )
+
+    def add_arguments(self, parser):
+        config = archive_config()
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=config["ARCHIVE_AFTER_DAYS"],
+            help="Archive messages older than this many days",
+        )
+        parser.add_argument(
+            "--segment-size",
+            type=int,
+            default=config["SEGMENT_SIZE"],
+            help="Most messages per segment",
+        )
+        parser.add_argument(
+            "--codec",
+            choices=sorted(CODECS),
+            default=config["CODEC"],
+            help="Compression codec; zstd requires the zstandard package",
+        )
+        parser.add_argument(
+            "--limit", type=int, help="Stop after about this many messages"
+        )
+
+    def handle(self, *args, **options):
+        if options["older_than_days"] < 0 or options["segment_size"] < 1:
+            raise CommandError("--older-than-days and --segment-size must be positive")
+        try:
+            service = ArchiveService(
+                codec=options["codec"], segment_size=options["segment_size"]
+            )
+        except ImproperlyConfigured as e:
+            raise CommandError(str(e))
+
+        cutoff = timezone.now() - timedelta(days=options["older_than_days"])
+        archived = service.archive(
+            cutoff,
+            limit=options["limit"],
+            progress=self.report_progress if options["verbosity"] > 1 else None,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Archived {archived} messages created before {cutoff:%Y-%m-%d %H:%M}"
+            )
+        )
+
+    def report_progress(self, chat_id, archived):
+        self.stdout.write(f"chat {chat_id}: {archived:,} messages archived so far")
@@ -0,0 +1,160 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from applications.chats.benchmarks import (
+    BASELINE_PATH,
+    BenchmarkRunner,
+    Dataset,
+    all_cases,
+    compare,
+    load_baseline,
+    save_baseline,
+    seed_dataset,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a dataset, times every chats endpoint, repository and manager "
+        "method, and fails when query counts or latencies exceed the baseline"
+    )
+
+    def add_arguments(self, parser):
+        dataset = parser.add_argument_group("dataset")
+        dataset.add_argument("--chats", type=int, default=20)
+        dataset.add_argument("--messages", type=int, default=200, help="Per chat")
+        dataset.add_argument("--participants", type=int, default=5, help="Per chat")
+        dataset.add_argument("--files", type=int, default=5, help="Per chat")
+        parser.add_argument(
+            "--repeat", type=int, default=20, help="Timed runs of each case"
+        )
+        parser.add_argument(
+            "--warmup", type=int, default=2, help="Untimed runs before timing"
+        )
+        parser.add_argument(
+            "--filter", default="", help="Only run cases whose name contains this"
+        )
+        parser.add_argument(
+            "--baseline",
+            type=Path,
+            default=BASELINE_PATH,
+            help="Baseline file to compare against",
+        )
+        parser.add_argument(
+            "--update-baseline",
+            action="store_true",
+            help="Store the results as the new baseline instead of comparing",
+        )
+        parser.add_argument(
+            "--latency-threshold",
+            type=float,
+            default=0.5,
+            help=(
+                "Allowed slowdown as a fraction of the baseline; latencies are "
+                "only comparable on the machine that recorded it"
+            ),
+        )
+        parser.add_argument(
+            "--min-latency-delta",
+            type=float,
+            default=2.0,
+            help="Slowdowns below this many milliseconds never fail",
+        )
+        parser.add_argument(
+            "--metric",
+            choices=["p50", "p95", "p99"],
+            default="p50",
+            help="Latency percentile held to the budget",
+        )
+        parser.add_argument(
+            "--query-threshold",
+            type=int,
+            default=0,
+            help="Allowed number of extra queries per case",
+        )
+        parser.add_argument(
+            "--output", type=Path, help="Also write the results to this JSON file"
+        )
+
+    def handle(self, *args, **options):
+        dataset = Dataset(
+            chats=options["chats"],
+            messages_per_chat=options["messages"],
+            participants_per_chat=options["participants"],
+            files_per_chat=options["files"],
+        )
+        runner = BenchmarkRunner(repeat=options["repeat"], warmup=options["warmup"])
+
+        self.stdout.write(f"Seeding {dataset}")
+        # Everything runs in one transaction rolled back at the end, with
+        # uploaded files in a temporary directory: the database and media
+        # root are left as they were. Requests go through the test client.
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(
+                MEDIA_ROOT=media_root,
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            ):
+                with transaction.atomic():
+                    data = seed_dataset(dataset)
+                    cases = [
+                        case
+                        for case in all_cases(data)
+                        if options["filter"] in case.name
+                    ]
+                    results = runner.run(cases, stdout=self.stdout)
+                    transaction.set_rollback(True)
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(
+                    {"dataset": dataset.as_dict(), "results": results}, f, indent=2
+                )
+
+        if options["update_baseline"]:
+            baseline = load_baseline(options["baseline"]) or {"results": {}}
+            if baseline.get("dataset") not in (None, dataset.as_dict()):
+                baseline["results"] = {}
+            baseline["results"].update(results)
+            save_baseline(baseline["results"], dataset.as_dict(), options["baseline"])
+            self.stdout.write(
+                self.style.SUCCESS(f"Baseline written to {options['baseline']}")
+            )
+            return
+
+        baseline = load_baseline(options["baseline"])
+        if baseline is None:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"No baseline at {options['baseline']}; "
+                    "run with --update-baseline to create one"
+                )
+            )
+            return
+        latency_threshold = options["latency_threshold"]
+        if baseline["dataset"] != dataset.as_dict():
+            self.stdout.write(
+                self.style.WARNING(
+                    "The baseline was measured on another dataset; "
+                    "only query counts are compared"
+                )
+            )
+            latency_threshold = None
+
+        regressions = compare(
+            results,
+            baseline,
+            latency_threshold=latency_threshold,
+            query_threshold=options["query_threshold"],
+            min_latency_delta=options["min_latency_delta"],
+            metric=options["metric"],
+        )
+        if regressions:
+            raise CommandError(
+                f"{len(regressions)} budgets exceeded:\n" + "\n".join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS(f"{len(results)} cases within budget"))
@@ -0,0 +1,90 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from applications.chats.benchmarks import (
+    Dataset,
+    LoadRunner,
+    load_scenarios,
+    seed_dataset,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a dataset and compares the requests per second of the chats "
+        "routes served by async views with their DRF viewsets, under "
+        "concurrent load on one ASGI worker"
+    )
+
+    def add_arguments(self, parser):
+        dataset = parser.add_argument_group("dataset")
+        dataset.add_argument("--chats", type=int, default=20)
+        dataset.add_argument("--messages", type=int, default=200, help="Per chat")
+        dataset.add_argument("--participants", type=int, default=5, help="Per chat")
+        dataset.add_argument("--files", type=int, default=5, help="Per chat")
+        parser.add_argument(
+            "--concurrency", type=int, default=32, help="Requests in flight at once"
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=500,
+            help="Timed requests per scenario and stack",
+        )
+        parser.add_argument(
+            "--filter", default="", help="Only run scenarios whose name contains this"
+        )
+        parser.add_argument(
+            "--output", type=Path, help="Also write the results to this JSON file"
+        )
+
+    def handle(self, *args, **options):
+        dataset = Dataset(
+            chats=options["chats"],
+            messages_per_chat=options["messages"],
+            participants_per_chat=options["participants"],
+            files_per_chat=options["files"],
+        )
+
+        self.stdout.write(f"Seeding {dataset}")
+        # Like benchmark_chats: rolled back at the end, with uploaded files
+        # in a temporary directory.
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(
+                MEDIA_ROOT=media_root,
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            ):
+                with transaction.atomic():
+                    data = seed_dataset(dataset)
+                    try:
+                        runner = LoadRunner(
+                            data,
+                            concurrency=options["concurrency"],
+                            requests=options["requests"],
+                        )
+                    except ValueError as e:
+                        raise CommandError(str(e))
+                    scenarios = [
+                        scenario
+                        for scenario in load_scenarios(data)
+                        if options["filter"] in scenario.name
+                    ]
+                    results = runner.run(scenarios, stdout=self.stdout)
+                    transaction.set_rollback(True)
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(
+                    {
+                        "dataset": dataset.as_dict(),
+                        "concurrency": options["concurrency"],
+                        "results": results,
+                    },
+                    f,
+                    indent=2,
+                )
@@ -0,0 +1,101 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from applications.chats.models import Chat, Message
+from applications.chats.renderers import FastJSONRenderer
+from applications.chats.serializers import MessageRowSerializer, MessageSerializer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Times rendering a page of messages through MessageSerializer and "
+        "JSONRenderer against the .values() fast path and FastJSONRenderer"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--messages",
+            type=int,
+            default=10000,
+            help="Number of messages on the page",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Number of timed runs of each path; the median is reported",
+        )
+        parser.add_argument(
+            "--chat",
+            type=int,
+            help="Render this chat's messages instead of a temporary seeded chat",
+        )
+
+    def handle(self, *args, **options):
+        if options["chat"] is not None:
+            self.benchmark(options["chat"], options)
+            return
+        with transaction.atomic():
+            self.benchmark(self.seed(options["messages"]), options)
+            transaction.set_rollback(True)
+
+    def seed(self, count):
+        senders = [
+            User.objects.create(username=f"benchmark-{i}", email=f"b{i}@example.com")
+            for i in range(5)
+        ]
+        chat = Chat.objects.create(title="Benchmark", created_by=senders[0])
+        Message.objects.bulk_create(
+            Message(
+                chat=chat,
+                sender=senders[i % len(senders)],
+                content=f'Message {i}: naïve café   "quoted" text ' * 4,
+                context_index=i if i % 3 else None,
+            )
+            for i in range(count)
+        )
+        return chat.pk
+
+    def benchmark(self, chat_id, options):
+        limit = options["messages"]
+        messages = Message.objects.filter(chat_id=chat_id).order_by("created_at", "id")
+
+        def serializer_path():
+            page = messages.select_related("sender")[:limit]
+            return JSONRenderer().render(MessageSerializer(page, many=True).data)
+
+        def fast_path():
+            page = messages.as_rows()[:limit]
+            return FastJSONRenderer().render(MessageRowSerializer(page, many=True).data)
+
+        count = messages[:limit].count()
+        if not count:
+            raise CommandError(f"Chat {chat_id} has no messages")
+        expected, actual = serializer_path(), fast_path()
+        if expected != actual:
+            raise CommandError("The fast path renders different bytes")
+
+        slow = self.time(serializer_path, options["repeat"])
+        fast = self.time(fast_path, options["repeat"])
+        self.stdout.write(
+            f"{count} messages, {len(expected)} bytes, "
+            f"median of {options['repeat']} runs"
+        )
+        self.stdout.write(f"  MessageSerializer + JSONRenderer:    {slow:8.1f} ms")
+        self.stdout.write(f"  MessageRowSerializer + FastJSON:     {fast:8.1f} ms")
+        self.stdout.write(self.style.SUCCESS(f"Speedup: {slow / fast:.1f}x"))
+
+    @staticmethod
+    def time(func, repeat):
+        durations = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            durations.append((time.perf_counter() - start) * 1000)
+        return statistics.median(durations)
@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from applications.chats.services import UploadSessionService
+
+
+class Command(BaseCommand):
+    help = "Discards chunked upload sessions that have been idle for too long"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--max-age-hours",
+            type=float,
+            default=getattr(settings, "CHATS_UPLOAD_SESSION_TTL_HOURS", 24),
+            help="Idle time in hours after which a session is discarded",
+        )
+
+    def handle(self, *args, **options):
+        max_age = timedelta(hours=options["max_age_hours"])
+        discarded = UploadSessionService().cleanup_stale(max_age)
+        self.stdout.write(
+            self.style.SUCCESS(f"Discarded {discarded} stale upload sessions")
+        )
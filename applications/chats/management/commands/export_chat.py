@@ -0,0 +1,67 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from applications.chats.models import Chat
+from applications.chats.services import ChatExportService
+from applications.chats.services.export_service import FORMATS, export_config
+
+
+class Command(BaseCommand):
+    help = (
+        "Streams a chat's whole history, archived messages included, as "
+        "NDJSON or CSV in constant memory"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("chat_id", type=int, help="ID of the chat to export")
+        parser.add_argument(
+            "--output", choices=list(FORMATS), default="ndjson", help="Export format"
+        )
+        parser.add_argument(
+            "--files",
+            action="store_true",
+            help="Also export the metadata of the chat's files",
+        )
+        parser.add_argument(
+            "--gzip", action="store_true", help="Compress the export with gzip"
+        )
+        parser.add_argument(
+            "--to",
+            help="File to write; defaults to a file named after the chat, "
+            "or '-' for standard output",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=export_config()["CHUNK_SIZE"],
+            help="Rows read per query",
+        )
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be at least 1")
+        chat_id = options["chat_id"]
+        if not Chat.objects.filter(pk=chat_id).exists():
+            raise CommandError(f"Chat {chat_id} does not exist")
+
+        service = ChatExportService(chunk_size=options["chunk_size"])
+        chunks = service.export(
+            chat_id, options["output"], options["files"], options["gzip"]
+        )
+        path = options["to"] or service.filename(
+            chat_id, options["output"], options["gzip"]
+        )
+        if path == "-":
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+            return
+
+        written = 0
+        with open(path, "wb") as out:
+            for chunk in chunks:
+                out.write(chunk)
+                written += len(chunk)
+        self.stdout.write(
+            self.style.SUCCESS(f"Exported chat {chat_id} to {path} ({written:,} bytes)")
+        )
@@ -1,18 +1,85 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
-from django.utils import timezone
-from datetime import timedelta
-from applications.chats.models import Chat, Message
-from faker import Faker
+from django.db import connection
+from applications.chats.benchmarks import (
+    DISTRIBUTIONS,
+    SAMPLE_PASSWORD,
+    SampleData,
+    generate_sample_data,
+)
 
 User = get_user_model()
-fake = Faker()
 
 
 class Command(BaseCommand):
-    help = "Generates sample chats with messages for testing purposes"
+    help = (
+        "Generates sample users, chats, messages and file metadata with bulk "
+        "inserts, optionally in parallel, for development and load testing"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10, help="Users to generate")
+        parser.add_argument("--chats", type=int, default=5)
+        parser.add_argument(
+            "--messages", type=int, default=30, help="Mean messages per chat"
+        )
+        parser.add_argument(
+            "--participants",
+            type=int,
+            default=3,
+            help="Members per chat, the test user included",
+        )
+        parser.add_argument(
+            "--files", type=int, default=0, help="File metadata rows per chat"
+        )
+        parser.add_argument(
+            "--distribution",
+            choices=DISTRIBUTIONS,
+            default="uniform",
+            help="How messages spread over chats and senders",
+        )
+        parser.add_argument(
+            "--skew", type=float, default=1.1, help="Exponent of the zipf distribution"
+        )
+        parser.add_argument(
+            "--days", type=int, default=7, help="Messages span this many days"
+        )
+        parser.add_argument("--seed", type=int, help="Seed for reproducible data")
+        parser.add_argument(
+            "--batch-size", type=int, default=5000, help="Rows per INSERT"
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Processes inserting messages; SQLite always uses one",
+        )
 
     def handle(self, *args, **options):
+        try:
+            plan = SampleData(
+                users=options["users"],
+                chats=options["chats"],
+                messages_per_chat=options["messages"],
+                participants_per_chat=options["participants"],
+                files_per_chat=options["files"],
+                distribution=options["distribution"],
+                skew=options["skew"],
+                days=options["days"],
+                seed=options["seed"],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        workers = max(options["workers"], 1)
+        if workers > 1 and connection.vendor == "sqlite":
+            self.stdout.write(
+                self.style.WARNING(
+                    "SQLite allows a single writer; generating with one worker"
+                )
+            )
+            workers = 1
+
         # Get or create a test user
         user, created = User.objects.get_or_create(
             username="testuser",
@@ -23,43 +90,32 @@ class Command(BaseCommand):
             },
         )
         if created:
-            user.set_password("testpass123")
+            user.set_password(SAMPLE_PASSWORD)
             user.save()
             self.stdout.write(self.style.SUCCESS("Created test user"))
 
-        # Generate 5 chats
-        for i in range(5):
-            chat = Chat.objects.create(
-                title=fake.sentence(),
-                prompt=fake.paragraph(),
-                created_by=user,
-                is_active=True,
-            )
-            chat.participants.add(user)
-
-            # Generate 30 messages for each chat
-            for j in range(30):
-                # Create messages with random timestamps within the last 7 days
-                random_days = fake.random_int(min=0, max=7)
-                random_hours = fake.random_int(min=0, max=24)
-                random_minutes = fake.random_int(min=0, max=60)
-
-                created_at = timezone.now() - timedelta(
-                    days=random_days, hours=random_hours, minutes=random_minutes
-                )
-
-                Message.objects.create(
-                    chat=chat,
-                    content=fake.paragraph(),
-                    sender=user,
-                    context_index=j,
-                    created_at=created_at,
-                )
-
-            self.stdout.write(
-                self.style.SUCCESS(f'Created chat "{chat.title}" with 30 messages')
+        self.stdout.write(
+            f"Generating {plan.chats} chats with {plan.total_messages} messages "
+            f"({plan.distribution}) for {plan.users} users, seed {plan.seed}"
+        )
+        created = generate_sample_data(
+            plan,
+            user,
+            batch_size=options["batch_size"],
+            workers=workers,
+            progress=self.report_progress if options["verbosity"] else None,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Created {users} users, {chats} chats, {messages} messages "
+                "and {files} files".format(**created)
             )
+        )
 
+    def report_progress(self, inserted, total, elapsed):
+        rate = inserted / elapsed if elapsed else 0
+        percent = 100 * inserted / total if total else 100
         self.stdout.write(
-            self.style.SUCCESS("Successfully generated 5 chats with 30 messages each")
+            f"{inserted:>12,} / {total:,} messages ({percent:5.1f}%), "
+            f"{rate:,.0f} rows/s"
         )
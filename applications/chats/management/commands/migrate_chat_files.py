@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from applications.chats.services import BlobService
+from applications.chats.services.blob_service import MIGRATE_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves chat files stored before content-addressed blobs into blobs, "
+        "deleting duplicate copies, and recounts blob references"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=MIGRATE_BATCH_SIZE,
+            help="Number of files migrated per transaction",
+        )
+
+    def handle(self, *args, **options):
+        service = BlobService()
+        totals = service.migrate_legacy(
+            batch_size=options["batch_size"],
+            progress=self.report_progress if options["verbosity"] > 1 else None,
+        )
+        removed = service.repair()
+        if totals["missing"]:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Skipped {totals['missing']} files whose content is missing"
+                )
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Migrated {totals['files']} files into {totals['blobs']} new blobs, "
+                f"reclaiming {totals['reclaimed']:,} bytes; "
+                f"removed {removed} unreferenced blobs"
+            )
+        )
+
+    def report_progress(self, totals):
+        self.stdout.write(
+            f"{totals['files']:,} files migrated, {totals['blobs']:,} blobs created"
+        )
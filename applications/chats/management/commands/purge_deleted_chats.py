@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from applications.chats.services import ChatDeletionService
+from applications.chats.services.chat_deletion_service import deletion_config
+
+
+class Command(BaseCommand):
+    help = (
+        "Purges every deleted chat now, in batches, instead of waiting for "
+        "the chats.purge_chat jobs run by run_chat_jobs"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=deletion_config()["BATCH_SIZE"],
+            help="Rows deleted per transaction",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+        purged = ChatDeletionService(batch_size=options["batch_size"]).purge_deleted(
+            progress=self.report_progress if options["verbosity"] > 1 else None
+        )
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} deleted chats"))
+
+    def report_progress(self, chat_id, deleted):
+        self.stdout.write(f"chat {chat_id}: {deleted:,} rows deleted so far")
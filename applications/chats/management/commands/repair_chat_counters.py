@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from applications.chats.services import ChatCounterService
+
+
+class Command(BaseCommand):
+    help = "Recomputes the denormalized chat counters and repairs drifted ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of chats checked per transaction",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report chats whose counters drifted",
+        )
+
+    def handle(self, *args, **options):
+        drifted = ChatCounterService().repair(
+            batch_size=options["batch_size"],
+            dry_run=options["dry_run"],
+            stdout=self.stdout if options["verbosity"] > 1 else None,
+        )
+        if drifted and options["verbosity"] > 1:
+            self.stdout.write(f"Drifted chats: {', '.join(map(str, drifted))}")
+        verb = "Found" if options["dry_run"] else "Repaired"
+        self.stdout.write(
+            self.style.SUCCESS(f"{verb} {len(drifted)} chats with drifted counters")
+        )
@@ -0,0 +1,85 @@
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from applications.chats.services import JobService
+from applications.chats.services.job_service import setup_process
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs background jobs of the chats app from the database queue, "
+        "until interrupted or, with --once, until none are due"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=4,
+            help="Jobs run at the same time; 1 runs them in this process",
+        )
+        parser.add_argument(
+            "--pool",
+            choices=("thread", "process"),
+            default="thread",
+            help="Run jobs in threads, or in processes for CPU-bound handlers",
+        )
+        parser.add_argument(
+            "--idle-sleep",
+            type=float,
+            default=1.0,
+            help="Seconds to wait for new jobs when none are due",
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Exit once no job is due"
+        )
+        parser.add_argument(
+            "--retry-failed",
+            action="store_true",
+            help="Requeue failed jobs with fresh attempts before starting",
+        )
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1:
+            raise CommandError("--concurrency must be at least 1")
+        service = JobService()
+        if options["retry_failed"]:
+            self.stdout.write(f"Requeued {service.retry_failed()} failed jobs")
+
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        executor = None
+        if options["concurrency"] > 1:
+            if options["pool"] == "process":
+                connections.close_all()
+                executor = ProcessPoolExecutor(
+                    options["concurrency"], initializer=setup_process
+                )
+            else:
+                executor = ThreadPoolExecutor(options["concurrency"])
+
+        processed = 0
+        self.stdout.write(f"Worker {service.worker_id} started")
+        try:
+            while not self.stopping:
+                claimed = service.run_batch(executor)
+                processed += claimed
+                if claimed and options["verbosity"] > 1:
+                    self.stdout.write(f"{processed:,} jobs processed")
+                if not claimed:
+                    if options["once"]:
+                        break
+                    time.sleep(options["idle_sleep"])
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} jobs"))
+
+    def stop(self, signum, frame):
+        # Finish the batch in hand, whose jobs are leased to this worker.
+        self.stopping = True
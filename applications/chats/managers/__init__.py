@@ -1,12 +1,28 @@
-from .chat_manager import ChatManager, ChatQuerySet
+from .chat_manager import AllChatsManager, ChatManager, ChatQuerySet
 from .message_manager import MessageManager, MessageQuerySet
 from .file_manager import FileManager, FileQuerySet
+from .upload_session_manager import UploadSessionManager, UploadSessionQuerySet
+from .chat_inbox_manager import ChatInboxManager, ChatInboxQuerySet
+from .message_segment_manager import MessageSegmentManager, MessageSegmentQuerySet
+from .blob_manager import BlobManager, BlobQuerySet
+from .job_manager import JobManager, JobQuerySet
 
 __all__ = [
+    "AllChatsManager",
     "ChatManager",
     "ChatQuerySet",
     "MessageManager",
     "MessageQuerySet",
     "FileManager",
     "FileQuerySet",
+    "UploadSessionManager",
+    "UploadSessionQuerySet",
+    "ChatInboxManager",
+    "ChatInboxQuerySet",
+    "MessageSegmentManager",
+    "MessageSegmentQuerySet",
+    "BlobManager",
+    "BlobQuerySet",
+    "JobManager",
+    "JobQuerySet",
 ]
@@ -0,0 +1,20 @@
+from django.db import models
+
+
+class BlobQuerySet(models.QuerySet):
+    def with_hash(self, sha256):
+        return self.filter(sha256=sha256)
+
+    def unreferenced(self):
+        return self.filter(ref_count__lte=0)
+
+
+class BlobManager(models.Manager):
+    def get_queryset(self):
+        return BlobQuerySet(self.model, using=self._db)
+
+    def with_hash(self, sha256):
+        return self.get_queryset().with_hash(sha256)
+
+    def unreferenced(self):
+        return self.get_queryset().unreferenced()
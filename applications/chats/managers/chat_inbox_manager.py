@@ -0,0 +1,26 @@
+from django.db import models
+
+
+class ChatInboxQuerySet(models.QuerySet):
+    def for_user(self, user):
+        return self.filter(user=user)
+
+    def for_chat(self, chat):
+        return self.filter(chat=chat)
+
+    def newest_first(self):
+        return self.order_by("-last_activity_at", "-id")
+
+
+class ChatInboxManager(models.Manager):
+    def get_queryset(self):
+        return ChatInboxQuerySet(self.model, using=self._db)
+
+    def for_user(self, user):
+        return self.get_queryset().for_user(user)
+
+    def for_chat(self, chat):
+        return self.get_queryset().for_chat(chat)
+
+    def newest_first(self):
+        return self.get_queryset().newest_first()
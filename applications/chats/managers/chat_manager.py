@@ -1,4 +1,6 @@
+from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models.functions import Coalesce, Greatest
 
 
 class ChatQuerySet(models.QuerySet):
@@ -20,10 +22,102 @@ class ChatQuerySet(models.QuerySet):
     def with_title(self, title):
         return self.filter(title__icontains=title)
 
+    def deleted(self):
+        """Tombstones waiting to be purged, oldest deletion first."""
+        return self.filter(deleted_at__isnull=False).order_by("deleted_at")
+
+    def in_inbox_of(self, user):
+        """Chats in the user's inbox, most recent activity first."""
+        return self.filter(inbox_entries__user=user).order_by(
+            "-inbox_entries__last_activity_at", "-inbox_entries__id"
+        )
+
+    def with_validators(self):
+        """
+        Annotate what conditional GETs derive their validators from.
+
+        Every annotation is a MIN/MAX/COUNT over an index keyed by chat, so
+        computing them reads a few index entries per chat and never a message,
+        file or participant row.
+        """
+        from ..models import File, Message
+
+        participants = (
+            self.model.participants.through.objects.filter(
+                chat_id=models.OuterRef("pk")
+            )
+            .order_by()
+            .values("chat_id")
+        )
+        messages = Message.objects.filter(chat_id=models.OuterRef("pk")).order_by()
+        files = File.objects.filter(chat_id=models.OuterRef("pk")).order_by()
+        return self.annotate(
+            messages_updated_at=models.Subquery(
+                messages.values("chat_id")
+                .annotate(latest=models.Max("updated_at"))
+                .values("latest")
+            ),
+            files_uploaded_at=models.Subquery(
+                files.values("chat_id")
+                .annotate(latest=models.Max("uploaded_at"))
+                .values("latest")
+            ),
+            files_max_id=models.Subquery(
+                files.values("chat_id").annotate(n=models.Max("id")).values("n")
+            ),
+            participant_count=models.Subquery(
+                participants.annotate(n=models.Count("id")).values("n")
+            ),
+            participants_max_id=models.Subquery(
+                participants.annotate(n=models.Max("id")).values("n")
+            ),
+            participants_user_sum=models.Subquery(
+                participants.annotate(n=models.Sum("user_id")).values("n")
+            ),
+        )
+
+    def with_summary(self):
+        """
+        Annotate last activity for list views.
+
+        Counts and the last message come from the chat's denormalized
+        counters, so listing chats never touches messages or files, and
+        participants are prefetched as bare ids.
+        """
+        return self.annotate(
+            last_activity_at=Greatest(
+                "updated_at", Coalesce("last_message_at", "updated_at")
+            ),
+        ).prefetch_related(
+            models.Prefetch(
+                "participants", queryset=get_user_model().objects.only("id")
+            )
+        )
+
+    def with_details(self):
+        """
+        Load everything the detail representation nests in a fixed number of
+        queries: one for the chat and its creator, one each for participants,
+        messages (with senders) and files (with uploaders).
+        """
+        from ..models import File, Message
+
+        return self.select_related("created_by").prefetch_related(
+            "participants",
+            models.Prefetch(
+                "messages", queryset=Message.objects.select_related("sender")
+            ),
+            models.Prefetch(
+                "files", queryset=File.objects.select_related("uploaded_by")
+            ),
+        )
+
 
 class ChatManager(models.Manager):
+    """Chats not deleted: tombstones are left out of every query."""
+
     def get_queryset(self):
-        return ChatQuerySet(self.model, using=self._db)
+        return ChatQuerySet(self.model, using=self._db).filter(deleted_at__isnull=True)
 
     def active(self):
         return self.get_queryset().active()
@@ -42,3 +136,25 @@ class ChatManager(models.Manager):
 
     def with_title(self, title):
         return self.get_queryset().with_title(title)
+
+    def in_inbox_of(self, user):
+        return self.get_queryset().in_inbox_of(user)
+
+    def with_summary(self):
+        return self.get_queryset().with_summary()
+
+    def with_details(self):
+        return self.get_queryset().with_details()
+
+    def with_validators(self):
+        return self.get_queryset().with_validators()
+
+
+class AllChatsManager(ChatManager):
+    """Every chat, tombstones included, for the code purging them."""
+
+    def get_queryset(self):
+        return ChatQuerySet(self.model, using=self._db)
+
+    def deleted(self):
+        return self.get_queryset().deleted()
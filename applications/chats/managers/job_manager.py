@@ -0,0 +1,28 @@
+from django.db import models
+
+
+class JobQuerySet(models.QuerySet):
+    def claimable(self, now):
+        """
+        Pending jobs that are due and running jobs whose lease expired,
+        longest waiting first.
+        """
+        return (
+            self.exclude(status="failed")
+            .filter(available_at__lte=now)
+            .order_by("available_at")
+        )
+
+    def failed(self):
+        return self.filter(status="failed").order_by("-updated_at")
+
+
+class JobManager(models.Manager):
+    def get_queryset(self):
+        return JobQuerySet(self.model, using=self._db)
+
+    def claimable(self, now):
+        return self.get_queryset().claimable(now)
+
+    def failed(self):
+        return self.get_queryset().failed()
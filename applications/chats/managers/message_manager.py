@@ -23,6 +23,22 @@ class MessageQuerySet(models.QuerySet):
     def between_dates(self, start_date, end_date):
         return self.filter(created_at__range=(start_date, end_date))
 
+    def as_rows(self):
+        """
+        Plain dicts with the sender's public fields joined in, for read-only
+        rendering with ``MessageRowSerializer``.
+        """
+        return self.values(
+            "id",
+            "content",
+            "context_index",
+            "created_at",
+            "updated_at",
+            "sender_id",
+            sender_username=models.F("sender__username"),
+            sender_email=models.F("sender__email"),
+        )
+
 
 class MessageManager(models.Manager):
     def get_queryset(self):
@@ -48,3 +64,6 @@ class MessageManager(models.Manager):
 
     def between_dates(self, start_date, end_date):
         return self.get_queryset().between_dates(start_date, end_date)
+
+    def as_rows(self):
+        return self.get_queryset().as_rows()
@@ -0,0 +1,56 @@
+from django.db import models
+
+
+class MessageSegmentQuerySet(models.QuerySet):
+    def for_chat(self, chat):
+        return self.filter(chat=chat)
+
+    def after(self, created_at, message_id):
+        """
+        Segments holding messages after ``(created_at, message_id)``, oldest
+        first. Segments of a chat never overlap, so ordering by their last
+        message orders them by their first as well.
+        """
+        return self.filter(
+            models.Q(last_created_at__gte=created_at)
+            & (
+                models.Q(last_created_at__gt=created_at)
+                | models.Q(last_message_id__gt=message_id)
+            )
+        ).order_by("last_created_at", "last_message_id")
+
+    def before(self, created_at, message_id):
+        """Segments holding messages before ``(created_at, message_id)``, newest first."""
+        return self.filter(
+            models.Q(first_created_at__lte=created_at)
+            & (
+                models.Q(first_created_at__lt=created_at)
+                | models.Q(first_message_id__lt=message_id)
+            )
+        ).order_by("-first_created_at", "-first_message_id")
+
+    def oldest(self):
+        return self.order_by("last_created_at", "last_message_id")
+
+    def newest(self):
+        return self.order_by("-first_created_at", "-first_message_id")
+
+
+class MessageSegmentManager(models.Manager):
+    def get_queryset(self):
+        return MessageSegmentQuerySet(self.model, using=self._db)
+
+    def for_chat(self, chat):
+        return self.get_queryset().for_chat(chat)
+
+    def after(self, created_at, message_id):
+        return self.get_queryset().after(created_at, message_id)
+
+    def before(self, created_at, message_id):
+        return self.get_queryset().before(created_at, message_id)
+
+    def oldest(self):
+        return self.get_queryset().oldest()
+
+    def newest(self):
+        return self.get_queryset().newest()
@@ -0,0 +1,14 @@
+from django.db import models
+
+
+class UploadSessionQuerySet(models.QuerySet):
+    def stale(self, before):
+        return self.filter(updated_at__lt=before)
+
+
+class UploadSessionManager(models.Manager):
+    def get_queryset(self):
+        return UploadSessionQuerySet(self.model, using=self._db)
+
+    def stale(self, before):
+        return self.get_queryset().stale(before)
@@ -0,0 +1,8 @@
+from .query_instrumentation import QueryInstrumentationMiddleware, normalize_sql
+from .read_your_writes import ReadYourWritesMiddleware
+
+__all__ = [
+    "QueryInstrumentationMiddleware",
+    "normalize_sql",
+    "ReadYourWritesMiddleware",
+]
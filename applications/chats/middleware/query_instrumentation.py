@@ -0,0 +1,201 @@
+import json
+import logging
+import random
+import re
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger("applications.chats.queries")
+
+DEFAULT_SAMPLE_RATE = 1.0
+DEFAULT_N_PLUS_ONE_THRESHOLD = 10
+DEFAULT_TOP_STATEMENTS = 3
+
+# Statistics of the request being instrumented in the current context.
+# Context variables follow ``sync_to_async`` into worker threads, so queries
+# async views run off the event loop are attributed to their request too.
+_current: ContextVar[Optional["QueryStats"]] = ContextVar(
+    "chats_query_stats", default=None
+)
+
+_IN_LIST = re.compile(r"\bIN\s*\(\s*%s(?:\s*,\s*%s)*\s*\)", re.IGNORECASE)
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.\"])-?\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    """
+    Reduce a statement to its shape, so repeats of one query compare equal.
+
+    Literals become ``?`` and ``IN`` lists of any length ``IN (...)``: the
+    same ORM query for another row or another batch has the same shape.
+    """
+    sql = _IN_LIST.sub("IN (...)", sql)
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    return _WHITESPACE.sub(" ", sql).replace("%s", "?").strip()
+
+
+class QueryStats:
+    """Queries run while handling one request, grouped by shape."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Dict[str, List[float]] = {}
+
+    def record(self, sql: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        shape = self.shapes.setdefault(normalize_sql(sql), [0, 0.0])
+        shape[0] += 1
+        shape[1] += duration
+
+    def top(self, limit: int) -> List[dict]:
+        """The ``limit`` most repeated shapes, with their count and time (ms)."""
+        ranked = sorted(
+            self.shapes.items(), key=lambda item: (item[1][0], item[1][1]), reverse=True
+        )
+        return [
+            {"sql": sql, "count": count, "ms": round(duration * 1000, 3)}
+            for sql, (count, duration) in ranked[:limit]
+        ]
+
+    def repeated(self, threshold: int) -> List[str]:
+        """Shapes run more than ``threshold`` times: likely N+1 queries."""
+        return [sql for sql, (count, _) in self.shapes.items() if count > threshold]
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper timing queries of instrumented requests."""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.record(sql, time.perf_counter() - start)
+
+
+def install(connection) -> None:
+    """Add ``record_query`` to a connection's execute wrappers, once."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    install(connection)
+
+
+connection_created.connect(
+    _on_connection_created, dispatch_uid="chats_query_instrumentation"
+)
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Report the SQL each request runs, and flag likely N+1 queries.
+
+    A sampled request gets a ``Server-Timing`` header with its query count
+    and database time, and one JSON log line on the
+    ``applications.chats.queries`` logger with the most repeated statement
+    shapes. When a shape runs more than ``N_PLUS_ONE_THRESHOLD`` times, the
+    request is flagged as N+1 and logged as a warning.
+
+    Requests outside the sample cost one random draw, and each of their
+    queries one context variable lookup, so it can stay on in production
+    with a low ``SAMPLE_RATE``. Configured by ``CHATS_QUERY_INSTRUMENTATION``.
+    Queries run while a streaming response is consumed are not counted.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = getattr(settings, "CHATS_QUERY_INSTRUMENTATION", {})
+        self.enabled = config.get("ENABLED", True)
+        self.sample_rate = config.get("SAMPLE_RATE", DEFAULT_SAMPLE_RATE)
+        self.threshold = config.get(
+            "N_PLUS_ONE_THRESHOLD", DEFAULT_N_PLUS_ONE_THRESHOLD
+        )
+        self.top = config.get("TOP_STATEMENTS", DEFAULT_TOP_STATEMENTS)
+        self.server_timing = config.get("SERVER_TIMING", True)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def sampled(self) -> bool:
+        if not self.enabled or self.sample_rate <= 0:
+            return False
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def start(self) -> QueryStats:
+        # Connections opened before this process loaded the middleware never
+        # sent ``connection_created`` to it.
+        for connection in connections.all(initialized_only=True):
+            install(connection)
+        return QueryStats()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+        stats = self.start()
+        token = _current.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.report(request, response, stats)
+        return response
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        stats = self.start()
+        token = _current.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.report(request, response, stats)
+        return response
+
+    def report(self, request, response, stats: QueryStats) -> None:
+        repeated = stats.repeated(self.threshold)
+        duration = round(stats.duration * 1000, 3)
+        if self.server_timing:
+            timings = [f'db;dur={duration};desc="{stats.count} queries"']
+            if repeated:
+                timings.append(f'db-n-plus-one;desc="{len(repeated)} repeated"')
+            if response.has_header("Server-Timing"):
+                timings.insert(0, response["Server-Timing"])
+            response["Server-Timing"] = ", ".join(timings)
+
+        logger.log(
+            logging.WARNING if repeated else logging.INFO,
+            json.dumps(
+                {
+                    "event": "request_queries",
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "queries": stats.count,
+                    "db_ms": duration,
+                    "n_plus_one": bool(repeated),
+                    "repeated": repeated,
+                    "top": stats.top(self.top),
+                }
+            ),
+        )
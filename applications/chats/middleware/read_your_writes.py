@@ -0,0 +1,70 @@
+import math
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from ..routing import PinState, pin_state, routing_config
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class ReadYourWritesMiddleware:
+    """
+    Keep a client's reads on the primary for a while after it writes.
+
+    Requests with unsafe methods read from the primary throughout, and any
+    request that wrote to the chats app sets a cookie holding the time its
+    pin expires. Later requests carrying the cookie read from the primary
+    until then, so a client sees its own messages even while replicas lag.
+    Does nothing when ``CHATS_DATABASE_ROUTING`` configures no replicas.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def start(self, request, config: dict) -> PinState:
+        try:
+            pinned_until = float(request.COOKIES.get(config["COOKIE_NAME"], 0))
+        except ValueError:
+            pinned_until = 0.0
+        # A client can only shorten its pin, never extend it.
+        state = PinState(min(pinned_until, time.time() + config["STICKY_SECONDS"]))
+        if request.method not in SAFE_METHODS:
+            state.forced += 1
+        return state
+
+    def finish(self, response, state: PinState, config: dict) -> None:
+        if state.wrote:
+            response.set_cookie(
+                config["COOKIE_NAME"],
+                f"{state.pinned_until:.3f}",
+                max_age=math.ceil(config["STICKY_SECONDS"]),
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite="Lax",
+            )
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        config = routing_config()
+        if not config["REPLICAS"]:
+            return self.get_response(request)
+        with pin_state(self.start(request, config)) as state:
+            response = self.get_response(request)
+        self.finish(response, state, config)
+        return response
+
+    async def __acall__(self, request):
+        config = routing_config()
+        if not config["REPLICAS"]:
+            return await self.get_response(request)
+        with pin_state(self.start(request, config)) as state:
+            response = await self.get_response(request)
+        self.finish(response, state, config)
+        return response
@@ -0,0 +1,100 @@
+from django.db import migrations
+
+# Frozen copy of the FTS5 schema as of this migration; later changes to
+# services/search_service.py must not alter what this migration creates.
+INDEX_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS chats_message_fts USING fts5(
+        content, content='chats_message', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS chats_chat_fts USING fts5(
+        title, prompt, content='chats_chat', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+]
+
+TRIGGERS = {
+    "chats_message_fts_insert": """
+        AFTER INSERT ON chats_message BEGIN
+            INSERT INTO chats_message_fts(rowid, content) VALUES (new.id, new.content);
+        END
+    """,
+    "chats_message_fts_delete": """
+        AFTER DELETE ON chats_message BEGIN
+            INSERT INTO chats_message_fts(chats_message_fts, rowid, content)
+            VALUES ('delete', old.id, old.content);
+        END
+    """,
+    "chats_message_fts_update": """
+        AFTER UPDATE OF content ON chats_message BEGIN
+            INSERT INTO chats_message_fts(chats_message_fts, rowid, content)
+            VALUES ('delete', old.id, old.content);
+            INSERT INTO chats_message_fts(rowid, content) VALUES (new.id, new.content);
+        END
+    """,
+    "chats_chat_fts_insert": """
+        AFTER INSERT ON chats_chat BEGIN
+            INSERT INTO chats_chat_fts(rowid, title, prompt)
+            VALUES (new.id, new.title, new.prompt);
+        END
+    """,
+    "chats_chat_fts_delete": """
+        AFTER DELETE ON chats_chat BEGIN
+            INSERT INTO chats_chat_fts(chats_chat_fts, rowid, title, prompt)
+            VALUES ('delete', old.id, old.title, old.prompt);
+        END
+    """,
+    "chats_chat_fts_update": """
+        AFTER UPDATE OF title, prompt ON chats_chat BEGIN
+            INSERT INTO chats_chat_fts(chats_chat_fts, rowid, title, prompt)
+            VALUES ('delete', old.id, old.title, old.prompt);
+            INSERT INTO chats_chat_fts(rowid, title, prompt)
+            VALUES (new.id, new.title, new.prompt);
+        END
+    """,
+}
+
+INDEXES = ("chats_message_fts", "chats_chat_fts")
+
+
+def install(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for statement in INDEX_DDL:
+        schema_editor.execute(statement)
+    for name, body in TRIGGERS.items():
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        schema_editor.execute(f"CREATE TRIGGER {name} {body}")
+    for index in INDEXES:
+        schema_editor.execute(f"INSERT INTO {index}({index}) VALUES ('rebuild')")
+
+
+def uninstall(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for name in TRIGGERS:
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {name}")
+    for index in INDEXES:
+        schema_editor.execute(f"DROP TABLE IF EXISTS {index}")
+
+
+class Migration(migrations.Migration):
+    """
+    FTS5 indexes over message content and chat titles/prompts (SQLite only).
+
+    The tables and triggers are created and the indexes built from the
+    existing rows. Other databases are left untouched; search falls back to
+    ``icontains`` there.
+    """
+
+    dependencies = [
+        ("chats", "0003_upload_sessions"),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall, elidable=False),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:24
+
+import django.db.models.deletion
+from collections import defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def backfill_inbox(apps, schema_editor):
+    """Create an inbox row for every creator and participant of every chat."""
+    Chat = apps.get_model("chats", "Chat")
+    ChatInbox = apps.get_model("chats", "ChatInbox")
+    Message = apps.get_model("chats", "Message")
+    participants = Chat.participants.through
+
+    latest = Message.objects.filter(chat=models.OuterRef("pk")).order_by(
+        "-created_at", "-id"
+    )
+    chats = (
+        Chat.objects.annotate(
+            latest_id=models.Subquery(latest.values("id")[:1]),
+            latest_at=models.Subquery(latest.values("created_at")[:1]),
+        )
+        .order_by("id")
+        .values_list("id", "created_by_id", "created_at", "latest_id", "latest_at")
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    while batch := list(islice(chats, BATCH_SIZE)):
+        members = defaultdict(set)
+        for chat_id, user_id in participants.objects.filter(
+            chat_id__in=[row[0] for row in batch]
+        ).values_list("chat_id", "user_id"):
+            members[chat_id].add(user_id)
+
+        ChatInbox.objects.bulk_create(
+            [
+                ChatInbox(
+                    user_id=user_id,
+                    chat_id=chat_id,
+                    last_activity_at=latest_at or created_at,
+                    last_message_id=latest_id,
+                )
+                for chat_id, creator_id, created_at, latest_id, latest_at in batch
+                for user_id in members[chat_id] | {creator_id}
+            ],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0004_fulltext_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatInbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_activity_at', models.DateTimeField()),
+                ('last_message_id', models.BigIntegerField(blank=True, null=True)),
+                ('chat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbox_entries', to='chats.chat')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbox_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'chat inboxes',
+                'indexes': [models.Index(fields=['user', '-last_activity_at', '-id'], name='chats_inbox_user_activity_idx')],
+                'constraints': [models.UniqueConstraint(fields=('chat', 'user'), name='chats_inbox_chat_user_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_inbox, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:26
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+# Frozen as of this migration rather than imported from the counter service,
+# whose expressions may change along with later schemas.
+BACKFILL_SQL = """
+UPDATE chats_chat SET
+    message_count = (
+        SELECT COUNT(*) FROM chats_message WHERE chat_id = chats_chat.id
+    ),
+    file_count = (
+        SELECT COUNT(*) FROM chats_file WHERE chat_id = chats_chat.id
+    ),
+    total_file_bytes = COALESCE((
+        SELECT SUM(file_size) FROM chats_file WHERE chat_id = chats_chat.id
+    ), 0),
+    last_message_id = (
+        SELECT id FROM chats_message WHERE chat_id = chats_chat.id
+        ORDER BY created_at DESC, id DESC LIMIT 1
+    ),
+    last_message_at = (
+        SELECT created_at FROM chats_message WHERE chat_id = chats_chat.id
+        ORDER BY created_at DESC, id DESC LIMIT 1
+    )
+WHERE id > %s AND id <= %s
+"""
+
+
+def backfill_counters(apps, schema_editor):
+    """Count the messages and files of existing chats, a batch of ids at a time."""
+    Chat = apps.get_model("chats", "Chat")
+    last_pk = 0
+    while ids := list(
+        Chat.objects.filter(pk__gt=last_pk)
+        .order_by("pk")
+        .values_list("pk", flat=True)[:BATCH_SIZE]
+    ):
+        schema_editor.execute(BACKFILL_SQL, (last_pk, ids[-1]))
+        last_pk = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0005_chat_inbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chat',
+            name='file_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='last_message_id',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='message_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='total_file_bytes',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0007_message_updated_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_created_at', models.DateTimeField()),
+                ('first_message_id', models.BigIntegerField()),
+                ('last_created_at', models.DateTimeField()),
+                ('last_message_id', models.BigIntegerField()),
+                ('message_count', models.PositiveIntegerField()),
+                ('codec', models.CharField(max_length=16)),
+                ('payload', models.BinaryField()),
+                ('archived_at', models.DateTimeField(auto_now=True)),
+                ('chat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='message_segments', to='chats.chat')),
+            ],
+            options={
+                'ordering': ['first_created_at', 'first_message_id'],
+                'indexes': [models.Index(fields=['chat', 'first_created_at', 'first_message_id'], name='chats_segment_chat_first_idx'), models.Index(fields=['chat', 'last_created_at', 'last_message_id'], name='chats_segment_chat_last_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 14:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0011_chat_tombstones'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chat',
+            name='users_updated_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -1,5 +1,19 @@
 from .chat import Chat
 from .message import Message
 from .file import File
+from .upload_session import UploadSession
+from .chat_inbox import ChatInbox
+from .message_segment import MessageSegment
+from .blob import Blob
+from .job import Job
 
-__all__ = ["Chat", "Message", "File"]
+__all__ = [
+    "Chat",
+    "Message",
+    "File",
+    "UploadSession",
+    "ChatInbox",
+    "MessageSegment",
+    "Blob",
+    "Job",
+]
@@ -0,0 +1,41 @@
+from django.db import models
+from ..managers import BlobManager
+
+
+def blob_path(digest: str) -> str:
+    """Storage name of the blob with SHA-256 ``digest``."""
+    return f"blobs/{digest[:2]}/{digest[2:4]}/{digest}"
+
+
+def get_blob_path(instance, filename):
+    return blob_path(instance.sha256)
+
+
+class Blob(models.Model):
+    """
+    File content stored once, under its SHA-256 hash.
+
+    ``File`` rows with the same content share one blob. ``ref_count`` is the
+    number of them; ``BlobService`` keeps it up to date and removes the blob,
+    row and content, when the last reference goes.
+    """
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to=get_blob_path, max_length=255)
+    size = models.BigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = BlobManager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["ref_count"],
+                name="chats_blob_unreferenced_idx",
+                condition=models.Q(ref_count__lte=0),
+            ),
+        ]
+
+    def __str__(self):
+        return self.sha256
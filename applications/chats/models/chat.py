@@ -1,6 +1,6 @@
 from django.db import models
 from django.contrib.auth import get_user_model
-from ..managers import ChatManager
+from ..managers import AllChatsManager, ChatManager
 
 User = get_user_model()
 
@@ -13,11 +13,65 @@ class Chat(models.Model):
     participants = models.ManyToManyField(User, related_name="participants_chats")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized counters, maintained by ChatCounterService.
+    message_count = models.PositiveIntegerField(default=0, editable=False)
+    file_count = models.PositiveIntegerField(default=0, editable=False)
+    total_file_bytes = models.BigIntegerField(default=0, editable=False)
+    last_message_id = models.BigIntegerField(null=True, blank=True, editable=False)
+    last_message_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # Set when the chat is deleted: it is hidden at once and purged in the
+    # background by ChatDeletionService.
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # Set when a user the chat renders (creator, participant, sender or
+    # uploader) changes their username or email; see user_signals.
+    users_updated_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    COUNTER_FIELDS = (
+        "message_count",
+        "file_count",
+        "total_file_bytes",
+        "last_message_id",
+        "last_message_at",
+    )
 
     objects = ChatManager()
+    all_objects = AllChatsManager()
 
     class Meta:
         ordering = ["-updated_at"]
+        indexes = [
+            models.Index(fields=["-updated_at", "-id"], name="chats_chat_updated_idx"),
+            models.Index(
+                fields=["-updated_at", "-id"],
+                condition=models.Q(is_active=True),
+                name="chats_chat_active_idx",
+            ),
+            models.Index(
+                fields=["-updated_at", "-id"],
+                condition=models.Q(is_active=False),
+                name="chats_chat_inactive_idx",
+            ),
+            models.Index(
+                fields=["created_by", "-updated_at", "-id"],
+                name="chats_chat_creator_idx",
+            ),
+            models.Index(
+                fields=["deleted_at"],
+                condition=models.Q(deleted_at__isnull=False),
+                name="chats_chat_deleted_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title or f"Chat {self.id}"
+
+    def save(self, *args, **kwargs):
+        # Counters only change through ``SET n = n + delta`` updates; writing
+        # back the values loaded with this instance would undo concurrent ones.
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
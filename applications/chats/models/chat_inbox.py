@@ -0,0 +1,46 @@
+from django.db import models
+from django.contrib.auth import get_user_model
+from ..managers import ChatInboxManager
+
+User = get_user_model()
+
+
+class ChatInbox(models.Model):
+    """
+    One row per chat in a user's inbox: the chats they created or joined.
+
+    Denormalized from ``Chat.participants`` and ``Message`` so that listing a
+    user's chats by latest activity is a single range scan of
+    ``chats_inbox_user_activity_idx``. Kept up to date by the inbox signal
+    receivers and ``InboxService``.
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="inbox_entries"
+    )
+    chat = models.ForeignKey(
+        "chats.Chat", on_delete=models.CASCADE, related_name="inbox_entries"
+    )
+    last_activity_at = models.DateTimeField()
+    # Newest message of the chat; a plain id so deleting messages never has
+    # to cascade into inbox rows.
+    last_message_id = models.BigIntegerField(null=True, blank=True)
+
+    objects = ChatInboxManager()
+
+    class Meta:
+        verbose_name_plural = "chat inboxes"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["chat", "user"], name="chats_inbox_chat_user_uniq"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-last_activity_at", "-id"],
+                name="chats_inbox_user_activity_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.chat} in the inbox of {self.user}"
@@ -1,20 +1,38 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from ..managers import FileManager
+import mimetypes
 import os
 
 User = get_user_model()
 
 
 def get_file_path(instance, filename):
+    # Where files were stored before blobs; see migrate_chat_files.
     return f"chat_files/{instance.chat_id}/{filename}"
 
 
 class File(models.Model):
+    """
+    A file shared in a chat.
+
+    The content lives in a ``Blob`` shared by every file with the same bytes;
+    ``file`` names the blob's content in storage. Uploads are linked to their
+    blob on save (see ``blob_signals``). Files stored before blobs existed
+    have no blob until ``migrate_chat_files`` moves them over.
+    """
+
     chat = models.ForeignKey(
         "chats.Chat", on_delete=models.CASCADE, related_name="files"
     )
-    file = models.FileField(upload_to=get_file_path)
+    file = models.FileField(upload_to=get_file_path, max_length=255)
+    blob = models.ForeignKey(
+        "chats.Blob",
+        on_delete=models.PROTECT,
+        related_name="files",
+        null=True,
+        blank=True,
+    )
     file_name = models.CharField(max_length=500)
     file_type = models.CharField(max_length=100)
     file_size = models.IntegerField()  # Size in bytes
@@ -27,12 +45,29 @@ class File(models.Model):
 
     class Meta:
         ordering = ["-uploaded_at"]
+        indexes = [
+            models.Index(
+                fields=["chat", "-uploaded_at"], name="chats_file_chat_uploaded_idx"
+            ),
+            models.Index(
+                fields=["uploaded_by", "-uploaded_at"], name="chats_file_uploader_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.file_name or f"File {self.id}"
 
     def save(self, *args, **kwargs):
-        self.file_name = os.path.basename(self.file.name)
-        self.file_type = self.file.content_type
-        self.file_size = self.file.size
-        super().save(*args, **kwargs)
+        if self.file and not self.file._committed:
+            # A new upload: describe it before storage renames it.
+            upload = self.file.file
+            self.file_name = os.path.basename(self.file.name)
+            self.file_type = (
+                getattr(upload, "content_type", None)
+                or mimetypes.guess_type(self.file_name)[0]
+                or "application/octet-stream"
+            )
+            self.file_size = upload.size
+        # Keeps the chat's counters, updated on post_save, in this transaction.
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
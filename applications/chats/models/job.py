@@ -0,0 +1,55 @@
+from django.db import models
+from ..managers import JobManager
+
+
+class Job(models.Model):
+    """
+    A unit of background work for ``run_chat_jobs`` workers.
+
+    Jobs are rows so they can be enqueued in the transaction of the write
+    that needs them: they exist exactly when that write commits.
+    ``available_at`` is when a pending job may run next, and for a running
+    job when its worker's lease expires and another worker may take it
+    over. Jobs that succeed are deleted; jobs that used up their attempts
+    stay behind as failed, with the last error.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (FAILED, "Failed"),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING)
+    available_at = models.DateTimeField()
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField()
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = JobManager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["available_at"],
+                name="chats_job_claimable_idx",
+                # Pending or running: jobs that succeed are deleted.
+                condition=~models.Q(status="failed"),
+            ),
+            models.Index(
+                fields=["updated_at"],
+                name="chats_job_failed_idx",
+                condition=models.Q(status="failed"),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from ..managers import MessageManager
 
@@ -21,6 +21,27 @@ class Message(models.Model):
 
     class Meta:
         ordering = ["created_at"]
+        indexes = [
+            models.Index(
+                fields=["chat", "created_at", "id"], name="chats_msg_chat_created_idx"
+            ),
+            models.Index(
+                fields=["chat", "context_index", "created_at"],
+                name="chats_msg_chat_context_idx",
+            ),
+            models.Index(
+                fields=["sender", "created_at"], name="chats_msg_sender_created_idx"
+            ),
+            # Latest edit per chat, for conditional GETs.
+            models.Index(
+                fields=["chat", "updated_at"], name="chats_msg_chat_updated_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"Message from {self.sender.username} in {self.chat}"
+
+    def save(self, *args, **kwargs):
+        # Keeps the chat's counters, updated on post_save, in this transaction.
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
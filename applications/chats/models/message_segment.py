@@ -0,0 +1,47 @@
+from django.db import models
+from ..managers import MessageSegmentManager
+
+
+class MessageSegment(models.Model):
+    """
+    Archived messages of one chat, serialized and compressed together.
+
+    The cold tier of a chat's history: ``ArchiveService`` moves the oldest
+    messages out of ``Message`` into segments, which never overlap. Hot
+    messages usually sort after every archived one, but backdated ones may
+    not; readers merge the tiers by key.
+    ``first_*``/``last_*`` are the ``(created_at, id)`` keys of the first and
+    last message inside, so a page can find the segments it needs without
+    decompressing any other. Archived messages are read-only and are not
+    full-text indexed.
+    """
+
+    chat = models.ForeignKey(
+        "chats.Chat", on_delete=models.CASCADE, related_name="message_segments"
+    )
+    first_created_at = models.DateTimeField()
+    first_message_id = models.BigIntegerField()
+    last_created_at = models.DateTimeField()
+    last_message_id = models.BigIntegerField()
+    message_count = models.PositiveIntegerField()
+    codec = models.CharField(max_length=16)
+    payload = models.BinaryField()
+    archived_at = models.DateTimeField(auto_now=True)
+
+    objects = MessageSegmentManager()
+
+    class Meta:
+        ordering = ["first_created_at", "first_message_id"]
+        indexes = [
+            models.Index(
+                fields=["chat", "first_created_at", "first_message_id"],
+                name="chats_segment_chat_first_idx",
+            ),
+            models.Index(
+                fields=["chat", "last_created_at", "last_message_id"],
+                name="chats_segment_chat_last_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.message_count} archived messages of {self.chat_id}"
@@ -0,0 +1,51 @@
+import math
+import uuid
+
+from django.db import models
+from django.contrib.auth import get_user_model
+from ..managers import UploadSessionManager
+
+User = get_user_model()
+
+
+class UploadSession(models.Model):
+    """
+    A resumable, chunked upload of a single chat file.
+
+    Chunks are kept on disk until the session is completed, at which point
+    they are assembled into a ``File``. The row only records what the final
+    file should look like; which chunks have arrived is read from disk.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    chat = models.ForeignKey(
+        "chats.Chat", on_delete=models.CASCADE, related_name="upload_sessions"
+    )
+    created_by = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="upload_sessions"
+    )
+    file_name = models.CharField(max_length=500)
+    content_type = models.CharField(max_length=100, blank=True, default="")
+    total_size = models.BigIntegerField()  # Size in bytes
+    chunk_size = models.IntegerField()  # Size in bytes of every chunk but the last
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = UploadSessionManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["updated_at"], name="chats_upload_updated_idx"),
+        ]
+
+    def __str__(self):
+        return f"Upload of {self.file_name} to {self.chat}"
+
+    @property
+    def total_chunks(self):
+        return max(math.ceil(self.total_size / self.chunk_size), 1)
+
+    def expected_chunk_size(self, index):
+        if index < self.total_chunks - 1:
+            return self.chunk_size
+        return self.total_size - self.chunk_size * (self.total_chunks - 1)
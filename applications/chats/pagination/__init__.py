@@ -0,0 +1,15 @@
+from .keyset_pagination import (
+    KeysetPagination,
+    MessageKeysetPagination,
+    ChatKeysetPagination,
+    InboxKeysetPagination,
+    SearchPagination,
+)
+
+__all__ = [
+    "KeysetPagination",
+    "MessageKeysetPagination",
+    "ChatKeysetPagination",
+    "InboxKeysetPagination",
+    "SearchPagination",
+]
@@ -0,0 +1,237 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination over a unique, multi-column ordering.
+
+    Unlike DRF's ``CursorPagination``, which keeps a single-column position plus
+    an offset to break ties, the cursor here stores the full ordering key of the
+    boundary row. Pages are selected with a ``(a, b) > (x, y)`` predicate on that
+    key, so a deep page is the same index range scan as the first one.
+
+    All ordering fields must share the same direction and, together, be unique.
+    """
+
+    ordering = ("created_at", "id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        position, descending = self._start(queryset, request)
+        # Sources spanning more than one queryset, like a chat's hot and
+        # archived messages, page themselves and use ``fetch`` for their
+        # queryset parts.
+        keyset_page = getattr(queryset, "keyset_page", None)
+        if keyset_page is not None:
+            results = keyset_page(self, position, descending, self.page_size + 1)
+        else:
+            results = self.fetch(queryset, position, descending, self.page_size + 1)
+        return self._finish(results, position)
+
+    async def apaginate_queryset(self, queryset, request):
+        """
+        ``paginate_queryset`` for async views, reading through the async ORM.
+
+        Sources paging themselves provide ``akeyset_page`` for it.
+        """
+        position, descending = self._start(queryset, request)
+        akeyset_page = getattr(queryset, "akeyset_page", None)
+        if akeyset_page is not None:
+            results = await akeyset_page(self, position, descending, self.page_size + 1)
+        else:
+            results = await self.afetch(
+                queryset, position, descending, self.page_size + 1
+            )
+        return self._finish(results, position)
+
+    def _start(self, queryset, request):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.fields = [order.lstrip("-") for order in self.ordering]
+        self.model = queryset.model
+
+        position, self.reverse = self.decode_cursor(request)
+        return position, self.ordering[0].startswith("-") != self.reverse
+
+    def _finish(self, results, position):
+        has_more = len(results) > self.page_size
+        self.page = results[: self.page_size]
+
+        if self.reverse:
+            self.page.reverse()
+            self.has_previous = has_more
+            self.has_next = position is not None
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        return self.page
+
+    def fetch(self, queryset, position, descending, limit):
+        """
+        Read up to ``limit`` rows of a queryset past a keyset position.
+
+        Args:
+            queryset: Rows to page through
+            position: Ordering key of the boundary row, or None from the start
+            descending: Read in descending order of the ordering fields
+            limit: Most rows to read
+
+        Returns:
+            List of rows in page order
+        """
+        return list(self._past(queryset, position, descending)[:limit])
+
+    async def afetch(self, queryset, position, descending, limit):
+        """``fetch`` through the async ORM: the page is read in one thread hop."""
+        return [row async for row in self._past(queryset, position, descending)[:limit]]
+
+    def _past(self, queryset, position, descending):
+        queryset = queryset.order_by(
+            *[f"-{field}" if descending else field for field in self.fields]
+        )
+        if position is not None:
+            queryset = queryset.filter(self.get_keyset_filter(position, descending))
+        return queryset
+
+    def get_keyset_filter(self, position, descending):
+        """
+        Build the row-value comparison ``(f1, f2, ...) >|< (v1, v2, ...)``.
+
+        The leading ``f1 >= v1`` term is redundant but keeps the predicate
+        sargable, so the database seeks straight to the boundary row instead
+        of evaluating the disjunction over the whole partition.
+        """
+        lookup = "lt" if descending else "gt"
+        first_field, first_value = self.fields[0], position[0]
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.fields, position):
+            condition |= equal & Q(**{f"{field}__{lookup}": value})
+            equal &= Q(**{field: value})
+        return Q(**{f"{first_field}__{lookup}e": first_value}) & condition
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.get_position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.get_position(self.page[0]), reverse=True)
+
+    def get_position(self, item):
+        return [self._get_value(item, field) for field in self.fields]
+
+    @staticmethod
+    def _get_value(item, field):
+        value = item[field] if isinstance(item, dict) else getattr(item, field)
+        return value.isoformat() if hasattr(value, "isoformat") else value
+
+    def encode_cursor(self, position, reverse=False):
+        payload = {"p": position}
+        if reverse:
+            payload["r"] = 1
+        encoded = urlsafe_b64encode(
+            json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        ).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        return self.parse_cursor(encoded, self.model)
+
+    def parse_cursor(self, encoded, model):
+        """
+        Decode a cursor token into a typed ordering position.
+
+        Args:
+            encoded: Cursor token as found in the ``cursor`` query parameter
+            model: Model whose fields the position refers to
+
+        Returns:
+            Tuple of ``(position, reverse)``
+        """
+        self.fields = [order.lstrip("-") for order in self.ordering]
+        self.model = model
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            raw_position = payload["p"]
+            if len(raw_position) != len(self.fields):
+                raise ValueError("cursor does not match ordering")
+            position = self.to_position(raw_position)
+            reverse = bool(payload.get("r", 0))
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return position, reverse
+
+    def to_position(self, raw_position):
+        """Convert the JSON values of a cursor back to typed field values."""
+        return [
+            self.model._meta.get_field(field).to_python(value)
+            for field, value in zip(self.fields, raw_position)
+        ]
+
+
+class MessageKeysetPagination(KeysetPagination):
+    """Oldest-first pagination for a chat's messages."""
+
+    ordering = ("created_at", "id")
+
+
+class ChatKeysetPagination(KeysetPagination):
+    """Most recently updated chats first."""
+
+    ordering = ("-updated_at", "-id")
+
+
+class InboxKeysetPagination(KeysetPagination):
+    """Inbox entries, most recent activity first."""
+
+    ordering = ("-last_activity_at", "-id")
+
+
+class SearchPagination(KeysetPagination):
+    """
+    Forward-only pagination of ranked search results.
+
+    Search results are not a queryset, so instead of ``paginate_queryset`` the
+    view hands over a callable running the search from a ``(rank, id)``
+    position with a row limit.
+    """
+
+    ordering = ("rank", "id")
+    page_size = 20
+    max_page_size = 100
+
+    def paginate_search(self, search, request):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.fields = list(self.ordering)
+        self.model = None
+
+        position, _ = self.decode_cursor(request)
+        results = list(search(after=position, limit=self.page_size + 1))
+        self.has_next = len(results) > self.page_size
+        self.has_previous = False
+        self.page = results[: self.page_size]
+        return self.page
+
+    def to_position(self, raw_position):
+        rank, pk = raw_position
+        return [float(rank), int(pk)]
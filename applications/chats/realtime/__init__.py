@@ -0,0 +1,3 @@
+from .hub import EventHub, Subscription, get_hub, publish_on_commit
+
+__all__ = ["EventHub", "Subscription", "get_hub", "publish_on_commit"]
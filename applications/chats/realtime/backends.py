@@ -0,0 +1,100 @@
+import json
+import logging
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    import redis
+    import redis.asyncio
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class BaseBackend:
+    """
+    Transport between ``EventHub.publish`` and ``EventHub.dispatch``.
+
+    ``fan_out`` tells the hub whether events may be consumed by other
+    processes, in which case it cannot skip publishing when it has no local
+    subscribers.
+    """
+
+    fan_out = False
+
+    def __init__(self, hub):
+        self.hub = hub
+
+    def publish(self, chat_id: int, event: dict) -> None:
+        raise NotImplementedError
+
+    def on_subscribe(self, loop) -> None:
+        """Called on the subscriber's event loop whenever a client subscribes."""
+
+
+class LocalBackend(BaseBackend):
+    """Delivers events to subscribers of the current process only."""
+
+    def publish(self, chat_id, event):
+        self.hub.dispatch(chat_id, event)
+
+
+class RedisBackend(BaseBackend):
+    """
+    Relays events through Redis pub/sub so every worker process receives them.
+
+    Publishing uses a blocking client, since it happens from sync request and
+    signal code. Each event loop that has subscribers runs one listener task on
+    a pattern subscription and dispatches what it receives to the local hub.
+    Requires the ``redis`` package.
+
+    Options:
+        url: Redis connection URL
+        channel_prefix: Prefix of the per-chat pub/sub channels
+    """
+
+    fan_out = True
+
+    def __init__(self, hub, url="redis://localhost:6379/0", channel_prefix="chats:"):
+        super().__init__(hub)
+        if redis is None:
+            raise ImproperlyConfigured(
+                "RedisBackend requires the 'redis' package to be installed"
+            )
+
+        self.url = url
+        self.channel_prefix = channel_prefix
+        self.client = redis.Redis.from_url(url)
+        self._listeners = {}
+        self._lock = threading.Lock()
+
+    def publish(self, chat_id, event):
+        self.client.publish(f"{self.channel_prefix}{chat_id}", json.dumps(event))
+
+    def on_subscribe(self, loop):
+        with self._lock:
+            task = self._listeners.get(loop)
+            if task is None or task.done():
+                self._listeners[loop] = loop.create_task(self._listen())
+
+    async def _listen(self):
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.psubscribe(f"{self.channel_prefix}*")
+        try:
+            async for message in pubsub.listen():
+                if message["type"] != "pmessage":
+                    continue
+                try:
+                    channel = message["channel"].decode()
+                    chat_id = int(channel[len(self.channel_prefix) :])
+                    event = json.loads(message["data"])
+                except (ValueError, UnicodeDecodeError):
+                    logger.warning("Ignoring malformed realtime event: %r", message)
+                    continue
+                self.hub.dispatch(chat_id, event)
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
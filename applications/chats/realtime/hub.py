@@ -0,0 +1,157 @@
+import asyncio
+import functools
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+DEFAULT_BACKEND = "applications.chats.realtime.backends.LocalBackend"
+DEFAULT_QUEUE_SIZE = 256
+
+
+class Subscription:
+    """
+    One connected client listening to one chat.
+
+    Events are handed over through an ``asyncio.Queue`` owned by the event loop
+    the client runs on, so an idle subscription costs a queue and nothing else.
+    When a client falls behind by more than ``maxsize`` events, the oldest ones
+    are dropped and counted in ``dropped``.
+    """
+
+    def __init__(self, hub: "EventHub", chat_id: int, maxsize: int):
+        self.hub = hub
+        self.chat_id = chat_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def deliver(self, event: dict) -> None:
+        # Always runs on ``self.loop``.
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """Wait for the next event, or return ``None`` after ``timeout`` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def drain(self) -> List[dict]:
+        """Return the events already queued, without waiting for more."""
+        events = []
+        while not self.queue.empty():
+            events.append(self.queue.get_nowait())
+        return events
+
+    def close(self) -> None:
+        self.hub.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class EventHub:
+    """
+    Per-process fan-out of chat events to connected clients.
+
+    ``publish`` may be called from any thread (sync views, signal receivers,
+    management commands). It goes through the configured backend, which
+    delivers the event back to ``dispatch`` on every process sharing it. The
+    in-process ``LocalBackend`` does that directly; other backends relay
+    through an external broker so that several workers see the same events.
+    """
+
+    def __init__(self, backend_path: str, backend_options: dict, queue_size: int):
+        self._lock = threading.Lock()
+        self._subscriptions: Dict[int, Set[Subscription]] = defaultdict(set)
+        self.queue_size = queue_size
+        self.backend = import_string(backend_path)(self, **backend_options)
+
+    def subscribe(self, chat_id: int) -> Subscription:
+        """
+        Start listening to a chat. Must be called from a running event loop.
+
+        Args:
+            chat_id: ID of the chat to listen to
+
+        Returns:
+            Subscription to read events from; close it when the client leaves
+        """
+        subscription = Subscription(self, int(chat_id), self.queue_size)
+        with self._lock:
+            self._subscriptions[subscription.chat_id].add(subscription)
+        self.backend.on_subscribe(subscription.loop)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            listeners = self._subscriptions.get(subscription.chat_id)
+            if listeners is not None:
+                listeners.discard(subscription)
+                if not listeners:
+                    del self._subscriptions[subscription.chat_id]
+
+    def has_subscribers(self, chat_id: int) -> bool:
+        return int(chat_id) in self._subscriptions
+
+    def wants(self, chat_id: int) -> bool:
+        """Whether an event for ``chat_id`` could reach anyone at all."""
+        return self.backend.fan_out or self.has_subscribers(chat_id)
+
+    def publish(self, chat_id: int, event_type: str, data) -> None:
+        """
+        Send an event to everyone listening to a chat, on every process.
+
+        Args:
+            chat_id: ID of the chat the event belongs to
+            event_type: Event name, e.g. ``message.created``
+            data: JSON-serializable payload
+        """
+        self.backend.publish(int(chat_id), {"type": event_type, "data": data})
+
+    def dispatch(self, chat_id: int, event: dict) -> None:
+        """Deliver an event to the subscriptions of this process."""
+        with self._lock:
+            listeners = list(self._subscriptions.get(int(chat_id), ()))
+        for subscription in listeners:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # The subscriber's event loop is gone.
+                self.unsubscribe(subscription)
+
+
+_hub_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def _configured_hub() -> EventHub:
+    config = getattr(settings, "CHATS_REALTIME", {})
+    return EventHub(
+        config.get("BACKEND", DEFAULT_BACKEND),
+        config.get("OPTIONS", {}),
+        config.get("QUEUE_SIZE", DEFAULT_QUEUE_SIZE),
+    )
+
+
+def get_hub() -> EventHub:
+    """Return the process-wide hub, configured from ``CHATS_REALTIME``."""
+    # lru_cache alone would let two threads both build a hub on first use.
+    with _hub_lock:
+        return _configured_hub()
+
+
+def publish_on_commit(chat_id: int, event_type: str, data) -> None:
+    """Publish a chat event once the surrounding transaction has committed."""
+    hub = get_hub()
+    transaction.on_commit(lambda: hub.publish(chat_id, event_type, data))
@@ -0,0 +1,100 @@
+import asyncio
+import json
+import re
+from importlib import import_module
+from types import SimpleNamespace
+from typing import Optional
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.db import close_old_connections
+from django.http.cookie import parse_cookie
+from ..models import Chat
+from .hub import get_hub
+
+WEBSOCKET_PATH = re.compile(r"^/ws/chats/(?P<chat_id>\d+)/?$")
+
+# Application close codes, mirroring the HTTP status a REST client would get.
+CLOSE_FORBIDDEN = 4403
+CLOSE_NOT_FOUND = 4404
+
+
+def _headers(scope) -> dict:
+    return {
+        name.decode("latin1"): value.decode("latin1")
+        for name, value in scope["headers"]
+    }
+
+
+def _origin_allowed(headers: dict) -> bool:
+    # Browsers always send Origin on WebSocket handshakes; refuse cross-site
+    # pages riding on the user's session cookie.
+    origin = headers.get("origin")
+    return origin is None or urlsplit(origin).netloc == headers.get("host")
+
+
+@sync_to_async
+def _authorize(session_key: Optional[str], chat_id: int) -> bool:
+    close_old_connections()
+    try:
+        if not session_key:
+            return False
+        engine = import_module(settings.SESSION_ENGINE)
+        user = get_user(SimpleNamespace(session=engine.SessionStore(session_key)))
+        return (
+            user.is_authenticated
+            and Chat.objects.filter(id=chat_id, participants=user).exists()
+        )
+    finally:
+        close_old_connections()
+
+
+async def _wait_for_disconnect(receive) -> None:
+    while (await receive())["type"] != "websocket.disconnect":
+        pass
+
+
+async def websocket_application(scope, receive, send):
+    """
+    Raw ASGI application pushing a chat's events over a WebSocket.
+
+    Clients connect to ``/ws/chats/<chat id>/`` with their session cookie and
+    receive every hub event for that chat as a JSON text frame
+    ``{"type": ..., "data": ...}``. Frames sent by the client are ignored.
+    """
+    if (await receive())["type"] != "websocket.connect":
+        return
+
+    match = WEBSOCKET_PATH.match(scope["path"])
+    if match is None:
+        await send({"type": "websocket.close", "code": CLOSE_NOT_FOUND})
+        return
+
+    headers = _headers(scope)
+    session_key = parse_cookie(headers.get("cookie", "")).get(
+        settings.SESSION_COOKIE_NAME
+    )
+    chat_id = int(match["chat_id"])
+    if not _origin_allowed(headers) or not await _authorize(session_key, chat_id):
+        await send({"type": "websocket.close", "code": CLOSE_FORBIDDEN})
+        return
+
+    await send({"type": "websocket.accept"})
+    with get_hub().subscribe(chat_id) as subscription:
+        disconnect = asyncio.ensure_future(_wait_for_disconnect(receive))
+        try:
+            while True:
+                next_event = asyncio.ensure_future(subscription.queue.get())
+                await asyncio.wait(
+                    {disconnect, next_event}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if disconnect.done():
+                    next_event.cancel()
+                    break
+                await send(
+                    {"type": "websocket.send", "text": json.dumps(next_event.result())}
+                )
+        finally:
+            disconnect.cancel()
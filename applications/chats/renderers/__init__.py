@@ -0,0 +1,4 @@
+from .passthrough_renderer import PassthroughRenderer
+from .fast_json_renderer import FastJSONRenderer
+
+__all__ = ["PassthroughRenderer", "FastJSONRenderer"]
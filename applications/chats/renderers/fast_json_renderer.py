@@ -0,0 +1,40 @@
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """
+    ``JSONRenderer`` producing the same bytes through orjson when installed.
+
+    Falls back to the standard renderer when orjson is missing, when the
+    client asks for indented output, when ASCII-only or non-compact JSON is
+    configured, and for values orjson cannot encode. Types orjson does not
+    know, and datetimes (which DRF writes with a "Z" suffix for UTC), go
+    through DRF's own encoder. The one difference left is NaN and infinity,
+    which orjson writes as ``null``; API payloads here carry no floats.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None or orjson is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=JSONEncoder().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Like JSONRenderer, escape the two characters JSON allows but
+        # JavaScript string literals do not.
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
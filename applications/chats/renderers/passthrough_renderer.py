@@ -0,0 +1,16 @@
+from rest_framework import renderers
+
+
+class PassthroughRenderer(renderers.BaseRenderer):
+    """
+    Lets binary actions pass content negotiation for any ``Accept`` header.
+
+    The actions using it return Django responses directly, so nothing is
+    actually rendered here.
+    """
+
+    media_type = "*/*"
+    format = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
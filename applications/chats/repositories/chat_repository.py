@@ -1,15 +1,25 @@
 from typing import List, Optional
 from django.contrib.auth import get_user_model
-from django.db import models
 from django.db.models import QuerySet
+from ..cache import ChatCache, get_chat_cache
 from ..models.chat import Chat
+from ..routing import use_primary
+from ..services.chat_deletion_service import ChatDeletionService
+from ..services.search_service import SearchService
 
 User = get_user_model()
 
 
 class ChatRepository:
-    def __init__(self):
+    def __init__(self, cache: Optional[ChatCache] = None):
         self.model = Chat
+        self.search_service = SearchService()
+        self.deletion_service = ChatDeletionService()
+        self._cache = cache
+
+    @property
+    def cache(self) -> Optional[ChatCache]:
+        return self._cache if self._cache is not None else get_chat_cache()
 
     def create(
         self,
@@ -48,13 +58,66 @@ class ChatRepository:
         """
         Retrieve a chat by its ID.
 
+        When caching is enabled the chat comes with its creator and
+        participants loaded, and is served from the cache until it or its
+        participants change. Counter fields are left out of the cached copy
+        and read from the database on first access, as they change with
+        every message.
+
         Args:
             chat_id: ID of the chat to retrieve
 
         Returns:
             Chat instance or None if not found
         """
-        return self.model.objects.filter(id=chat_id).first()
+        try:
+            chat_id = int(chat_id)
+        except (TypeError, ValueError):
+            return None
+        if self.cache is None:
+            return self.model.objects.filter(id=chat_id).first()
+
+        def load():
+            # Loaded under a version taken beforehand, so it must not come
+            # from a replica that has yet to see the write bumping it.
+            with use_primary():
+                return (
+                    self.model.objects.select_related("created_by")
+                    .prefetch_related("participants")
+                    .defer(*self.model.COUNTER_FIELDS)
+                    .filter(id=chat_id)
+                    .first()
+                )
+
+        return self.cache.get_chat(chat_id, load)
+
+    def get_validators(self, chat_id: int, *fields: str) -> Optional[dict]:
+        """
+        Read the state a chat's representations are validated against.
+
+        A single row read from indexes only; see ``ChatQuerySet.with_validators``.
+
+        Args:
+            chat_id: ID of the chat
+            fields: Chat fields and ``with_validators`` annotations to read
+
+        Returns:
+            Mapping of field name to value, or None if the chat does not exist
+        """
+        validators = self._validators(chat_id, fields)
+        return validators.first() if validators is not None else None
+
+    async def aget_validators(self, chat_id: int, *fields: str) -> Optional[dict]:
+        """``get_validators`` for async views."""
+        validators = self._validators(chat_id, fields)
+        return await validators.afirst() if validators is not None else None
+
+    def _validators(self, chat_id, fields) -> Optional[QuerySet]:
+        try:
+            chat_id = int(chat_id)
+        except (TypeError, ValueError):
+            return None
+        return self.model.objects.filter(id=chat_id).with_validators().values(*fields)
 
     def get_active_chats(self) -> QuerySet[Chat]:
         """
@@ -69,15 +132,16 @@ class ChatRepository:
         """
         Get all chats where the user is either creator or participant.
 
+        Read from the user's inbox, so the chats come most recently active
+        first without a DISTINCT over the participants join.
+
         Args:
             user: User to get chats for
 
         Returns:
             QuerySet of user's chats
         """
-        return self.model.objects.filter(
-            models.Q(created_by=user) | models.Q(participants=user)
-        ).distinct()
+        return self.model.objects.in_inbox_of(user)
 
     def get_recent_chats(self, limit: int = 10) -> QuerySet[Chat]:
         """
@@ -127,6 +191,7 @@ class ChatRepository:
 
         if update_fields:
             chat.save(update_fields=update_fields)
+            self.invalidate(chat.id)
 
         return chat
 
@@ -146,6 +211,7 @@ class ChatRepository:
             return None
 
         chat.participants.add(user)
+        self.invalidate(chat.id)
         return chat
 
     def remove_participant(self, chat_id: int, user: User) -> Optional[Chat]:
@@ -164,28 +230,55 @@ class ChatRepository:
             return None
 
         chat.participants.remove(user)
+        self.invalidate(chat.id)
         return chat
 
     def delete_chat(self, chat_id: int) -> bool:
         """
         Delete a chat.
 
+        The chat disappears at once; its messages, files and stored content
+        are purged in the background (see ``ChatDeletionService``).
+
         Args:
             chat_id: ID of the chat to delete
 
         Returns:
             True if deleted, False if not found
         """
-        chat = self.get_by_id(chat_id)
-        if not chat:
+        if not self.deletion_service.tombstone(chat_id):
             return False
-
-        chat.delete()
+        self.invalidate(chat_id)
         return True
 
+    def invalidate(self, chat_id: int) -> None:
+        """
+        Drop a chat from the cache, in this and every process sharing it.
+
+        Args:
+            chat_id: ID of the chat that changed
+        """
+        if self.cache is not None:
+            self.cache.invalidate(int(chat_id))
+
+    def cache_stats(self) -> Optional[dict]:
+        """
+        Get hit/miss counters of the chat cache in this process.
+
+        Returns:
+            Counters, or None if caching is disabled
+        """
+        return self.cache.stats() if self.cache is not None else None
+
     def search_chats(self, query: str) -> QuerySet[Chat]:
         """
-        Search chats by title.
+        Search chats by title, across all chats.
+
+        Uses the full-text index where available, so every word of the query
+        must appear as a whole word in the title: unlike the substring match
+        this used to be, "plan" no longer finds "planning". Unlike the search
+        endpoints, which only cover the requesting user's chats, this is not
+        restricted to any user.
 
         Args:
             query: Search query string
@@ -193,4 +286,4 @@ class ChatRepository:
         Returns:
             QuerySet of matching chats
         """
-        return self.model.objects.with_title(query)
+        return self.search_service.filter_chats(self.model.objects.all(), query)
@@ -0,0 +1,130 @@
+from typing import Iterable, List, Mapping, Optional, Sequence
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from ..models.chat import Chat
+from ..models.message import Message
+from ..realtime import publish_on_commit
+from ..services.chat_counter_service import ChatCounterService
+from ..services.inbox_service import InboxService
+
+User = get_user_model()
+
+# Keeps ``id IN (...)`` well below every backend's bound-parameter limit.
+DELETE_BATCH_SIZE = 900
+
+
+class MessageRepository:
+    def __init__(self):
+        self.model = Message
+        self.inbox_service = InboxService()
+        self.counter_service = ChatCounterService()
+
+    def bulk_create(
+        self, chat: Chat, sender: User, items: Iterable[Mapping]
+    ) -> List[Message]:
+        """
+        Insert many messages into a chat in a single transaction.
+
+        Rows are written with ``bulk_create``; the chat's activity timestamp,
+        counters and its members' inboxes are updated once for the whole batch.
+
+        Args:
+            chat: Chat the messages belong to
+            sender: User sending the messages
+            items: Validated message data with ``content`` and ``context_index``
+
+        Returns:
+            Created Message instances
+        """
+        messages = [
+            self.model(
+                chat=chat,
+                sender=sender,
+                content=item["content"],
+                context_index=item.get("context_index"),
+            )
+            for item in items
+        ]
+        with transaction.atomic():
+            messages = self.model.objects.bulk_create(messages)
+            Chat.objects.filter(pk=chat.pk).update(updated_at=timezone.now())
+            if messages:
+                # bulk_create skips post_save, so handle the batch as a whole.
+                self.counter_service.messages_added(
+                    chat.pk, len(messages), messages[-1].pk, messages[-1].created_at
+                )
+                self.inbox_service.record_message(
+                    chat.pk, messages[-1].pk, messages[-1].created_at
+                )
+                publish_on_commit(
+                    chat.pk,
+                    "messages.bulk_created",
+                    {
+                        "count": len(messages),
+                        "first_id": messages[0].pk,
+                        "last_id": messages[-1].pk,
+                    },
+                )
+        return messages
+
+    def bulk_delete(
+        self,
+        chat: Chat,
+        ids: Optional[Sequence[int]] = None,
+        context_index_from: Optional[int] = None,
+        context_index_to: Optional[int] = None,
+    ) -> int:
+        """
+        Delete messages of a chat by id or by an inclusive context index range.
+
+        Rows are deleted with plain ``DELETE`` statements, without loading them
+        or sending per-row signals; the chat's counters and inboxes are repaired
+        once afterwards.
+
+        Args:
+            chat: Chat to delete messages from
+            ids: Message IDs to delete (optional)
+            context_index_from: Lowest context index to delete (optional)
+            context_index_to: Highest context index to delete (optional)
+
+        Returns:
+            Number of messages deleted
+        """
+        queryset = self.model.objects.for_chat(chat)
+        deleted = 0
+        with transaction.atomic():
+            if ids is not None:
+                ids = list(ids)
+                for start in range(0, len(ids), DELETE_BATCH_SIZE):
+                    batch = ids[start : start + DELETE_BATCH_SIZE]
+                    deleted += self._raw_delete(queryset.filter(id__in=batch))
+            else:
+                if context_index_from is not None:
+                    queryset = queryset.filter(context_index__gte=context_index_from)
+                if context_index_to is not None:
+                    queryset = queryset.filter(context_index__lte=context_index_to)
+                deleted = self._raw_delete(queryset)
+
+            if deleted:
+                Chat.objects.filter(pk=chat.pk).update(updated_at=timezone.now())
+                self.counter_service.messages_removed(chat.pk, deleted)
+                self.inbox_service.forget_messages(chat.pk)
+        return deleted
+
+    @staticmethod
+    def _raw_delete(queryset) -> int:
+        """
+        Delete rows with one ``DELETE``, bypassing Django's deletion collector.
+
+        ``QuerySet.delete()`` would load every row to look for cascades and to
+        send ``pre_delete``/``post_delete`` for each. Nothing references a
+        message, so there is nothing to cascade to, and the only receivers of
+        message deletes keep the chat's counters and its members' inboxes,
+        which ``bulk_delete`` repairs once for the whole batch instead. The
+        full-text index follows through its database triggers. A new receiver
+        of ``Message`` deletes needs the same treatment in ``bulk_delete``.
+        ``QuerySet._raw_delete`` is private Django API, used for the same
+        reason by the chat deletion, archive and blob services.
+        """
+        return queryset._raw_delete(queryset.db)
@@ -0,0 +1,15 @@
+from .ranged_file_response import ranged_file_response
+from .conditional_response import (
+    add_validators,
+    not_modified_response,
+    representation_validators,
+    weak_etag,
+)
+
+__all__ = [
+    "ranged_file_response",
+    "add_validators",
+    "not_modified_response",
+    "representation_validators",
+    "weak_etag",
+]
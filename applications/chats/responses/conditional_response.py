@@ -0,0 +1,97 @@
+import hashlib
+from datetime import datetime
+from typing import Iterable, Optional, Tuple
+
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+def weak_etag(*parts) -> str:
+    """
+    Build a weak entity tag from the values a representation depends on.
+
+    Args:
+        parts: Values that change whenever the representation does
+
+    Returns:
+        Quoted weak entity tag
+    """
+    digest = hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+    return f'W/"{digest}"'
+
+
+def representation_validators(
+    request: HttpRequest, state: dict, date_fields: Iterable[str] = ()
+) -> Tuple[str, Optional[datetime]]:
+    """
+    Derive the validators of a representation from the state it renders.
+
+    The entity tag also covers the request path with its query string and
+    the negotiated media type, so every page and format has its own.
+
+    Args:
+        request: Incoming request, after content negotiation
+        state: Values the representation is built from
+        date_fields: Keys of ``state`` holding modification times
+
+    Returns:
+        ``(etag, last_modified)``; ``last_modified`` is None without dates
+    """
+    dates = [state[field] for field in date_fields if state[field] is not None]
+    etag = weak_etag(
+        request.get_full_path(),
+        getattr(request, "accepted_media_type", None),
+        sorted(state.items()),
+    )
+    return etag, max(dates, default=None)
+
+
+def not_modified_response(
+    request: HttpRequest, etag: str, last_modified: Optional[datetime]
+) -> Optional[HttpResponse]:
+    """
+    Answer a conditional GET from its validators alone, before any serializer runs.
+
+    ``If-None-Match`` takes precedence over ``If-Modified-Since``, as HTTP
+    requires, so clients sending the entity tag back also notice changes
+    that leave no timestamp behind, such as deletions.
+
+    Args:
+        request: Incoming request
+        etag: Entity tag of the current representation
+        last_modified: Newest modification time it reflects (optional)
+
+    Returns:
+        A 304 (or 412) response, or None if the representation must be sent
+    """
+    last_modified_ts = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified_ts
+    )
+    if response is not None:
+        add_validators(response, etag, last_modified)
+    return response
+
+
+def add_validators(
+    response: HttpResponse, etag: str, last_modified: Optional[datetime]
+) -> HttpResponse:
+    """
+    Attach validators to a response and ask clients to revalidate with them.
+
+    Args:
+        response: Response to a GET
+        etag: Entity tag of the representation
+        last_modified: Newest modification time it reflects (optional)
+
+    Returns:
+        The same response
+    """
+    response.headers.setdefault("ETag", etag)
+    if last_modified is not None:
+        response.headers.setdefault(
+            "Last-Modified", http_date(int(last_modified.timestamp()))
+        )
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,178 @@
+import re
+from datetime import datetime
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import (
+    content_disposition_header,
+    http_date,
+    parse_etags,
+    parse_http_date_safe,
+)
+
+CHUNK_SIZE = 64 * 1024
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def ranged_file_response(
+    request: HttpRequest,
+    field_file,
+    *,
+    filename: str,
+    content_type: str,
+    etag: str,
+    last_modified: datetime,
+    chunk_size: int = CHUNK_SIZE,
+) -> HttpResponse:
+    """
+    Stream a stored file with HTTP conditional and range request support.
+
+    ``If-None-Match``/``If-Modified-Since`` are answered with 304 before the
+    file is opened. A single ``Range`` is served as 206 Partial Content, and an
+    unsatisfiable one as 416. Multi-range requests fall back to the whole file.
+    The body is read in ``chunk_size`` blocks, so memory use does not depend on
+    the file size; under ASGI each block is read in a thread, since Django
+    would read a synchronous body whole before sending any of it.
+
+    Args:
+        request: Incoming request
+        field_file: ``FieldFile`` pointing at the stored content
+        filename: Name sent in ``Content-Disposition``
+        content_type: MIME type of the content
+        etag: Quoted strong entity tag identifying the content
+        last_modified: When the content was stored
+
+    Returns:
+        A 200, 206, 304, 412 or 416 response
+    """
+    last_modified_ts = int(last_modified.timestamp())
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified_ts
+    )
+    if response is not None:
+        response.headers.setdefault("ETag", etag)
+        response.headers.setdefault("Last-Modified", http_date(last_modified_ts))
+        return response
+
+    storage = field_file.storage
+    size = storage.size(field_file.name)
+
+    byte_range = None
+    if _if_range_passes(request, etag, last_modified_ts):
+        byte_range = parse_range(request.headers.get("Range"), size)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+    start, end = byte_range or (0, size - 1)
+    # DRF wraps the request; the handler's class tells ASGI from WSGI.
+    if isinstance(getattr(request, "_request", request), ASGIRequest):
+        reader = _AsyncRangeReader
+    else:
+        reader = _RangeReader
+    response = StreamingHttpResponse(
+        reader(storage.open(field_file.name, "rb"), start, end, chunk_size),
+        status=206 if byte_range else 200,
+        content_type=content_type or "application/octet-stream",
+    )
+    if byte_range:
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response["Content-Length"] = str(max(end - start + 1, 0))
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified_ts)
+    response["Content-Disposition"] = content_disposition_header(
+        as_attachment=True, filename=filename
+    )
+    return response
+
+
+def parse_range(header: Optional[str], size: int):
+    """
+    Parse a single-range ``Range`` header against a resource of ``size`` bytes.
+
+    Headers that are not a single valid byte range, like ``bytes=5-3`` or
+    multiple ranges, are ignored as RFC 9110 requires, and the whole file is
+    served.
+
+    Returns:
+        ``(start, end)`` inclusive offsets, ``None`` to serve the whole file,
+        or ``False`` when the range cannot be satisfied
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    first, last = match.groups() if match else ("", "")
+    if first:
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        end = int(last) if last else size - 1
+    elif last:
+        # A suffix range: the last ``last`` bytes, and none at all for "-0".
+        suffix = int(last)
+        start = max(size - suffix, 0) if suffix else size
+        end = size - 1
+    else:
+        return None
+
+    if start >= size:
+        return False
+    return start, min(end, size - 1)
+
+
+def _if_range_passes(request: HttpRequest, etag: str, last_modified_ts: int) -> bool:
+    if_range = request.headers.get("If-Range")
+    if not if_range:
+        return True
+    if if_range.startswith(('"', "W/")):
+        # If-Range requires a strong comparison.
+        return not if_range.startswith("W/") and parse_etags(if_range) == [etag]
+    return parse_http_date_safe(if_range) == last_modified_ts
+
+
+class _RangeReader:
+    """Iterates over ``[start, end]`` of an open file and closes it with the response."""
+
+    def __init__(self, handle, start: int, end: int, chunk_size: int):
+        self.handle = handle
+        self.start = start
+        self.end = end
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        self.handle.seek(self.start)
+        remaining = self.end - self.start + 1
+        while remaining > 0:
+            data = self.handle.read(min(self.chunk_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+
+    def close(self):
+        self.handle.close()
+
+
+class _AsyncRangeReader:
+    """
+    ``_RangeReader`` for ASGI responses, reading each chunk in a thread.
+
+    Not iterable synchronously: ``StreamingHttpResponse`` prefers ``iter()``
+    whenever it works.
+    """
+
+    def __init__(self, *args):
+        self.reader = _RangeReader(*args)
+
+    async def __aiter__(self):
+        chunks = iter(self.reader)
+        read = sync_to_async(next, thread_sensitive=False)
+        while (data := await read(chunks, None)) is not None:
+            yield data
+
+    def close(self):
+        self.reader.close()
@@ -0,0 +1,17 @@
+from .replica_router import (
+    PinState,
+    ReplicaRouter,
+    current_state,
+    pin_state,
+    routing_config,
+    use_primary,
+)
+
+__all__ = [
+    "PinState",
+    "ReplicaRouter",
+    "current_state",
+    "pin_state",
+    "routing_config",
+    "use_primary",
+]
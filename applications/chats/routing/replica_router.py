@@ -0,0 +1,146 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from django.conf import settings
+from django.db import connections
+
+DEFAULT_STICKY_SECONDS = 5
+DEFAULT_COOKIE_NAME = "chats_primary_until"
+
+
+def routing_config() -> dict:
+    """``CHATS_DATABASE_ROUTING`` with defaults filled in."""
+    config = getattr(settings, "CHATS_DATABASE_ROUTING", {})
+    return {
+        "PRIMARY": config.get("PRIMARY", "default"),
+        "REPLICAS": list(config.get("REPLICAS", [])),
+        "STICKY_SECONDS": config.get("STICKY_SECONDS", DEFAULT_STICKY_SECONDS),
+        "COOKIE_NAME": config.get("COOKIE_NAME", DEFAULT_COOKIE_NAME),
+    }
+
+
+class PinState:
+    """
+    Where the reads of one request (or one thread of work) go.
+
+    Reads go to the primary until ``pinned_until`` (a Unix timestamp), which
+    every write moves ``STICKY_SECONDS`` ahead. ``replica`` is picked once,
+    so successive reads of a request see one replica's view of the data.
+    The object is shared with ``sync_to_async`` threads, which copy the
+    context: a write made in one of them pins the whole request.
+    """
+
+    def __init__(self, pinned_until: float = 0.0):
+        self.pinned_until = pinned_until
+        self.wrote = False
+        self.replica: Optional[str] = None
+        self.forced = 0
+
+    @property
+    def pinned(self) -> bool:
+        return self.forced > 0 or self.pinned_until > time.time()
+
+    def pin(self, seconds: float) -> None:
+        self.wrote = True
+        self.pinned_until = max(self.pinned_until, time.time() + seconds)
+
+
+_state: ContextVar[Optional[PinState]] = ContextVar("chats_pin_state", default=None)
+
+
+def current_state(create: bool = False) -> Optional[PinState]:
+    """The pin state of the current context, created on demand."""
+    state = _state.get()
+    if state is None and create:
+        state = PinState()
+        _state.set(state)
+    return state
+
+
+@contextmanager
+def pin_state(state: PinState):
+    """Route the reads of the enclosed code by ``state``."""
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+@contextmanager
+def use_primary():
+    """
+    Read from the primary inside the block.
+
+    For reads whose result outlives the request, such as values put in a
+    cache: a lagging replica would let them store stale data.
+    """
+    state = current_state(create=True)
+    state.forced += 1
+    try:
+        yield
+    finally:
+        state.forced -= 1
+
+
+class ReplicaRouter:
+    """
+    Send reads of the chats app to replicas and its writes to the primary.
+
+    Configured by ``CHATS_DATABASE_ROUTING``: ``PRIMARY`` and ``REPLICAS`` are
+    aliases of ``DATABASES``; without replicas everything stays on the
+    primary. Reads stay on the primary:
+
+    - inside a transaction on the primary, which a replica cannot see;
+    - for ``STICKY_SECONDS`` after a write in the same context, so a user
+      reads their own writes (``ReadYourWritesMiddleware`` carries this over
+      to the user's next requests with a cookie);
+    - inside ``use_primary()``.
+
+    Models of other apps are left to Django's default routing.
+    """
+
+    app_label = "chats"
+
+    def _routes(self, model) -> bool:
+        return model._meta.app_label == self.app_label
+
+    def db_for_read(self, model, **hints):
+        if not self._routes(model):
+            return None
+        config = routing_config()
+        replicas = config["REPLICAS"]
+        primary = config["PRIMARY"]
+        if not replicas or connections[primary].in_atomic_block:
+            return primary
+        state = current_state()
+        if state is None:
+            return random.choice(replicas)
+        if state.pinned:
+            return primary
+        if state.replica not in replicas:
+            state.replica = random.choice(replicas)
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        if not self._routes(model):
+            return None
+        config = routing_config()
+        current_state(create=True).pin(config["STICKY_SECONDS"])
+        return config["PRIMARY"]
+
+    def allow_relation(self, obj1, obj2, **hints):
+        config = routing_config()
+        aliases = {config["PRIMARY"], *config["REPLICAS"]}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication.
+        if app_label == self.app_label and db in routing_config()["REPLICAS"]:
+            return False
+        return None
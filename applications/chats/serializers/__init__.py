@@ -1,11 +1,30 @@
 from .user_serializer import UserSerializer
 from .file_serializer import FileSerializer
-from .message_serializer import MessageSerializer
+from .message_serializer import MessageRowSerializer, MessageSerializer
+from .message_bulk_serializer import (
+    MessageBulkCreateSerializer,
+    MessageBulkDeleteSerializer,
+)
 from .chat_serializer import ChatSerializer
+from .chat_summary_serializer import ChatSummarySerializer
+from .chat_inbox_serializer import ChatInboxSerializer
+from .upload_session_serializer import UploadSessionSerializer
+from .search_serializer import (
+    ChatSearchResultSerializer,
+    MessageSearchResultSerializer,
+)
 
 __all__ = [
     "UserSerializer",
     "FileSerializer",
     "MessageSerializer",
+    "MessageRowSerializer",
+    "MessageBulkCreateSerializer",
+    "MessageBulkDeleteSerializer",
     "ChatSerializer",
+    "ChatSummarySerializer",
+    "ChatInboxSerializer",
+    "UploadSessionSerializer",
+    "ChatSearchResultSerializer",
+    "MessageSearchResultSerializer",
 ]
@@ -0,0 +1,24 @@
+from rest_framework import serializers
+from ..models import Chat, ChatInbox
+
+
+class InboxChatSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Chat
+        fields = ["id", "title", "is_active"]
+        read_only_fields = fields
+
+
+class ChatInboxSerializer(serializers.ModelSerializer):
+    """
+    An entry of the user's inbox.
+
+    Expects the chat to be loaded with ``select_related("chat")``.
+    """
+
+    chat = InboxChatSerializer(read_only=True)
+
+    class Meta:
+        model = ChatInbox
+        fields = ["chat", "last_activity_at", "last_message_id"]
+        read_only_fields = fields
@@ -26,6 +26,11 @@ class ChatSerializer(serializers.ModelSerializer):
             "participant_ids",
             "messages",
             "files",
+            "message_count",
+            "file_count",
+            "total_file_bytes",
+            "last_message_id",
+            "last_message_at",
             "created_at",
             "updated_at",
         ]
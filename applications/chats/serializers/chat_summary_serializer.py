@@ -0,0 +1,37 @@
+from rest_framework import serializers
+from ..models import Chat
+
+
+class ChatSummarySerializer(serializers.ModelSerializer):
+    """
+    Lightweight chat representation for list responses.
+
+    Expects a queryset built with ``Chat.objects.with_summary()``; nothing here
+    touches messages or files directly.
+    """
+
+    created_by = serializers.IntegerField(source="created_by_id", read_only=True)
+    participant_ids = serializers.SerializerMethodField()
+    last_activity_at = serializers.DateTimeField(read_only=True)
+
+    class Meta:
+        model = Chat
+        fields = [
+            "id",
+            "title",
+            "is_active",
+            "created_by",
+            "participant_ids",
+            "message_count",
+            "file_count",
+            "total_file_bytes",
+            "last_message_id",
+            "last_message_at",
+            "last_activity_at",
+            "created_at",
+            "updated_at",
+        ]
+        read_only_fields = fields
+
+    def get_participant_ids(self, obj) -> list[int]:
+        return [participant.id for participant in obj.participants.all()]
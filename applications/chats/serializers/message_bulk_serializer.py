@@ -0,0 +1,71 @@
+from django.conf import settings
+from rest_framework import serializers
+from rest_framework.fields import SkipField, empty
+from .message_serializer import MessageSerializer
+
+BULK_MESSAGE_LIMIT = getattr(settings, "CHATS_BULK_MESSAGE_LIMIT", 50_000)
+
+
+class MessageBulkCreateSerializer(serializers.Serializer):
+    """
+    Validates a batch of messages in a single pass.
+
+    Items are run through the ``content`` and ``context_index`` fields of one
+    ``MessageSerializer``, so they are held to the same rules as single
+    messages, without building and running a field tree per message.
+    """
+
+    messages = serializers.ListField(allow_empty=False, max_length=BULK_MESSAGE_LIMIT)
+
+    ITEM_FIELDS = ("content", "context_index")
+
+    def validate_messages(self, messages):
+        fields = MessageSerializer().fields
+        errors = {}
+        validated = []
+        for position, item in enumerate(messages):
+            if not isinstance(item, dict):
+                errors[position] = {"non_field_errors": ["Expected an object."]}
+                continue
+
+            item_errors = {}
+            values = {}
+            for name in self.ITEM_FIELDS:
+                try:
+                    values[name] = fields[name].run_validation(item.get(name, empty))
+                except SkipField:
+                    values[name] = None
+                except serializers.ValidationError as exc:
+                    item_errors[name] = exc.detail
+
+            if item_errors:
+                errors[position] = item_errors
+            else:
+                validated.append(values)
+
+        if errors:
+            raise serializers.ValidationError(errors)
+        return validated
+
+
+class MessageBulkDeleteSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        allow_empty=False,
+        max_length=BULK_MESSAGE_LIMIT,
+    )
+    context_index_from = serializers.IntegerField(required=False)
+    context_index_to = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        has_range = "context_index_from" in attrs or "context_index_to" in attrs
+        if "ids" in attrs and has_range:
+            raise serializers.ValidationError(
+                "Provide either ids or a context index range, not both."
+            )
+        if "ids" not in attrs and not has_range:
+            raise serializers.ValidationError(
+                "Provide ids or a context index range to delete."
+            )
+        return attrs
@@ -1,4 +1,9 @@
-from rest_framework import serializers
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
 from ..models import Message
 from .user_serializer import UserSerializer
 
@@ -19,3 +24,50 @@ class MessageSerializer(serializers.ModelSerializer):
             "updated_at",
         ]
         read_only_fields = ["created_at", "updated_at"]
+
+
+class MessageRowSerializer(serializers.BaseSerializer):
+    """
+    Read-only rendering of ``MessageQuerySet.as_rows()`` rows.
+
+    Produces exactly what ``MessageSerializer`` does for the same message,
+    without building a field tree per message or a nested serializer per
+    sender. Use it for large read-only pages.
+    """
+
+    datetime_field = serializers.DateTimeField()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        output_format = api_settings.DATETIME_FORMAT
+        # Timestamps are formatted inline when DRF would emit ISO 8601 in the
+        # current time zone; any other setup goes through the field.
+        self.timezone = (
+            timezone.get_current_timezone()
+            if settings.USE_TZ and output_format and output_format.lower() == ISO_8601
+            else None
+        )
+        self.is_utc = timezone.get_current_timezone_name() == "UTC"
+
+    def format_datetime(self, value):
+        if self.timezone is None or value is None:
+            return self.datetime_field.to_representation(value)
+        if not (self.is_utc and value.tzinfo is dt_timezone.utc):
+            value = value.astimezone(self.timezone)
+        value = value.isoformat()
+        return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+    def to_representation(self, row):
+        format_datetime = self.format_datetime
+        return {
+            "id": row["id"],
+            "content": row["content"],
+            "sender": {
+                "id": row["sender_id"],
+                "username": row["sender_username"],
+                "email": row["sender_email"],
+            },
+            "context_index": row["context_index"],
+            "created_at": format_datetime(row["created_at"]),
+            "updated_at": format_datetime(row["updated_at"]),
+        }
@@ -0,0 +1,49 @@
+from rest_framework import serializers
+from ..models import Chat, Message
+
+
+class MessageSearchResultSerializer(serializers.ModelSerializer):
+    """
+    A message matched by full-text search.
+
+    ``snippet`` is HTML with matches wrapped in ``<mark>`` tags and everything
+    else escaped. ``rank`` is the BM25 score (lower is more relevant).
+    """
+
+    chat_id = serializers.IntegerField(read_only=True)
+    sender_id = serializers.IntegerField(read_only=True)
+    snippet = serializers.CharField(read_only=True)
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Message
+        fields = [
+            "id",
+            "chat_id",
+            "sender_id",
+            "context_index",
+            "created_at",
+            "snippet",
+            "rank",
+        ]
+        read_only_fields = fields
+
+
+class ChatSearchResultSerializer(serializers.ModelSerializer):
+    """A chat whose title or prompt matched full-text search."""
+
+    snippet = serializers.CharField(read_only=True)
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Chat
+        fields = [
+            "id",
+            "title",
+            "is_active",
+            "created_at",
+            "updated_at",
+            "snippet",
+            "rank",
+        ]
+        read_only_fields = fields
@@ -0,0 +1,47 @@
+from django.conf import settings
+from rest_framework import serializers
+from ..models import UploadSession
+
+DEFAULT_CHUNK_SIZE = getattr(settings, "CHATS_UPLOAD_CHUNK_SIZE", 8 * 1024 * 1024)
+MAX_CHUNK_SIZE = getattr(settings, "CHATS_UPLOAD_MAX_CHUNK_SIZE", 64 * 1024 * 1024)
+# File.file_size is a 32-bit integer column.
+MAX_SIZE = getattr(settings, "CHATS_UPLOAD_MAX_SIZE", 2**31 - 1)
+# Every chunk is a file on disk until the session completes.
+MAX_CHUNKS = getattr(settings, "CHATS_UPLOAD_MAX_CHUNKS", 10_000)
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    chunk_size = serializers.IntegerField(
+        min_value=1, max_value=MAX_CHUNK_SIZE, default=DEFAULT_CHUNK_SIZE
+    )
+    total_size = serializers.IntegerField(min_value=0, max_value=MAX_SIZE)
+    total_chunks = serializers.IntegerField(read_only=True)
+    received_chunks = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            "id",
+            "file_name",
+            "content_type",
+            "total_size",
+            "chunk_size",
+            "total_chunks",
+            "received_chunks",
+            "created_at",
+            "updated_at",
+        ]
+        read_only_fields = ["id", "created_at", "updated_at"]
+
+    def validate(self, attrs):
+        session = UploadSession(
+            total_size=attrs["total_size"], chunk_size=attrs["chunk_size"]
+        )
+        if session.total_chunks > MAX_CHUNKS:
+            raise serializers.ValidationError(
+                {"chunk_size": f"Uploads may have at most {MAX_CHUNKS} chunks."}
+            )
+        return attrs
+
+    def get_received_chunks(self, obj) -> list[int]:
+        return self.context["upload_service"].received_chunks(obj)
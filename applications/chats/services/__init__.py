@@ -0,0 +1,30 @@
+from .upload_session_service import (
+    AssembledUpload,
+    UploadSessionError,
+    UploadSessionService,
+)
+from .search_service import SearchService
+from .inbox_service import InboxService
+from .chat_counter_service import ChatCounterService
+from .membership_service import MembershipService
+from .archive_service import ArchiveService, MessageHistory
+from .blob_service import BlobService
+from .job_service import JobService
+from .chat_deletion_service import ChatDeletionService
+from .export_service import ChatExportService
+
+__all__ = [
+    "AssembledUpload",
+    "UploadSessionError",
+    "UploadSessionService",
+    "SearchService",
+    "InboxService",
+    "ChatCounterService",
+    "MembershipService",
+    "ArchiveService",
+    "MessageHistory",
+    "BlobService",
+    "JobService",
+    "ChatDeletionService",
+    "ChatExportService",
+]
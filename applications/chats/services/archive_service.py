@@ -0,0 +1,400 @@
+import json
+import operator
+import zlib
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Q
+from ..models.chat import Chat
+from ..models.message import Message
+from ..models.message_segment import MessageSegment
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+User = get_user_model()
+
+DEFAULT_CODEC = "zlib"
+DEFAULT_SEGMENT_SIZE = 500
+DEFAULT_ARCHIVE_AFTER_DAYS = 180
+
+# Chats whose ids are read per query while looking for messages to archive.
+CHAT_BATCH_SIZE = 1000
+
+# Columns stored per archived message, in this order.
+ARCHIVED_FIELDS = (
+    "id",
+    "content",
+    "context_index",
+    "created_at",
+    "updated_at",
+    "sender_id",
+)
+
+
+def _zstd_compress(data: bytes) -> bytes:
+    return zstandard.ZstdCompressor(level=10).compress(data)
+
+
+def _zstd_decompress(data: bytes) -> bytes:
+    return zstandard.ZstdDecompressor().decompress(data)
+
+
+CODECS: Dict[str, tuple] = {
+    "zlib": (lambda data: zlib.compress(data, 9), zlib.decompress),
+    "zstd": (_zstd_compress, _zstd_decompress),
+}
+
+
+def archive_config() -> dict:
+    """``CHATS_ARCHIVE`` with defaults filled in."""
+    config = getattr(settings, "CHATS_ARCHIVE", {})
+    return {
+        "CODEC": config.get("CODEC", DEFAULT_CODEC),
+        "SEGMENT_SIZE": config.get("SEGMENT_SIZE", DEFAULT_SEGMENT_SIZE),
+        "ARCHIVE_AFTER_DAYS": config.get(
+            "ARCHIVE_AFTER_DAYS", DEFAULT_ARCHIVE_AFTER_DAYS
+        ),
+    }
+
+
+class ArchiveService:
+    """
+    Moves old messages into compressed per-chat segments and reads them back.
+
+    Archival always takes a chat's oldest hot messages that sort after its
+    newest segment, so segments never overlap. Messages given an older
+    ``created_at`` once their chat has been archived (imports, backfills)
+    stay in the hot table, sorting in among archived ones; readers merge
+    the two tiers by ``(created_at, id)`` rather than reading one after the
+    other. Each segment is written, and its
+    messages deleted, in a transaction of its own holding locks on at most
+    ``segment_size`` messages, so archival runs alongside normal traffic.
+    The newest segment of a chat is topped up before a new one is started,
+    so frequent runs do not leave many tiny segments behind.
+
+    Archival keeps message counts and ids as they were: it sends no delete
+    signals and leaves counters, inboxes and subscribers alone.
+
+    Args:
+        codec: ``zlib`` or ``zstd`` (requires the ``zstandard`` package);
+            defaults to ``CHATS_ARCHIVE["CODEC"]``
+        segment_size: Most messages per segment
+    """
+
+    def __init__(self, codec: Optional[str] = None, segment_size: Optional[int] = None):
+        config = archive_config()
+        self.codec = codec or config["CODEC"]
+        self.segment_size = segment_size or config["SEGMENT_SIZE"]
+        if self.codec not in CODECS:
+            raise ImproperlyConfigured(f"Unknown archive codec {self.codec!r}")
+        if self.codec == "zstd" and zstandard is None:
+            raise ImproperlyConfigured(
+                "The zstd archive codec requires the 'zstandard' package"
+            )
+
+    def encode(self, rows: Sequence[dict]) -> bytes:
+        """Serialize and compress message rows with this service's codec."""
+        data = json.dumps(
+            [
+                [
+                    row["id"],
+                    row["content"],
+                    row["context_index"],
+                    row["created_at"].isoformat(),
+                    row["updated_at"].isoformat(),
+                    row["sender_id"],
+                ]
+                for row in rows
+            ],
+            separators=(",", ":"),
+        ).encode("utf-8")
+        return CODECS[self.codec][0](data)
+
+    @staticmethod
+    def decode(segment: MessageSegment) -> List[dict]:
+        """Message rows of a segment, oldest first."""
+        decompress = CODECS[segment.codec][1]
+        rows = json.loads(decompress(bytes(segment.payload)))
+        return [
+            {
+                "id": row[0],
+                "content": row[1],
+                "context_index": row[2],
+                "created_at": datetime.fromisoformat(row[3]),
+                "updated_at": datetime.fromisoformat(row[4]),
+                "sender_id": row[5],
+            }
+            for row in rows
+        ]
+
+    def archive(
+        self,
+        cutoff: datetime,
+        limit: Optional[int] = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> int:
+        """
+        Archive messages created before ``cutoff``, one segment at a time.
+
+        Safe to interrupt and rerun: every segment is committed on its own.
+
+        Args:
+            cutoff: Messages created before this are archived
+            limit: Stop after about this many messages (optional)
+            progress: Called with ``(chat id, messages archived so far)`` after
+                every chat (optional)
+
+        Returns:
+            Number of messages archived
+        """
+        archived, last_pk = 0, 0
+        while limit is None or archived < limit:
+            # A chat cannot hold messages older than itself.
+            chat_ids = list(
+                Chat.objects.filter(created_at__lt=cutoff, pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:CHAT_BATCH_SIZE]
+            )
+            if not chat_ids:
+                break
+            last_pk = chat_ids[-1]
+            for chat_id in chat_ids:
+                while limit is None or archived < limit:
+                    moved = self.archive_segment(chat_id, cutoff)
+                    if not moved:
+                        break
+                    archived += moved
+                if progress is not None:
+                    progress(chat_id, archived)
+        return archived
+
+    def archive_segment(self, chat_id: int, cutoff: datetime) -> int:
+        """
+        Move the oldest messages of a chat created before ``cutoff`` into its
+        newest segment, or a new one when that is full.
+
+        Returns:
+            Number of messages moved; 0 when none are left to archive
+        """
+        with transaction.atomic():
+            # Serializes archival of this chat across processes.
+            list(Chat.objects.select_for_update().filter(pk=chat_id).values("pk"))
+            segment = (
+                MessageSegment.objects.for_chat(chat_id)
+                .select_for_update()
+                .newest()
+                .first()
+            )
+            hot = Message.objects.filter(chat_id=chat_id, created_at__lt=cutoff)
+            if segment is not None:
+                # Messages sorting into the archive would make segments
+                # overlap; they are left in the hot table.
+                hot = hot.filter(
+                    Q(created_at__gt=segment.last_created_at)
+                    | Q(
+                        created_at=segment.last_created_at,
+                        id__gt=segment.last_message_id,
+                    )
+                )
+            if segment is None or segment.message_count >= self.segment_size:
+                segment, archived_rows = None, []
+            else:
+                archived_rows = self.decode(segment)
+
+            rows = list(
+                hot.order_by("created_at", "id")
+                .select_for_update()
+                .values(*ARCHIVED_FIELDS)[: self.segment_size - len(archived_rows)]
+            )
+            if not rows:
+                return 0
+
+            rows = archived_rows + rows
+            if segment is None:
+                segment = MessageSegment(chat_id=chat_id)
+            segment.first_created_at = rows[0]["created_at"]
+            segment.first_message_id = rows[0]["id"]
+            segment.last_created_at = rows[-1]["created_at"]
+            segment.last_message_id = rows[-1]["id"]
+            segment.message_count = len(rows)
+            segment.codec = self.codec
+            segment.payload = self.encode(rows)
+            segment.save()
+
+            moved = Message.objects.filter(
+                pk__in=[row["id"] for row in rows[len(archived_rows) :]]
+            )
+            # A raw delete: the messages still exist, only elsewhere, so the
+            # delete signals (counters, inboxes, subscribers) must not run.
+            return moved._raw_delete(moved.db)
+
+    def rows(
+        self,
+        chat_id: int,
+        position: Optional[Sequence] = None,
+        descending: bool = False,
+        limit: int = 50,
+    ) -> List[dict]:
+        """
+        Archived messages of a chat past a ``(created_at, id)`` position.
+
+        Rows have the shape of ``MessageQuerySet.as_rows()``. Only the
+        segments overlapping the page are read and decompressed.
+
+        Args:
+            chat_id: ID of the chat
+            position: Keyset position to start after (optional)
+            descending: Newest first, reading backwards from ``position``
+            limit: Most rows to return
+
+        Returns:
+            Message rows in the requested order
+        """
+        if limit <= 0:
+            return []
+        segments = MessageSegment.objects.for_chat(chat_id)
+        if position is None:
+            segments = segments.newest() if descending else segments.oldest()
+        elif descending:
+            segments = segments.before(*position)
+        else:
+            segments = segments.after(*position)
+
+        rows = []
+        for segment in segments.iterator(chunk_size=4):
+            decoded = self.decode(segment)
+            if descending:
+                decoded.reverse()
+            if position is not None:
+                key = tuple(position)
+                decoded = [
+                    row
+                    for row in decoded
+                    if (
+                        (row["created_at"], row["id"]) < key
+                        if descending
+                        else (row["created_at"], row["id"]) > key
+                    )
+                ]
+            rows.extend(decoded[: limit - len(rows)])
+            if len(rows) >= limit:
+                break
+        self._join_senders(rows)
+        return rows
+
+    def newest_key(self, chat_id: int) -> Optional[tuple]:
+        """``(created_at, id)`` of a chat's newest archived message, or None."""
+        return (
+            MessageSegment.objects.for_chat(chat_id)
+            .newest()
+            .values_list("last_created_at", "last_message_id")
+            .first()
+        )
+
+    def find(self, chat_id: int, **values) -> List[dict]:
+        """
+        Archived messages of a chat with the given field values, oldest first.
+
+        Segments are keyed by position alone, so every segment of the chat is
+        decoded: meant for lookups by id or context index, not for paging.
+
+        Args:
+            chat_id: ID of the chat
+            values: ``ARCHIVED_FIELDS`` and the values they must equal
+
+        Returns:
+            Message rows in the shape of ``MessageQuerySet.as_rows()``
+        """
+        rows = []
+        segments = MessageSegment.objects.for_chat(chat_id).oldest()
+        for segment in segments.iterator(chunk_size=4):
+            rows.extend(
+                row
+                for row in self.decode(segment)
+                if all(row[field] == value for field, value in values.items())
+            )
+        self._join_senders(rows)
+        return rows
+
+    @staticmethod
+    def _join_senders(rows: List[dict]) -> None:
+        if not rows:
+            return
+        senders = dict(
+            (user["pk"], user)
+            for user in User.objects.filter(
+                pk__in={row["sender_id"] for row in rows}
+            ).values("pk", "username", "email")
+        )
+        for row in rows:
+            sender = senders.get(row["sender_id"], {})
+            row["sender_username"] = sender.get("username")
+            row["sender_email"] = sender.get("email")
+
+
+class MessageHistory:
+    """
+    A chat's messages across both tiers, for ``KeysetPagination``.
+
+    Pages merge the rows of both tiers by key, since messages backdated after
+    archival stay hot while sorting among archived ones. Reading newest
+    first, the cold tier is skipped while the hot one fills the page with
+    messages newer than any archived. Stands in for a queryset of
+    ``as_rows()`` rows: the paginator calls ``keyset_page`` instead of
+    ordering and filtering it.
+
+    Args:
+        chat_id: ID of the chat
+        hot: ``as_rows()`` queryset of the chat's hot messages
+        archive: Service reading the cold tier (optional)
+    """
+
+    def __init__(self, chat_id: int, hot, archive: Optional[ArchiveService] = None):
+        self.chat_id = chat_id
+        self.hot = hot
+        self.model = hot.model
+        self.archive = archive or ArchiveService()
+
+    def keyset_page(self, paginator, position, descending: bool, limit: int) -> list:
+        key = operator.itemgetter(*paginator.fields)
+        rows = paginator.fetch(self.hot, position, descending, limit)
+        if descending and len(rows) == limit:
+            newest = self.archive.newest_key(self.chat_id)
+            if newest is None or newest < key(rows[-1]):
+                return rows
+        rows += self.archive.rows(self.chat_id, position, descending, limit)
+        return sorted(rows, key=key, reverse=descending)[:limit]
+
+    async def akeyset_page(
+        self, paginator, position, descending: bool, limit: int
+    ) -> list:
+        # Segments are decoded in Python either way: both tiers are read in
+        # the one thread hop, instead of one hop per tier.
+        return await sync_to_async(self.keyset_page)(
+            paginator, position, descending, limit
+        )
+
+    def get(self, pk: int) -> Optional[dict]:
+        """A message of either tier by id, or None."""
+        row = self.hot.filter(pk=pk).first()
+        if row is None:
+            row = next(iter(self.archive.find(self.chat_id, id=pk)), None)
+        return row
+
+    async def aget(self, pk: int) -> Optional[dict]:
+        """``get`` for async views, in one thread hop."""
+        return await sync_to_async(self.get)(pk)
+
+    def with_context_index(self, context_index: int) -> List[dict]:
+        """Messages of both tiers with a context index, oldest first."""
+        rows = list(self.hot.filter(context_index=context_index))
+        rows += self.archive.find(self.chat_id, context_index=context_index)
+        return sorted(rows, key=operator.itemgetter("created_at", "id"))
@@ -0,0 +1,230 @@
+from typing import Optional
+
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from ..models.chat import Chat
+from ..models.file import File
+from ..models.message import Message
+from ..models.message_segment import MessageSegment
+
+
+def newest_message(messages, segments=None) -> dict:
+    """
+    Expressions finding the newest message among hot and archived ones.
+
+    Archived messages all predate hot ones, so the newest segment only counts
+    when no hot message is left.
+
+    Args:
+        messages: Queryset of one chat's hot messages
+        segments: Queryset of the same chat's segments (optional)
+
+    Returns:
+        Mapping of ``last_message_id`` and ``last_message_at`` to expressions
+    """
+    latest = messages.order_by("-created_at", "-id")
+    newest = {
+        "last_message_id": models.Subquery(latest.values("id")[:1]),
+        "last_message_at": models.Subquery(latest.values("created_at")[:1]),
+    }
+    if segments is not None:
+        segments = segments.order_by("-last_created_at", "-last_message_id")
+        newest["last_message_id"] = Coalesce(
+            newest["last_message_id"],
+            models.Subquery(segments.values("last_message_id")[:1]),
+        )
+        newest["last_message_at"] = Coalesce(
+            newest["last_message_at"],
+            models.Subquery(segments.values("last_created_at")[:1]),
+        )
+    return newest
+
+
+def actual_counters(message_model, file_model, segment_model=None) -> dict:
+    """
+    Expressions computing a chat's counters from its messages and files.
+
+    Takes the models as arguments so migrations can pass historical ones.
+
+    Args:
+        message_model: Message model
+        file_model: File model
+        segment_model: MessageSegment model, to count archived messages too
+            (optional)
+
+    Returns:
+        Mapping of counter field name to expression, for ``update``/``annotate``
+    """
+    messages = message_model.objects.filter(chat=models.OuterRef("pk")).order_by()
+    files = file_model.objects.filter(chat=models.OuterRef("pk")).order_by()
+    segments = None
+    message_count = Coalesce(
+        models.Subquery(
+            messages.values("chat").annotate(n=models.Count("pk")).values("n")
+        ),
+        0,
+    )
+    if segment_model is not None:
+        segments = segment_model.objects.filter(chat=models.OuterRef("pk")).order_by()
+        message_count = models.ExpressionWrapper(
+            message_count
+            + Coalesce(
+                models.Subquery(
+                    segments.values("chat")
+                    .annotate(n=models.Sum("message_count"))
+                    .values("n")
+                ),
+                0,
+            ),
+            output_field=models.IntegerField(),
+        )
+    return {
+        "message_count": message_count,
+        "file_count": Coalesce(
+            models.Subquery(
+                files.values("chat").annotate(n=models.Count("pk")).values("n")
+            ),
+            0,
+        ),
+        "total_file_bytes": Coalesce(
+            models.Subquery(
+                files.values("chat").annotate(n=models.Sum("file_size")).values("n")
+            ),
+            0,
+        ),
+        **newest_message(messages, segments),
+    }
+
+
+class ChatCounterService:
+    """
+    Maintains the denormalized counters on ``Chat``.
+
+    Every change is a single ``UPDATE ... SET n = n + delta`` so concurrent
+    writers never lose each other's increments. Callers run these inside the
+    transaction that creates or deletes the rows being counted.
+    """
+
+    def messages_added(
+        self, chat_id: int, count: int, last_message_id: int, last_message_at
+    ) -> None:
+        """
+        Count new messages and record the newest one.
+
+        Args:
+            chat_id: ID of the chat
+            count: Number of messages created
+            last_message_id: ID of the newest created message
+            last_message_at: Creation time of the newest created message
+        """
+        newer = models.Q(last_message_at__isnull=True) | models.Q(
+            last_message_at__lte=last_message_at
+        )
+        Chat.objects.filter(pk=chat_id).update(
+            message_count=F("message_count") + count,
+            last_message_id=models.Case(
+                models.When(newer, then=models.Value(last_message_id)),
+                default=F("last_message_id"),
+                output_field=models.BigIntegerField(),
+            ),
+            last_message_at=models.Case(
+                models.When(newer, then=models.Value(last_message_at)),
+                default=F("last_message_at"),
+                output_field=models.DateTimeField(),
+            ),
+        )
+
+    def messages_removed(
+        self, chat_id: int, count: int, message_id: Optional[int] = None
+    ) -> None:
+        """
+        Uncount deleted messages and find the new newest message if needed.
+
+        Args:
+            chat_id: ID of the chat
+            count: Number of messages deleted
+            message_id: ID of the deleted message, when only one was deleted;
+                otherwise the newest message is always looked up again
+        """
+        newest = newest_message(
+            Message.objects.filter(chat_id=chat_id),
+            MessageSegment.objects.filter(chat_id=chat_id),
+        )
+        updates = {"message_count": F("message_count") - count}
+        if message_id is None:
+            updates.update(newest)
+        else:
+            was_latest = models.Q(last_message_id=message_id)
+            updates["last_message_id"] = models.Case(
+                models.When(was_latest, then=newest["last_message_id"]),
+                default=F("last_message_id"),
+                output_field=models.BigIntegerField(),
+            )
+            updates["last_message_at"] = models.Case(
+                models.When(was_latest, then=newest["last_message_at"]),
+                default=F("last_message_at"),
+                output_field=models.DateTimeField(),
+            )
+        Chat.objects.filter(pk=chat_id).update(**updates)
+
+    def files_changed(self, chat_id: int, count: int, size: int) -> None:
+        """
+        Add (or, with negative values, subtract) files and bytes.
+
+        Args:
+            chat_id: ID of the chat
+            count: Number of files added, negative when removed
+            size: Bytes added, negative when removed
+        """
+        Chat.objects.filter(pk=chat_id).update(
+            file_count=F("file_count") + count,
+            total_file_bytes=F("total_file_bytes") + size,
+        )
+
+    def repair(self, batch_size: int = 1000, dry_run: bool = False, stdout=None):
+        """
+        Recompute counters of every chat and fix those that drifted.
+
+        Chats are checked in primary key batches, each in its own transaction,
+        so the table is never locked for long. Drifted rows are rewritten from
+        the source tables in the same statement that recounts them.
+
+        Args:
+            batch_size: Number of chats checked per batch
+            dry_run: Only report drifted chats
+            stdout: Stream to report progress on (optional)
+
+        Returns:
+            IDs of the chats whose counters had drifted
+        """
+        expressions = actual_counters(Message, File, MessageSegment)
+        fields = list(expressions)
+        drifted = []
+        last_pk = 0
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    Chat.objects.filter(pk__gt=last_pk)
+                    .order_by("pk")
+                    .annotate(
+                        **{f"actual_{name}": expressions[name] for name in fields}
+                    )
+                    .values("pk", *fields, *[f"actual_{name}" for name in fields])[
+                        :batch_size
+                    ]
+                )
+                if not batch:
+                    break
+                last_pk = batch[-1]["pk"]
+                ids = [
+                    row["pk"]
+                    for row in batch
+                    if any(row[name] != row[f"actual_{name}"] for name in fields)
+                ]
+                if ids and not dry_run:
+                    Chat.objects.filter(pk__in=ids).update(**expressions)
+            drifted.extend(ids)
+            if stdout is not None:
+                stdout.write(f"Checked chats up to id {last_pk}: {len(ids)} drifted")
+        return drifted
@@ -0,0 +1,184 @@
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from ..models.chat import Chat
+from ..models.chat_inbox import ChatInbox
+from ..models.file import File
+from ..models.message import Message
+from ..models.message_segment import MessageSegment
+from ..models.upload_session import UploadSession
+from .blob_service import BlobService
+from .job_service import JobService
+from .membership_service import MembershipService
+from .upload_session_service import UploadSessionService
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_BATCHES_PER_JOB = 20
+
+
+def deletion_config() -> dict:
+    """``CHATS_DELETION`` with defaults filled in."""
+    config = getattr(settings, "CHATS_DELETION", {})
+    return {
+        "BATCH_SIZE": config.get("BATCH_SIZE", DEFAULT_BATCH_SIZE),
+        "BATCHES_PER_JOB": config.get("BATCHES_PER_JOB", DEFAULT_BATCHES_PER_JOB),
+    }
+
+
+class ChatDeletionService:
+    """
+    Deletes chats without a long transaction or loading their rows.
+
+    ``tombstone`` marks a chat deleted, which hides it from ``Chat.objects``,
+    and removes its participants and inbox entries, so no member can reach
+    it, its messages or its files any more. It then queues a purge job.
+    ``purge`` deletes messages, archived segments and files by primary key,
+    ``BATCH_SIZE`` at a time and one transaction per batch, releasing the
+    files' blobs as it goes; only ids are held in memory. The chat row goes
+    last. Purge jobs stop after ``BATCHES_PER_JOB`` batches and queue
+    themselves again, so a huge chat never holds a worker past its lease.
+
+    Args:
+        batch_size: Rows deleted per transaction (optional)
+    """
+
+    def __init__(self, batch_size: Optional[int] = None):
+        self.batch_size = batch_size or deletion_config()["BATCH_SIZE"]
+        self.blob_service = BlobService()
+        self.membership_service = MembershipService()
+        self.job_service = JobService()
+
+    def tombstone(self, chat_id: int) -> bool:
+        """
+        Hide a chat at once and queue its purge.
+
+        Args:
+            chat_id: ID of the chat
+
+        Returns:
+            True if the chat was deleted, False if not found
+        """
+        with transaction.atomic():
+            if not Chat.objects.filter(pk=chat_id).update(deleted_at=timezone.now()):
+                return False
+            members = Chat.participants.through.objects.filter(chat_id=chat_id)
+            member_ids = list(members.values_list("user_id", flat=True))
+            # Raw deletes: nothing else refers to these rows, and the
+            # signals' per-row bookkeeping is done here at once.
+            members._raw_delete(members.db)
+            inbox = ChatInbox.objects.for_chat(chat_id)
+            inbox._raw_delete(inbox.db)
+            self.membership_service.invalidate(*member_ids)
+            self.purge_later(chat_id)
+        return True
+
+    def purge_later(self, chat_id: int) -> None:
+        """Queue a purge job for a tombstoned chat."""
+        self.job_service.enqueue("chats.purge_chat", {"chat_id": chat_id})
+
+    def purge(
+        self,
+        chat_id: int,
+        max_batches: Optional[int] = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> bool:
+        """
+        Delete a tombstoned chat's content in batches, then the chat.
+
+        Args:
+            chat_id: ID of the chat
+            max_batches: Stop after this many full batches (optional)
+            progress: Called with the chat id and the rows deleted so far
+                after every batch (optional)
+
+        Returns:
+            True once the chat is gone, False if stopped by ``max_batches``
+        """
+        batches = deleted = 0
+        for purge_batch in (
+            self._purge_messages,
+            self._purge_segments,
+            self._purge_files,
+        ):
+            while True:
+                count = purge_batch(chat_id)
+                deleted += count
+                if count and progress is not None:
+                    progress(chat_id, deleted)
+                # A short batch was the last one.
+                if count < self.batch_size:
+                    break
+                batches += 1
+                if max_batches is not None and batches >= max_batches:
+                    return False
+
+        upload_service = UploadSessionService()
+        for session in UploadSession.objects.filter(chat_id=chat_id):
+            upload_service.discard(session)
+        with transaction.atomic():
+            # Anything added while the purge ran goes with the chat.
+            Chat.all_objects.filter(pk=chat_id, deleted_at__isnull=False).delete()
+        return True
+
+    def purge_deleted(
+        self, progress: Optional[Callable[[int, int], None]] = None
+    ) -> int:
+        """
+        Purge every tombstoned chat now, instead of in the job queue.
+
+        Returns:
+            Number of chats purged
+        """
+        purged = 0
+        for chat_id in Chat.all_objects.deleted().values_list("pk", flat=True):
+            self.purge(chat_id, progress=progress)
+            purged += 1
+        return purged
+
+    def _batch(self, queryset) -> list:
+        return list(queryset.order_by()[: self.batch_size])
+
+    def _purge_messages(self, chat_id: int) -> int:
+        with transaction.atomic():
+            pks = self._batch(
+                Message.objects.filter(chat_id=chat_id).values_list("pk", flat=True)
+            )
+            messages = Message.objects.filter(pk__in=pks)
+            messages._raw_delete(messages.db)
+        return len(pks)
+
+    def _purge_segments(self, chat_id: int) -> int:
+        with transaction.atomic():
+            pks = self._batch(
+                MessageSegment.objects.for_chat(chat_id).values_list("pk", flat=True)
+            )
+            segments = MessageSegment.objects.filter(pk__in=pks)
+            segments._raw_delete(segments.db)
+        return len(pks)
+
+    def _purge_files(self, chat_id: int) -> int:
+        with transaction.atomic():
+            rows = self._batch(
+                File.objects.filter(chat_id=chat_id).values_list(
+                    "pk", "blob_id", "file"
+                )
+            )
+            files = File.objects.filter(pk__in=[pk for pk, _, _ in rows])
+            files._raw_delete(files.db)
+            self.blob_service.release(blob_id for _, blob_id, _ in rows)
+            # Files stored before blobs own their content, unless another
+            # file row still names it.
+            legacy = {name for _, blob_id, name in rows if blob_id is None and name}
+            legacy -= set(
+                File.objects.filter(file__in=legacy).values_list("file", flat=True)
+            )
+            if legacy:
+                transaction.on_commit(lambda: self._delete_content(legacy))
+        return len(rows)
+
+    def _delete_content(self, names) -> None:
+        storage = File._meta.get_field("file").storage
+        for name in names:
+            storage.delete(name)
@@ -0,0 +1,263 @@
+import csv
+import heapq
+import io
+import json
+import operator
+import zlib
+from typing import AsyncIterator, Iterator, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from ..models.file import File
+from ..models.message import Message
+from ..serializers.message_serializer import MessageRowSerializer
+from .archive_service import ArchiveService
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+DEFAULT_CHUNK_SIZE = 2000
+
+# Encoded output is handed on in pieces of about this size, so neither a
+# chunk per row nor the whole export is ever sent at once.
+BUFFER_BYTES = 64 * 1024
+
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+CSV_COLUMNS = (
+    "type",
+    "id",
+    "user_id",
+    "username",
+    "email",
+    "created_at",
+    "updated_at",
+    "content",
+    "context_index",
+    "file_name",
+    "file_type",
+    "file_size",
+)
+
+# Spreadsheets evaluate cells starting with these as formulas.
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def export_config() -> dict:
+    """``CHATS_EXPORT`` with defaults filled in."""
+    config = getattr(settings, "CHATS_EXPORT", {})
+    return {"CHUNK_SIZE": config.get("CHUNK_SIZE", DEFAULT_CHUNK_SIZE)}
+
+
+def _csv_cell(value):
+    # A leading quote makes spreadsheets show the text instead of running it.
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+class ChatExportService:
+    """
+    Streams a chat's history as NDJSON or CSV in constant memory.
+
+    Archived messages, read ``chunk_size`` at a time from their segments, are
+    merged oldest first with hot ones read through ``QuerySet.iterator``,
+    followed, when asked for, by the metadata of the chat's files. Records
+    are encoded as they are read, and compressed on the fly when asked for:
+    however long the history, at most one chunk of rows per tier and one
+    output buffer are held at a time.
+
+    Messages have the representation of the message endpoints, and files
+    that of the file endpoints without the download URL, each with a
+    ``type`` of ``message`` or ``file``. CSV flattens both into
+    ``CSV_COLUMNS``, leaving the columns that do not apply empty, and quotes
+    text that a spreadsheet would take for a formula with a leading ``'``.
+
+    Args:
+        chunk_size: Rows read per query (optional)
+        archive: Service reading the cold tier (optional)
+    """
+
+    def __init__(
+        self, chunk_size: Optional[int] = None, archive: Optional[ArchiveService] = None
+    ):
+        self.chunk_size = chunk_size or export_config()["CHUNK_SIZE"]
+        self.archive = archive or ArchiveService()
+
+    def records(self, chat_id: int, include_files: bool = False) -> Iterator[dict]:
+        """
+        A chat's messages, oldest first, then optionally its files.
+
+        Args:
+            chat_id: ID of the chat
+            include_files: Also yield the metadata of the chat's files
+
+        Returns:
+            Iterator of representations
+        """
+        serializer = MessageRowSerializer()
+        for row in self.message_rows(chat_id):
+            yield {"type": "message", **serializer.to_representation(row)}
+        if not include_files:
+            return
+
+        files = (
+            File.objects.for_chat(chat_id)
+            .oldest()
+            .values(
+                "id",
+                "file_name",
+                "file_type",
+                "file_size",
+                "uploaded_at",
+                "uploaded_by_id",
+                "uploaded_by__username",
+                "uploaded_by__email",
+            )
+        )
+        for row in files.iterator(chunk_size=self.chunk_size):
+            yield {
+                "type": "file",
+                "id": row["id"],
+                "file_name": row["file_name"],
+                "file_type": row["file_type"],
+                "file_size": row["file_size"],
+                "uploaded_by": {
+                    "id": row["uploaded_by_id"],
+                    "username": row["uploaded_by__username"],
+                    "email": row["uploaded_by__email"],
+                },
+                "uploaded_at": serializer.format_datetime(row["uploaded_at"]),
+            }
+
+    def message_rows(self, chat_id: int) -> Iterator[dict]:
+        """``as_rows()`` rows of both tiers in ``(created_at, id)`` order."""
+        # Backdated hot messages may sort among archived ones: merge by key.
+        hot = Message.objects.for_chat(chat_id).as_rows().order_by("created_at", "id")
+        yield from heapq.merge(
+            self._archived_rows(chat_id),
+            hot.iterator(chunk_size=self.chunk_size),
+            key=operator.itemgetter("created_at", "id"),
+        )
+
+    def _archived_rows(self, chat_id: int) -> Iterator[dict]:
+        position = None
+        while True:
+            rows = self.archive.rows(chat_id, position, limit=self.chunk_size)
+            yield from rows
+            if len(rows) < self.chunk_size:
+                break
+            position = (rows[-1]["created_at"], rows[-1]["id"])
+
+    def export(
+        self,
+        chat_id: int,
+        output: str = "ndjson",
+        include_files: bool = False,
+        compress: bool = False,
+    ) -> Iterator[bytes]:
+        """
+        Encode a chat's records, for a streaming response or a file.
+
+        Nothing is read before the first chunk is asked for.
+
+        Args:
+            chat_id: ID of the chat
+            output: ``ndjson`` or ``csv``
+            include_files: Also export the metadata of the chat's files
+            compress: Gzip the output
+
+        Returns:
+            Iterator of byte chunks
+
+        Raises:
+            ValueError: Unknown output format
+        """
+        if output not in FORMATS:
+            raise ValueError(f"Unknown export format {output!r}")
+        encode = self._csv if output == "csv" else self._ndjson
+        chunks = encode(self.records(chat_id, include_files))
+        return self._gzip(chunks) if compress else chunks
+
+    async def aexport(self, *args, **kwargs) -> AsyncIterator[bytes]:
+        """
+        ``export`` for ASGI responses, pulling one chunk per thread hop.
+
+        Django serves a synchronous iterator under ASGI by reading all of it
+        first; this one streams. Takes the arguments of ``export``.
+        """
+        chunks = self.export(*args, **kwargs)
+        # Thread-sensitive: every chunk is read on the same connection.
+        pull = sync_to_async(next)
+        try:
+            while (chunk := await pull(chunks, None)) is not None:
+                yield chunk
+        finally:
+            # Releases the open cursor when the client goes away early.
+            await sync_to_async(chunks.close)()
+
+    @staticmethod
+    def content_type(output: str, compress: bool = False) -> str:
+        return "application/gzip" if compress else FORMATS[output]
+
+    @staticmethod
+    def filename(chat_id: int, output: str, compress: bool = False) -> str:
+        return f"chat-{chat_id}.{output}" + (".gz" if compress else "")
+
+    @staticmethod
+    def _ndjson(records) -> Iterator[bytes]:
+        buffer = bytearray()
+        for record in records:
+            if orjson is not None:
+                buffer += orjson.dumps(record)
+            else:
+                buffer += json.dumps(
+                    record, ensure_ascii=False, separators=(",", ":")
+                ).encode("utf-8")
+            buffer += b"\n"
+            if len(buffer) >= BUFFER_BYTES:
+                yield bytes(buffer)
+                buffer.clear()
+        if buffer:
+            yield bytes(buffer)
+
+    @staticmethod
+    def _csv(records) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(CSV_COLUMNS)
+        for record in records:
+            user = record.get("sender") or record.get("uploaded_by")
+            row = (
+                record["type"],
+                record["id"],
+                user["id"],
+                user["username"],
+                user["email"],
+                record.get("created_at") or record.get("uploaded_at"),
+                record.get("updated_at"),
+                record.get("content"),
+                record.get("context_index"),
+                record.get("file_name"),
+                record.get("file_type"),
+                record.get("file_size"),
+            )
+            writer.writerow([_csv_cell(value) for value in row])
+            if buffer.tell() >= BUFFER_BYTES:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+
+    @staticmethod
+    def _gzip(chunks) -> Iterator[bytes]:
+        # wbits=31 writes the gzip header and trailer around the stream.
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
@@ -0,0 +1,116 @@
+from typing import Iterable, Optional
+
+from django.db import models
+from ..models.chat import Chat
+from ..models.chat_inbox import ChatInbox
+from ..models.message import Message
+
+
+class InboxService:
+    """
+    Keeps ``ChatInbox`` rows in step with memberships and messages.
+
+    Every method issues a fixed number of statements however many users or
+    messages are involved, so it can run inside the write that triggered it.
+    """
+
+    def add_members(self, chat: Chat, user_ids: Iterable[int]) -> None:
+        """
+        Put a chat into the inboxes of the given users.
+
+        Users who already have the chat in their inbox are left untouched.
+
+        Args:
+            chat: Chat the users joined or created
+            user_ids: IDs of the users
+        """
+        user_ids = set(user_ids)
+        if not user_ids:
+            return
+        latest = (
+            Message.objects.filter(chat_id=chat.pk)
+            .order_by("-created_at", "-id")
+            .values("id", "created_at")
+            .first()
+        )
+        last_activity_at = latest["created_at"] if latest else chat.created_at
+        ChatInbox.objects.bulk_create(
+            [
+                ChatInbox(
+                    user_id=user_id,
+                    chat_id=chat.pk,
+                    last_activity_at=last_activity_at,
+                    last_message_id=latest["id"] if latest else None,
+                )
+                for user_id in user_ids
+            ],
+            ignore_conflicts=True,
+        )
+
+    def remove_members(
+        self, chat_id: int, user_ids: Optional[Iterable[int]] = None
+    ) -> None:
+        """
+        Take a chat out of the inboxes of users who left it.
+
+        The creator keeps the chat in their inbox, as they can still see it.
+
+        Args:
+            chat_id: ID of the chat
+            user_ids: IDs of the users who left; all participants if omitted
+        """
+        entries = ChatInbox.objects.filter(chat_id=chat_id).exclude(
+            user_id=models.Subquery(
+                Chat.objects.filter(pk=chat_id).values("created_by_id")
+            )
+        )
+        if user_ids is not None:
+            entries = entries.filter(user_id__in=list(user_ids))
+        entries.delete()
+
+    def leave_all(self, user_id: int) -> None:
+        """Remove every chat the user did not create from their inbox."""
+        ChatInbox.objects.filter(user_id=user_id).exclude(
+            chat__created_by_id=user_id
+        ).delete()
+
+    def record_message(self, chat_id: int, message_id: int, created_at) -> None:
+        """
+        Move a chat to the top of its members' inboxes after a new message.
+
+        Args:
+            chat_id: ID of the chat the message was posted in
+            message_id: ID of the newest message
+            created_at: Creation time of the newest message
+        """
+        ChatInbox.objects.filter(
+            chat_id=chat_id, last_activity_at__lte=created_at
+        ).update(last_activity_at=created_at, last_message_id=message_id)
+
+    def forget_messages(self, chat_id: int, message_id: Optional[int] = None) -> None:
+        """
+        Repoint inbox rows whose last message was deleted to the newest one left.
+
+        The chat keeps its place in the inbox: deleting messages is not
+        activity.
+
+        Args:
+            chat_id: ID of the chat messages were deleted from
+            message_id: ID of the deleted message; any deleted message if omitted
+        """
+        entries = ChatInbox.objects.filter(chat_id=chat_id)
+        if message_id is not None:
+            entries = entries.filter(last_message_id=message_id)
+        else:
+            entries = entries.exclude(last_message_id__isnull=True).exclude(
+                models.Exists(
+                    Message.objects.filter(pk=models.OuterRef("last_message_id"))
+                )
+            )
+        entries.update(
+            last_message_id=models.Subquery(
+                Message.objects.filter(chat_id=chat_id)
+                .order_by("-created_at", "-id")
+                .values("id")[:1]
+            )
+        )
@@ -0,0 +1,237 @@
+import os
+import random
+import socket
+import traceback
+import uuid
+from concurrent.futures import Executor
+from datetime import timedelta
+from typing import List, Optional
+
+import django
+from django.conf import settings
+from django.db import connections, models, transaction
+from django.utils import timezone
+from ..jobs import registry
+from ..models.job import Job
+
+DEFAULT_BATCH_SIZE = 10
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BACKOFF_SECONDS = 10
+DEFAULT_MAX_BACKOFF_SECONDS = 3600
+
+# Characters of a failed job's traceback kept in ``last_error``.
+ERROR_LENGTH = 4000
+
+
+def jobs_config() -> dict:
+    """``CHATS_JOBS`` with defaults filled in."""
+    config = getattr(settings, "CHATS_JOBS", {})
+    return {
+        "BATCH_SIZE": config.get("BATCH_SIZE", DEFAULT_BATCH_SIZE),
+        "LEASE_SECONDS": config.get("LEASE_SECONDS", DEFAULT_LEASE_SECONDS),
+        "MAX_ATTEMPTS": config.get("MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS),
+        "BACKOFF_SECONDS": config.get("BACKOFF_SECONDS", DEFAULT_BACKOFF_SECONDS),
+        "MAX_BACKOFF_SECONDS": config.get(
+            "MAX_BACKOFF_SECONDS", DEFAULT_MAX_BACKOFF_SECONDS
+        ),
+    }
+
+
+def run_job(name: str, payload: dict) -> None:
+    """Run the handler of a job."""
+    registry.get(name)(**payload)
+
+
+def run_pooled_job(name: str, payload: dict) -> None:
+    """``run_job`` in a pool thread or process, which outlives the job."""
+    try:
+        run_job(name, payload)
+    finally:
+        # Do not leave a broken or expired connection to the next job.
+        for connection in connections.all(initialized_only=True):
+            connection.close_if_unusable_or_obsolete()
+
+
+def setup_process():
+    # Forked processes share nothing with the parent's connections, which it
+    # closed before starting them; spawned ones start without Django.
+    django.setup()
+
+
+class JobService:
+    """
+    A job queue in the database, needing no broker.
+
+    ``enqueue`` adds a job in the caller's transaction. Workers ``claim``
+    due jobs in batches, leasing them for ``LEASE_SECONDS``: a claimed job
+    is invisible to other workers until the lease expires, after which it is
+    claimed again, so a job whose worker died is not lost. A job that raises
+    is retried after an exponential backoff until it has been attempted
+    ``max_attempts`` times, then kept as failed.
+
+    Args:
+        worker_id: Name of this worker in ``Job.locked_by``; unique by
+            default
+    """
+
+    def __init__(self, worker_id: Optional[str] = None):
+        self.worker_id = (
+            worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        )
+
+    @property
+    def config(self) -> dict:
+        return jobs_config()
+
+    def enqueue(
+        self,
+        name: str,
+        payload: Optional[dict] = None,
+        delay: float = 0,
+        max_attempts: Optional[int] = None,
+    ) -> Job:
+        """
+        Add a job, to run once the current transaction commits.
+
+        Args:
+            name: Registered job name
+            payload: JSON-serializable keyword arguments of the handler
+            delay: Seconds before the job may run
+            max_attempts: Runs before the job is given up (optional)
+
+        Returns:
+            The created job
+        """
+        registry.get(name)  # Fail in the request, not in the worker.
+        return Job.objects.create(
+            name=name,
+            payload=payload or {},
+            available_at=timezone.now() + timedelta(seconds=delay),
+            max_attempts=max_attempts or self.config["MAX_ATTEMPTS"],
+        )
+
+    def claim(self, limit: Optional[int] = None) -> List[Job]:
+        """
+        Lease up to ``limit`` due jobs to this worker.
+
+        Jobs whose lease expired after their last attempt are marked failed
+        instead: their handler keeps killing or stalling its worker.
+
+        Returns:
+            The claimed jobs, oldest first
+        """
+        config = self.config
+        now = timezone.now()
+        lease_until = now + timedelta(seconds=config["LEASE_SECONDS"])
+        with transaction.atomic():
+            Job.objects.claimable(now).filter(
+                status=Job.RUNNING, attempts__gte=models.F("max_attempts")
+            ).update(
+                status=Job.FAILED,
+                locked_by="",
+                last_error="Lease expired on the last attempt",
+                updated_at=now,
+            )
+            ids = list(
+                Job.objects.claimable(now)
+                .select_for_update(skip_locked=True)
+                .values_list("pk", flat=True)[: limit or config["BATCH_SIZE"]]
+            )
+            # Repeats the claimable filter: without row locks (SQLite) two
+            # workers may have read the same ids, and only one update wins.
+            Job.objects.claimable(now).filter(pk__in=ids).update(
+                status=Job.RUNNING,
+                available_at=lease_until,
+                locked_by=self.worker_id,
+                attempts=models.F("attempts") + 1,
+                updated_at=now,
+            )
+        return list(
+            Job.objects.filter(
+                pk__in=ids, locked_by=self.worker_id, available_at=lease_until
+            ).order_by("created_at")
+        )
+
+    def complete(self, job: Job) -> None:
+        """Delete a job that ran successfully, unless its lease was lost."""
+        self._leased(job).delete()
+
+    def fail(self, job: Job, error: str) -> None:
+        """
+        Schedule a job that raised for another attempt, or give it up.
+
+        Args:
+            job: Job claimed by this worker
+            error: Description of the failure
+        """
+        now = timezone.now()
+        if job.attempts >= job.max_attempts:
+            changes = {"status": Job.FAILED}
+        else:
+            changes = {
+                "status": Job.PENDING,
+                "available_at": now + timedelta(seconds=self.backoff(job.attempts)),
+            }
+        self._leased(job).update(
+            locked_by="", last_error=error[-ERROR_LENGTH:], updated_at=now, **changes
+        )
+
+    def backoff(self, attempts: int) -> float:
+        """Seconds before the next attempt: exponential, capped and jittered."""
+        config = self.config
+        delay = min(
+            config["BACKOFF_SECONDS"] * 2 ** (attempts - 1),
+            config["MAX_BACKOFF_SECONDS"],
+        )
+        return delay * random.uniform(0.75, 1.25)
+
+    def retry_failed(self) -> int:
+        """
+        Give every failed job a fresh set of attempts.
+
+        Returns:
+            Number of jobs requeued
+        """
+        return Job.objects.failed().update(
+            status=Job.PENDING,
+            attempts=0,
+            available_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+
+    def run_batch(self, executor: Optional[Executor] = None) -> int:
+        """
+        Claim a batch of jobs and run it, in ``executor`` when given.
+
+        The whole batch must finish within ``LEASE_SECONDS``, or its jobs
+        may run twice.
+
+        Returns:
+            Number of jobs claimed; 0 when none were due
+        """
+        jobs = self.claim()
+        if executor is None:
+            errors = [self._error(run_job, job.name, job.payload) for job in jobs]
+        else:
+            futures = [
+                executor.submit(run_pooled_job, job.name, job.payload) for job in jobs
+            ]
+            errors = [self._error(future.result) for future in futures]
+        for job, error in zip(jobs, errors):
+            if error is None:
+                self.complete(job)
+            else:
+                self.fail(job, error)
+        return len(jobs)
+
+    @staticmethod
+    def _error(call, *args) -> Optional[str]:
+        try:
+            call(*args)
+        except Exception as e:
+            return "".join(traceback.format_exception(e))
+        return None
+
+    def _leased(self, job: Job):
+        return Job.objects.filter(pk=job.pk, locked_by=self.worker_id)
@@ -0,0 +1,119 @@
+from typing import FrozenSet, Optional
+
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from ..cache import get_membership_cache
+from ..models.chat import Chat
+from ..routing import use_primary
+
+
+class MembershipService:
+    """
+    Answers "is this user a participant of this chat" from a per-user cache.
+
+    The cache holds, per user, the set of ids of the chats they participate
+    in, loaded with one indexed query on the participants table. Signals
+    invalidate a user's entry whenever their memberships change or one of
+    their chats is deleted, so views can authorize with a cache lookup and
+    then query messages and files by ``chat_id`` alone, without joining
+    the participants table.
+    """
+
+    def __init__(self, cache=None):
+        self._cache = cache
+
+    @property
+    def cache(self):
+        return self._cache if self._cache is not None else get_membership_cache()
+
+    def chat_ids(self, user_id: int) -> FrozenSet[int]:
+        """
+        Return the ids of the chats a user participates in.
+
+        Args:
+            user_id: ID of the user
+
+        Returns:
+            Frozen set of chat ids
+        """
+        cache = self.cache
+        if cache is None:
+            return self._load(user_id)
+        version = cache.version(user_id)
+        chat_ids = cache.get(user_id, version)
+        if chat_ids is None:
+            chat_ids = self._load(user_id)
+            cache.set(user_id, chat_ids, version)
+        return chat_ids
+
+    async def achat_ids(self, user_id: int) -> FrozenSet[int]:
+        """``chat_ids`` for async views."""
+        return await sync_to_async(self.chat_ids)(user_id)
+
+    def is_member(self, user, chat_id) -> bool:
+        """
+        Check whether a user participates in a chat.
+
+        Args:
+            user: User to check; anonymous users are never members
+            chat_id: ID of the chat, as an int or a URL string
+
+        Returns:
+            True if the user is a participant
+        """
+        if not user.is_authenticated:
+            return False
+        try:
+            chat_id = int(chat_id)
+        except (TypeError, ValueError):
+            return False
+        return chat_id in self.chat_ids(user.pk)
+
+    async def ais_member(self, user, chat_id) -> bool:
+        """``is_member`` for async views."""
+        if not user.is_authenticated:
+            return False
+        try:
+            chat_id = int(chat_id)
+        except (TypeError, ValueError):
+            return False
+        return chat_id in await self.achat_ids(user.pk)
+
+    def require_membership(self, user, chat_id) -> int:
+        """
+        Check membership like ``is_member``, raising ``Http404`` if it fails.
+
+        Returns:
+            The chat id as an int
+        """
+        if not self.is_member(user, chat_id):
+            raise Http404("No Chat matches the given query.")
+        return int(chat_id)
+
+    async def arequire_membership(self, user, chat_id) -> int:
+        """``require_membership`` for async views."""
+        if not await self.ais_member(user, chat_id):
+            raise Http404("No Chat matches the given query.")
+        return int(chat_id)
+
+    def invalidate(self, *user_ids: int) -> None:
+        """Drop the cached chat ids of the given users."""
+        cache = self.cache
+        if cache is not None:
+            for user_id in user_ids:
+                cache.invalidate(user_id)
+
+    def cache_stats(self) -> Optional[dict]:
+        """Hit/miss counters of the membership cache, or None when disabled."""
+        cache = self.cache
+        return cache.stats() if cache is not None else None
+
+    @staticmethod
+    def _load(user_id: int) -> FrozenSet[int]:
+        # Authorization and cached values must not lag behind the primary.
+        with use_primary():
+            return frozenset(
+                Chat.participants.through.objects.filter(user_id=user_id).values_list(
+                    "chat_id", flat=True
+                )
+            )
@@ -0,0 +1,406 @@
+import re
+from contextlib import contextmanager
+from html import escape
+from typing import List, Optional, Sequence, Tuple
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.db.models import FloatField, Q, QuerySet, Value
+from django.db.models.expressions import RawSQL
+from django.utils.text import Truncator
+from ..models.chat import Chat
+from ..models.message import Message
+
+User = get_user_model()
+
+MESSAGE_INDEX = "chats_message_fts"
+CHAT_INDEX = "chats_chat_fts"
+
+# BM25 scores are negative: the lower, the more relevant. Title matches weigh
+# twice as much as prompt matches.
+MESSAGE_RANK = f"bm25({MESSAGE_INDEX})"
+CHAT_RANK = f"bm25({CHAT_INDEX}, 2.0, 1.0)"
+
+# External-content FTS5 tables: the index stores only tokens and reads the
+# text back from the base tables, so it adds no second copy of the history.
+INDEX_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {MESSAGE_INDEX} USING fts5(
+        content, content='chats_message', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {CHAT_INDEX} USING fts5(
+        title, prompt, content='chats_chat', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+]
+
+TRIGGERS = {
+    "chats_message_fts_insert": f"""
+        AFTER INSERT ON chats_message BEGIN
+            INSERT INTO {MESSAGE_INDEX}(rowid, content) VALUES (new.id, new.content);
+        END
+    """,
+    "chats_message_fts_delete": f"""
+        AFTER DELETE ON chats_message BEGIN
+            INSERT INTO {MESSAGE_INDEX}({MESSAGE_INDEX}, rowid, content)
+            VALUES ('delete', old.id, old.content);
+        END
+    """,
+    "chats_message_fts_update": f"""
+        AFTER UPDATE OF content ON chats_message BEGIN
+            INSERT INTO {MESSAGE_INDEX}({MESSAGE_INDEX}, rowid, content)
+            VALUES ('delete', old.id, old.content);
+            INSERT INTO {MESSAGE_INDEX}(rowid, content) VALUES (new.id, new.content);
+        END
+    """,
+    "chats_chat_fts_insert": f"""
+        AFTER INSERT ON chats_chat BEGIN
+            INSERT INTO {CHAT_INDEX}(rowid, title, prompt)
+            VALUES (new.id, new.title, new.prompt);
+        END
+    """,
+    "chats_chat_fts_delete": f"""
+        AFTER DELETE ON chats_chat BEGIN
+            INSERT INTO {CHAT_INDEX}({CHAT_INDEX}, rowid, title, prompt)
+            VALUES ('delete', old.id, old.title, old.prompt);
+        END
+    """,
+    "chats_chat_fts_update": f"""
+        AFTER UPDATE OF title, prompt ON chats_chat BEGIN
+            INSERT INTO {CHAT_INDEX}({CHAT_INDEX}, rowid, title, prompt)
+            VALUES ('delete', old.id, old.title, old.prompt);
+            INSERT INTO {CHAT_INDEX}(rowid, title, prompt)
+            VALUES (new.id, new.title, new.prompt);
+        END
+    """,
+}
+
+# Private-use characters marking matches inside snippets until they are
+# HTML-escaped and turned into <mark> tags.
+_MARK_START, _MARK_END = "\ue000", "\ue001"
+
+SNIPPET_TOKENS = 16
+
+
+def supports_fulltext(connection) -> bool:
+    return connection.vendor == "sqlite"
+
+
+def install_fulltext_index(connection) -> bool:
+    """
+    Create the FTS5 tables and the triggers keeping them in sync.
+
+    Safe to call repeatedly. SQLite drops a table's triggers whenever Django
+    rebuilds the table during a migration, so this runs after every
+    ``migrate``; if any trigger had to be recreated, writes may have been
+    missed and the indexes are rebuilt from the base tables.
+
+    Args:
+        connection: Database connection to install the index on
+
+    Returns:
+        True if the indexes were (re)built
+    """
+    if not supports_fulltext(connection):
+        return False
+
+    with connection.cursor() as cursor:
+        for statement in INDEX_DDL:
+            cursor.execute(statement)
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name IN (%s)"
+            % ", ".join(["%s"] * len(TRIGGERS)),
+            list(TRIGGERS),
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        missing = [name for name in TRIGGERS if name not in existing]
+        for name in missing:
+            cursor.execute(f"CREATE TRIGGER {name} {TRIGGERS[name]}")
+        if missing:
+            for index in (MESSAGE_INDEX, CHAT_INDEX):
+                cursor.execute(f"INSERT INTO {index}({index}) VALUES ('rebuild')")
+    return bool(missing)
+
+
+def drop_fulltext_index(connection) -> None:
+    """Remove the FTS5 tables and their triggers."""
+    if not supports_fulltext(connection):
+        return
+
+    with connection.cursor() as cursor:
+        for name in TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        for index in (MESSAGE_INDEX, CHAT_INDEX):
+            cursor.execute(f"DROP TABLE IF EXISTS {index}")
+
+
+@contextmanager
+def deferred_fulltext_index(connection):
+    """
+    Stop indexing writes for the duration of a bulk load, then rebuild.
+
+    Rebuilding the index once from the base tables is much faster than
+    indexing millions of rows one trigger call at a time.
+
+    Args:
+        connection: Database connection the load runs on
+    """
+    if not supports_fulltext(connection):
+        yield
+        return
+
+    with connection.cursor() as cursor:
+        for name in TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+    try:
+        yield
+    finally:
+        install_fulltext_index(connection)
+
+
+def build_match_query(text: str, columns: Sequence[str] = ()) -> Optional[str]:
+    """
+    Turn free text into an FTS5 query matching all of its words.
+
+    Every word is quoted, so operators and punctuation typed by users are
+    searched for literally instead of being parsed as query syntax.
+
+    Args:
+        text: Search text as typed by the user
+        columns: Restrict the match to these indexed columns (optional)
+
+    Returns:
+        FTS5 MATCH expression, or None if the text has no searchable words
+    """
+    terms = re.findall(r"\w+", text)
+    if not terms:
+        return None
+    query = " ".join(f'"{term}"' for term in terms)
+    if columns:
+        query = f"{{{' '.join(columns)}}} : ({query})"
+    return query
+
+
+def render_snippet(snippet: str) -> str:
+    """HTML-escape a raw snippet and wrap its matches in ``<mark>`` tags."""
+    return escape(snippet).replace(_MARK_START, "<mark>").replace(_MARK_END, "</mark>")
+
+
+class SearchService:
+    """
+    Ranked full-text search over message content and chat titles/prompts.
+
+    On SQLite, queries go through FTS5 indexes maintained by triggers, are
+    ranked with BM25 (most relevant first, ties broken by id) and return
+    highlighted snippets. Other databases fall back to unranked ``icontains``
+    lookups ordered by id, so the API keeps working without the index.
+
+    Matching is by whole words (with diacritics folded): every word of the
+    text must appear as a word, so ``cat`` no longer finds ``concatenate`` as
+    the ``icontains`` lookups did. ``search_messages`` and ``search_chats``
+    only cover chats the user participates in; the ``filter_*`` methods
+    narrow whatever queryset they are given.
+
+    Results are paged by keyset: ``after`` is the ``(rank, id)`` of the last
+    row of the previous page. BM25 depends on statistics of the whole index,
+    so every write shifts all scores a little and the rank a cursor carries
+    goes stale. A page therefore starts from the current score of that row,
+    computed in the same statement; the carried rank is only used once the
+    row no longer matches.
+    """
+
+    def __init__(self, using: str = "default"):
+        self.using = using
+
+    @property
+    def connection(self):
+        return connections[self.using]
+
+    @property
+    def is_available(self) -> bool:
+        return supports_fulltext(self.connection)
+
+    def search_messages(
+        self,
+        user: User,
+        text: str,
+        chat_id: Optional[int] = None,
+        after: Optional[Tuple[float, int]] = None,
+        limit: int = 20,
+    ) -> List[Message]:
+        """
+        Search messages of the chats the user participates in.
+
+        Args:
+            user: User searching; only their chats are searched
+            text: Search text
+            chat_id: Restrict the search to one chat (optional)
+            after: ``(rank, id)`` of the last result already seen (optional)
+            limit: Maximum number of results
+
+        Returns:
+            Messages carrying extra ``rank`` and ``snippet`` attributes
+        """
+        match = build_match_query(text)
+        if match is None:
+            return []
+        if not self.is_available:
+            queryset = Message.objects.filter(
+                chat__participants=user, content__icontains=text
+            )
+            if chat_id is not None:
+                queryset = queryset.filter(chat_id=chat_id)
+            return self._fallback(queryset, after, limit, lambda m: m.content)
+
+        sql = [
+            f"""
+            SELECT m.id, m.chat_id, m.sender_id, m.context_index, m.created_at,
+                   snippet({MESSAGE_INDEX}, 0, %s, %s, '…', %s) AS snippet,
+                   {MESSAGE_RANK} AS rank
+            FROM {MESSAGE_INDEX}
+            JOIN chats_message m ON m.id = {MESSAGE_INDEX}.rowid
+            WHERE {MESSAGE_INDEX} MATCH %s
+              AND m.chat_id IN (
+                  SELECT chat_id FROM chats_chat_participants WHERE user_id = %s
+              )
+            """
+        ]
+        params = [_MARK_START, _MARK_END, SNIPPET_TOKENS, match, user.pk]
+        if chat_id is not None:
+            sql.append("AND m.chat_id = %s")
+            params.append(chat_id)
+        return self._ranked(
+            Message,
+            sql,
+            params,
+            MESSAGE_INDEX,
+            match,
+            MESSAGE_RANK,
+            "m.id",
+            after,
+            limit,
+        )
+
+    def search_chats(
+        self,
+        user: User,
+        text: str,
+        after: Optional[Tuple[float, int]] = None,
+        limit: int = 20,
+    ) -> List[Chat]:
+        """
+        Search titles and prompts of the chats the user participates in.
+
+        Title matches rank above prompt matches.
+
+        Args:
+            user: User searching; only their chats are searched
+            text: Search text
+            after: ``(rank, id)`` of the last result already seen (optional)
+            limit: Maximum number of results
+
+        Returns:
+            Chats carrying extra ``rank`` and ``snippet`` attributes
+        """
+        match = build_match_query(text)
+        if match is None:
+            return []
+        if not self.is_available:
+            queryset = Chat.objects.filter(participants=user).filter(
+                Q(title__icontains=text) | Q(prompt__icontains=text)
+            )
+            return self._fallback(queryset, after, limit, lambda c: c.title)
+
+        sql = [
+            f"""
+            SELECT c.id, c.title, c.is_active, c.created_at, c.updated_at,
+                   snippet({CHAT_INDEX}, -1, %s, %s, '…', %s) AS snippet,
+                   {CHAT_RANK} AS rank
+            FROM {CHAT_INDEX}
+            JOIN chats_chat c ON c.id = {CHAT_INDEX}.rowid
+            WHERE {CHAT_INDEX} MATCH %s
+              AND c.id IN (
+                  SELECT chat_id FROM chats_chat_participants WHERE user_id = %s
+              )
+            """
+        ]
+        params = [_MARK_START, _MARK_END, SNIPPET_TOKENS, match, user.pk]
+        return self._ranked(
+            Chat, sql, params, CHAT_INDEX, match, CHAT_RANK, "c.id", after, limit
+        )
+
+    def filter_messages(self, queryset: QuerySet, text: str) -> QuerySet:
+        """
+        Narrow a message queryset to messages whose content matches the text.
+
+        Args:
+            queryset: Messages to filter
+            text: Search text
+
+        Returns:
+            Filtered queryset
+        """
+        return self._filter(queryset, MESSAGE_INDEX, text, (), "content")
+
+    def filter_chats(
+        self, queryset: QuerySet, text: str, columns: Sequence[str] = ("title",)
+    ) -> QuerySet:
+        """
+        Narrow a chat queryset to chats whose given columns match the text.
+
+        Args:
+            queryset: Chats to filter
+            text: Search text
+            columns: Indexed columns to search, ``title`` and/or ``prompt``
+
+        Returns:
+            Filtered queryset
+        """
+        return self._filter(queryset, CHAT_INDEX, text, columns, *columns)
+
+    def _filter(self, queryset, index, text, columns, *fallback_fields):
+        if not self.is_available:
+            condition = Q()
+            for field in fallback_fields:
+                condition |= Q(**{f"{field}__icontains": text})
+            return queryset.filter(condition)
+
+        match = build_match_query(text, columns)
+        if match is None:
+            return queryset.none()
+        return queryset.filter(
+            id__in=RawSQL(f"SELECT rowid FROM {index} WHERE {index} MATCH %s", [match])
+        )
+
+    def _ranked(self, model, sql, params, index, match, rank, id_column, after, limit):
+        if after is not None:
+            boundary = f"""COALESCE(
+                (SELECT {rank} FROM {index} WHERE {index} MATCH %s AND rowid = %s),
+                %s
+            )"""
+            sql.append(
+                f"AND ({rank} > {boundary} OR ({rank} = {boundary} AND {id_column} > %s))"
+            )
+            boundary_params = [match, after[1], after[0]]
+            params.extend([*boundary_params, *boundary_params, after[1]])
+        sql.append(f"ORDER BY rank, {id_column} LIMIT %s")
+        params.append(limit)
+
+        results = list(model.objects.using(self.using).raw("\n".join(sql), params))
+        for result in results:
+            result.snippet = render_snippet(result.snippet)
+        return results
+
+    @staticmethod
+    def _fallback(queryset, after, limit, text_of) -> list:
+        queryset = queryset.annotate(rank=Value(0.0, output_field=FloatField()))
+        if after is not None:
+            queryset = queryset.filter(id__gt=after[1])
+        results = list(queryset.order_by("id")[:limit])
+        for result in results:
+            result.snippet = escape(Truncator(text_of(result)).words(SNIPPET_TOKENS))
+        return results
@@ -0,0 +1,263 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+from typing import List
+
+from django.conf import settings
+from django.core.files import File as DjangoFile
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import File, UploadSession
+from .job_service import JobService
+
+COPY_BUFFER_SIZE = 64 * 1024
+
+
+class UploadSessionError(Exception):
+    """Raised when a chunk or a completion request does not fit the session."""
+
+
+class AssembledUpload(DjangoFile):
+    """
+    An assembled upload sitting in a temporary file.
+
+    Exposing ``temporary_file_path`` lets ``FileSystemStorage`` move the file
+    into place instead of copying it again. ``sha256`` is the digest taken
+    while assembling, so storing it as a blob does not read it again.
+    """
+
+    def __init__(self, path: Path, name: str, content_type: str, sha256=None):
+        super().__init__(open(path, "rb"), name=name)
+        self.path = path
+        self.content_type = content_type
+        self.sha256 = sha256
+
+    def temporary_file_path(self):
+        return str(self.path)
+
+
+class UploadSessionService:
+    """
+    Stores chunks of resumable uploads and turns complete sessions into files.
+
+    Each chunk is written to ``<root>/<session id>/<index>.part`` through a
+    temporary file and an atomic rename, so re-sending a chunk is idempotent
+    and chunks may arrive in any order or in parallel.
+    """
+
+    def __init__(self, root=None):
+        self._root = root
+        self.job_service = JobService()
+
+    @property
+    def root(self) -> Path:
+        return Path(
+            self._root
+            or getattr(
+                settings,
+                "CHATS_UPLOAD_SESSIONS_DIR",
+                Path(settings.MEDIA_ROOT) / "upload_sessions",
+            )
+        )
+
+    def session_dir(self, session: UploadSession) -> Path:
+        return self.root / str(session.id)
+
+    def chunk_path(self, session: UploadSession, index: int) -> Path:
+        return self.session_dir(session) / f"{index:08d}.part"
+
+    def write_chunk(
+        self, session: UploadSession, index: int, stream, length: int
+    ) -> int:
+        """
+        Store one chunk of an upload.
+
+        Args:
+            session: Upload session the chunk belongs to
+            index: Zero-based chunk number
+            stream: File-like object to read the chunk body from
+            length: Declared body length in bytes
+
+        Returns:
+            Number of bytes stored
+        """
+        if not 0 <= index < session.total_chunks:
+            raise UploadSessionError(
+                f"Chunk index must be between 0 and {session.total_chunks - 1}"
+            )
+        expected = session.expected_chunk_size(index)
+        if length != expected:
+            raise UploadSessionError(
+                f"Chunk {index} must be {expected} bytes, got {length}"
+            )
+
+        directory = self.session_dir(session)
+        directory.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            written = 0
+            with os.fdopen(fd, "wb") as handle:
+                while written < length:
+                    data = stream.read(min(COPY_BUFFER_SIZE, length - written))
+                    if not data:
+                        break
+                    handle.write(data)
+                    written += len(data)
+            if written != expected:
+                raise UploadSessionError(
+                    f"Chunk {index} ended after {written} of {expected} bytes"
+                )
+            os.replace(temp_path, self.chunk_path(session, index))
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        UploadSession.objects.filter(pk=session.pk).update(updated_at=timezone.now())
+        return written
+
+    def received_chunks(self, session: UploadSession) -> List[int]:
+        """
+        List the chunk numbers stored so far.
+
+        Args:
+            session: Upload session to inspect
+
+        Returns:
+            Sorted chunk indexes
+        """
+        directory = self.session_dir(session)
+        if not directory.is_dir():
+            return []
+        return sorted(
+            int(entry.name.removesuffix(".part"))
+            for entry in os.scandir(directory)
+            if entry.name.endswith(".part")
+        )
+
+    def missing_chunks(self, session: UploadSession, limit: int) -> List[int]:
+        """
+        The first chunk indexes not received yet.
+
+        Walks the gaps between received indexes, so the cost follows the
+        chunks on disk rather than the number the session expects.
+
+        Args:
+            session: Upload session
+            limit: Most indexes to return
+
+        Returns:
+            Sorted chunk indexes
+        """
+        missing, expected = [], 0
+        for index in [*self.received_chunks(session), session.total_chunks]:
+            missing.extend(range(expected, min(index, expected + limit - len(missing))))
+            if len(missing) >= limit:
+                break
+            expected = max(expected, index + 1)
+        return missing
+
+    def complete(self, session: UploadSession) -> File:
+        """
+        Assemble all chunks into a chat file and close the session.
+
+        Chunks are concatenated and hashed through a fixed-size copy buffer,
+        and the result is moved into storage unless a blob holds the same
+        content already, so the file is never held in memory.
+
+        Args:
+            session: Upload session to complete
+
+        Returns:
+            The created File instance
+        """
+        missing = self.missing_chunks(session, limit=20)
+        if missing:
+            raise UploadSessionError(f"Missing chunks: {missing}")
+
+        directory = self.session_dir(session)
+        try:
+            # A file of its own: a concurrent complete of the same session
+            # assembles next to it instead of over it.
+            with tempfile.NamedTemporaryFile(
+                dir=directory, suffix=".assembled", delete=False
+            ) as assembled:
+                assembled_path = Path(assembled.name)
+                sha256 = self._assemble(session, assembled)
+            upload = AssembledUpload(
+                assembled_path, session.file_name, session.content_type, sha256=sha256
+            )
+        except FileNotFoundError:
+            # Removed with the session by a complete that finished first.
+            raise UploadSessionError("Upload is already complete")
+
+        try:
+            with transaction.atomic():
+                # Deleting the row first claims the session: of two concurrent
+                # completes, the second finds it gone and creates no file.
+                if not UploadSession.objects.filter(pk=session.pk).delete()[0]:
+                    raise UploadSessionError("Upload is already complete")
+                file_obj = File.objects.create(
+                    chat=session.chat, uploaded_by=session.created_by, file=upload
+                )
+                self.job_service.enqueue("chats.inspect_file", {"file_id": file_obj.pk})
+        finally:
+            upload.close()
+            # Moved into storage unless a blob had the content already.
+            assembled_path.unlink(missing_ok=True)
+
+        shutil.rmtree(directory, ignore_errors=True)
+        return file_obj
+
+    def _assemble(self, session: UploadSession, assembled) -> str:
+        sha256 = hashlib.sha256()
+        for index in range(session.total_chunks):
+            with open(self.chunk_path(session, index), "rb") as chunk:
+                while data := chunk.read(COPY_BUFFER_SIZE):
+                    sha256.update(data)
+                    assembled.write(data)
+        return sha256.hexdigest()
+
+    def discard(self, session: UploadSession) -> None:
+        """
+        Abort an upload and remove its chunks.
+
+        Args:
+            session: Upload session to discard
+        """
+        shutil.rmtree(self.session_dir(session), ignore_errors=True)
+        session.delete()
+
+    def cleanup_stale(self, max_age: timedelta) -> int:
+        """
+        Discard sessions that have not received a chunk for ``max_age``.
+
+        Chunk directories left behind without a session row are removed too.
+
+        Args:
+            max_age: Idle time after which a session is considered abandoned
+
+        Returns:
+            Number of sessions discarded
+        """
+        cutoff = timezone.now() - max_age
+        discarded = 0
+        for session in UploadSession.objects.stale(cutoff).iterator():
+            self.discard(session)
+            discarded += 1
+
+        if self.root.is_dir():
+            live = {
+                str(pk) for pk in UploadSession.objects.values_list("pk", flat=True)
+            }
+            for entry in os.scandir(self.root):
+                if (
+                    entry.is_dir()
+                    and entry.name not in live
+                    and entry.stat().st_mtime < cutoff.timestamp()
+                ):
+                    shutil.rmtree(entry.path, ignore_errors=True)
+        return discarded
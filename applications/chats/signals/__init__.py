@@ -0,0 +1,21 @@
+from . import (
+    blob_signals,
+    cache_signals,
+    counter_signals,
+    inbox_signals,
+    membership_signals,
+    realtime_signals,
+    search_signals,
+    user_signals,
+)
+
+__all__ = [
+    "blob_signals",
+    "cache_signals",
+    "counter_signals",
+    "inbox_signals",
+    "membership_signals",
+    "realtime_signals",
+    "search_signals",
+    "user_signals",
+]
@@ -0,0 +1,44 @@
+from django.db.models.signals import post_delete, pre_delete, pre_save
+from django.dispatch import receiver
+from ..models import Chat, File
+from ..services.blob_service import BlobService
+
+blob_service = BlobService()
+
+
+def _deleting_chat(origin) -> bool:
+    # Released for all of the chat's files at once; see release_chat_blobs.
+    return getattr(origin, "model", type(origin)) is Chat
+
+
+@receiver(pre_save, sender=File, dispatch_uid="chats_blob_link_upload")
+def link_upload_to_blob(sender, instance, raw=False, **kwargs):
+    if raw or not instance.file or instance.file._committed:
+        return
+    previous = None
+    if not instance._state.adding:
+        previous = (
+            File.objects.filter(pk=instance.pk)
+            .values_list("blob_id", flat=True)
+            .first()
+        )
+    blob = blob_service.store(instance.file.file)
+    # Committed already, so the field does not write the upload again.
+    instance.file = blob.file.name
+    instance.blob = blob
+    blob_service.release([previous])
+
+
+@receiver(post_delete, sender=File, dispatch_uid="chats_blob_file_deleted")
+def release_file_blob(sender, instance, origin=None, **kwargs):
+    if not _deleting_chat(origin):
+        blob_service.release([instance.blob_id])
+
+
+@receiver(pre_delete, sender=Chat, dispatch_uid="chats_blob_chat_deleted")
+def release_chat_blobs(sender, instance, **kwargs):
+    blob_service.release(
+        File.objects.filter(chat=instance, blob__isnull=False)
+        .order_by()
+        .values_list("blob_id", flat=True)
+    )
@@ -0,0 +1,39 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from ..cache import get_chat_cache
+from ..models import Chat
+
+
+def _invalidate(*chat_ids):
+    cache = get_chat_cache()
+    if cache is not None:
+        for chat_id in chat_ids:
+            cache.invalidate(chat_id)
+
+
+@receiver(post_save, sender=Chat, dispatch_uid="chats_cache_chat_saved")
+def invalidate_saved_chat(sender, instance, created, **kwargs):
+    if not created:
+        _invalidate(instance.pk)
+
+
+@receiver(post_delete, sender=Chat, dispatch_uid="chats_cache_chat_deleted")
+def invalidate_deleted_chat(sender, instance, **kwargs):
+    _invalidate(instance.pk)
+
+
+@receiver(
+    m2m_changed,
+    sender=Chat.participants.through,
+    dispatch_uid="chats_cache_participants_changed",
+)
+def invalidate_chat_participants(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == "pre_clear":
+        # user.participants_chats.clear(): collect the chats while the
+        # relation still lists them.
+        _invalidate(*instance.participants_chats.values_list("pk", flat=True))
+    elif action in ("post_add", "post_remove", "post_clear"):
+        if not reverse:
+            _invalidate(instance.pk)
+        elif pk_set:
+            _invalidate(*pk_set)
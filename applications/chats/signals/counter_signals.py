@@ -0,0 +1,37 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from ..models import Chat, File, Message
+from ..services.chat_counter_service import ChatCounterService
+
+counter_service = ChatCounterService()
+
+
+def _deleting_chat(origin) -> bool:
+    # The chat row goes away with its messages and files; nothing to count.
+    return getattr(origin, "model", type(origin)) is Chat
+
+
+@receiver(post_save, sender=Message, dispatch_uid="chats_count_message_created")
+def count_message_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counter_service.messages_added(
+            instance.chat_id, 1, instance.pk, instance.created_at
+        )
+
+
+@receiver(post_delete, sender=Message, dispatch_uid="chats_count_message_deleted")
+def count_message_deleted(sender, instance, origin=None, **kwargs):
+    if not _deleting_chat(origin):
+        counter_service.messages_removed(instance.chat_id, 1, instance.pk)
+
+
+@receiver(post_save, sender=File, dispatch_uid="chats_count_file_created")
+def count_file_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counter_service.files_changed(instance.chat_id, 1, instance.file_size)
+
+
+@receiver(post_delete, sender=File, dispatch_uid="chats_count_file_deleted")
+def count_file_deleted(sender, instance, origin=None, **kwargs):
+    if not _deleting_chat(origin):
+        counter_service.files_changed(instance.chat_id, -1, -instance.file_size)
@@ -0,0 +1,51 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from ..models import Chat, Message
+from ..services.inbox_service import InboxService
+
+inbox_service = InboxService()
+
+
+@receiver(post_save, sender=Chat, dispatch_uid="chats_inbox_chat_created")
+def add_chat_to_creator_inbox(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        inbox_service.add_members(instance, [instance.created_by_id])
+
+
+@receiver(
+    m2m_changed, sender=Chat.participants.through, dispatch_uid="chats_inbox_members"
+)
+def sync_inbox_members(sender, instance, action, reverse, pk_set, **kwargs):
+    # ``instance`` is the chat, or the user when the change was made from the
+    # user's side (``user.participants_chats.add(...)``).
+    if action == "post_add":
+        if reverse:
+            for chat in Chat.objects.filter(pk__in=pk_set):
+                inbox_service.add_members(chat, [instance.pk])
+        else:
+            inbox_service.add_members(instance, pk_set)
+    elif action == "post_remove":
+        if reverse:
+            for chat_id in pk_set:
+                inbox_service.remove_members(chat_id, [instance.pk])
+        else:
+            inbox_service.remove_members(instance.pk, pk_set)
+    elif action == "post_clear":
+        if reverse:
+            inbox_service.leave_all(instance.pk)
+        else:
+            inbox_service.remove_members(instance.pk)
+
+
+@receiver(post_save, sender=Message, dispatch_uid="chats_inbox_message_created")
+def record_message_in_inbox(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        inbox_service.record_message(instance.chat_id, instance.pk, instance.created_at)
+
+
+@receiver(post_delete, sender=Message, dispatch_uid="chats_inbox_message_deleted")
+def forget_message_in_inbox(sender, instance, origin=None, **kwargs):
+    # When a whole chat is deleted its inbox rows go with it.
+    if getattr(origin, "model", type(origin)) is Chat:
+        return
+    inbox_service.forget_messages(instance.chat_id, instance.pk)
@@ -0,0 +1,37 @@
+from django.db.models.signals import m2m_changed, pre_delete
+from django.dispatch import receiver
+from ..models import Chat
+from ..services.membership_service import MembershipService
+
+membership_service = MembershipService()
+
+
+@receiver(pre_delete, sender=Chat, dispatch_uid="chats_membership_chat_deleted")
+def invalidate_deleted_chat_members(sender, instance, **kwargs):
+    # Participant rows are removed by the cascade without m2m_changed, so
+    # collect the members while the rows still exist.
+    membership_service.invalidate(*instance.participants.values_list("pk", flat=True))
+
+
+@receiver(
+    m2m_changed,
+    sender=Chat.participants.through,
+    dispatch_uid="chats_membership_participants_changed",
+)
+def invalidate_changed_members(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # user.participants_chats.add/remove/clear(): one user changed.
+        if action in ("post_add", "post_remove", "post_clear"):
+            membership_service.invalidate(instance.pk)
+    elif action == "pre_clear":
+        # chat.participants.clear() reports no pk_set: remember the members
+        # and invalidate them once the rows are gone.
+        instance._cleared_participant_ids = list(
+            instance.participants.values_list("pk", flat=True)
+        )
+    elif action == "post_clear":
+        membership_service.invalidate(
+            *getattr(instance, "_cleared_participant_ids", ())
+        )
+    elif action in ("post_add", "post_remove") and pk_set:
+        membership_service.invalidate(*pk_set)
@@ -0,0 +1,20 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from ..models import File, Message
+from ..realtime import get_hub, publish_on_commit
+from ..serializers import FileSerializer, MessageSerializer
+
+
+@receiver(post_save, sender=Message, dispatch_uid="chats_publish_message_saved")
+def publish_message_saved(sender, instance, created, **kwargs):
+    if not get_hub().wants(instance.chat_id):
+        return
+    event_type = "message.created" if created else "message.updated"
+    publish_on_commit(instance.chat_id, event_type, MessageSerializer(instance).data)
+
+
+@receiver(post_save, sender=File, dispatch_uid="chats_publish_file_created")
+def publish_file_created(sender, instance, created, **kwargs):
+    if not created or not get_hub().wants(instance.chat_id):
+        return
+    publish_on_commit(instance.chat_id, "file.created", FileSerializer(instance).data)
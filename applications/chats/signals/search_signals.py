@@ -0,0 +1,15 @@
+from django.db import connections
+from django.db.models.signals import post_migrate
+from django.dispatch import receiver
+from ..services.search_service import MESSAGE_INDEX, install_fulltext_index
+
+
+@receiver(post_migrate, dispatch_uid="chats_restore_fulltext_index")
+def restore_fulltext_index(sender, app_config, using, plan=None, **kwargs):
+    # Migrations that rebuild chats_chat or chats_message on SQLite drop their
+    # triggers; put them back (and reindex) once migrating is done.
+    if app_config.label != "chats" or not plan:
+        return
+    connection = connections[using]
+    if MESSAGE_INDEX in connection.introspection.table_names():
+        install_fulltext_index(connection)
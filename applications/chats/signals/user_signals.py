@@ -0,0 +1,54 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from ..cache import get_chat_cache
+from ..models import Chat, File, Message, MessageSegment
+
+User = get_user_model()
+
+# What chat representations render of a user, besides the id.
+RENDERED_FIELDS = ("username", "email")
+
+
+def _rendered(user) -> tuple:
+    return tuple(getattr(user, field) for field in RENDERED_FIELDS)
+
+
+@receiver(pre_save, sender=User, dispatch_uid="chats_user_saving")
+def remember_rendered_fields(sender, instance, update_fields=None, **kwargs):
+    # Logins save last_login alone; only saves that may rename are checked.
+    if instance.pk is None or (
+        update_fields is not None and not set(RENDERED_FIELDS) & set(update_fields)
+    ):
+        return
+    previous = sender.objects.filter(pk=instance.pk).values_list(*RENDERED_FIELDS)
+    instance._chats_rendered_fields = previous.first()
+
+
+@receiver(post_save, sender=User, dispatch_uid="chats_user_saved")
+def touch_rendering_chats(sender, instance, created, **kwargs):
+    previous = instance.__dict__.pop("_chats_rendered_fields", None)
+    if created or previous is None or previous == _rendered(instance):
+        return
+    # Archived messages are not indexed by sender, so every chat with a
+    # segment is touched; renames are rare enough for one extra 200 each.
+    memberships = Chat.participants.through.objects.filter(user=instance)
+    chat_ids = list(
+        Chat.all_objects.filter(
+            Q(created_by=instance)
+            | Q(pk__in=memberships.values("chat_id"))
+            | Q(pk__in=Message.objects.filter(sender=instance).values("chat_id"))
+            | Q(pk__in=File.objects.filter(uploaded_by=instance).values("chat_id"))
+            | Q(pk__in=MessageSegment.objects.values("chat_id"))
+        ).values_list("pk", flat=True)
+    )
+    if not chat_ids:
+        return
+    # update() leaves updated_at, and with it the inbox order, alone.
+    Chat.all_objects.filter(pk__in=chat_ids).update(users_updated_at=timezone.now())
+    cache = get_chat_cache()
+    if cache is not None:
+        for chat_id in chat_ids:
+            cache.invalidate(chat_id)
@@ -1 +1,1957 @@
-# Create your tests here.
+import asyncio
+import csv
+import gzip
+import inspect
+import io
+import json
+import re
+import tempfile
+import warnings
+from pathlib import Path
+from unittest import mock, skipUnless
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core import signals
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.db import close_old_connections, connection, models
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+
+from .benchmarks import (
+    BenchmarkRunner,
+    Dataset,
+    all_cases,
+    compare,
+    load_baseline,
+    seed_dataset,
+)
+from .cache import ChatCache, get_chat_cache
+from .managers import (
+    BlobQuerySet,
+    ChatInboxQuerySet,
+    ChatQuerySet,
+    FileQuerySet,
+    JobQuerySet,
+    MessageQuerySet,
+    MessageSegmentQuerySet,
+    UploadSessionQuerySet,
+)
+from .middleware import ReadYourWritesMiddleware, normalize_sql
+from .models import (
+    Blob,
+    Chat,
+    ChatInbox,
+    File,
+    Job,
+    Message,
+    MessageSegment,
+    UploadSession,
+)
+from .realtime import EventHub, get_hub
+from .renderers import FastJSONRenderer
+from .realtime.hub import DEFAULT_BACKEND
+from .realtime.websocket import websocket_application
+from .repositories.chat_repository import ChatRepository
+from .repositories.message_repository import MessageRepository
+from .responses.ranged_file_response import parse_range
+from .routing import PinState, ReplicaRouter, pin_state, use_primary
+from .serializers import MessageRowSerializer, MessageSerializer
+from .services import (
+    ArchiveService,
+    BlobService,
+    ChatCounterService,
+    ChatDeletionService,
+    ChatExportService,
+    JobService,
+    MembershipService,
+    UploadSessionError,
+    UploadSessionService,
+)
+
+# The chat and membership caches need a backend shared by every process; in
+# a single test process, locmem is shared enough.
+SHARED_CACHES = {
+    "CACHES": {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "chats": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "chats",
+        },
+    },
+    "CHATS_CHAT_CACHE": {"ENABLED": True, "BACKEND": "chats"},
+    "CHATS_MEMBERSHIP_CACHE": {"ENABLED": True, "BACKEND": "chats"},
+}
+
+
+async def asgi_get(path, client, headers=()):
+    """
+    Serve a GET through ``ASGIHandler``, as an ASGI server would.
+
+    Returns:
+        ``(messages sent, warnings raised)``; the session of ``client`` is used
+    """
+    cookie = f"sessionid={client.cookies['sessionid'].value}"
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", b"testserver"),
+            (b"cookie", cookie.encode()),
+            *[(name.lower().encode(), value.encode()) for name, value in headers],
+        ],
+        "client": ("127.0.0.1", 1),
+        "server": ("testserver", 80),
+    }
+    requests = asyncio.Queue()
+    await requests.put({"type": "http.request", "body": b""})
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    # The test case's transaction must survive the request's cleanup.
+    signals.request_started.disconnect(close_old_connections)
+    signals.request_finished.disconnect(close_old_connections)
+    try:
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            await ASGIHandler()(scope, requests.get, send)
+    finally:
+        signals.request_started.connect(close_old_connections)
+        signals.request_finished.connect(close_old_connections)
+    return messages, [str(warning.message) for warning in caught]
+
+
+@skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN is SQLite specific")
+class QueryPlanTests(TestCase):
+    """
+    Every queryset method must be served by an index.
+
+    A plan fails if it contains a full table scan or a temporary B-tree sort.
+    Scanning a partial index is accepted: it only holds the rows the filter
+    selects. Per-chat querysets are checked scoped to a chat, the way the views
+    use them, and unbounded listings with the keyset predicate the paginator
+    adds.
+    """
+
+    # Methods whose plan cannot be fixed by a B-tree index.
+    KNOWN_SCANS = {
+        "ChatQuerySet.with_participant": "sorting across the M2M join",
+        "ChatQuerySet.with_title": "substring match on title",
+    }
+
+    def get_cases(self):
+        now = timezone.now()
+        messages = Message.objects.for_chat(1)
+        files = File.objects.for_chat(1)
+        segments = MessageSegment.objects.for_chat(1)
+        return {
+            "ChatQuerySet.active": Chat.objects.active(),
+            "ChatQuerySet.inactive": Chat.objects.inactive(),
+            "ChatQuerySet.with_participant": Chat.objects.with_participant(1),
+            "ChatQuerySet.created_by_user": Chat.objects.created_by_user(1),
+            "ChatQuerySet.recent": Chat.objects.recent().filter(updated_at__lt=now),
+            "ChatQuerySet.with_title": Chat.objects.with_title("title"),
+            "ChatQuerySet.in_inbox_of": Chat.objects.in_inbox_of(1),
+            "ChatQuerySet.with_summary": Chat.objects.with_summary().filter(
+                updated_at__lt=now
+            ),
+            # Fetched with get(), which drops the ordering.
+            "ChatQuerySet.with_details": Chat.objects.with_details()
+            .filter(id=1)
+            .order_by(),
+            "ChatQuerySet.deleted": Chat.all_objects.deleted(),
+            "ChatQuerySet.with_validators": Chat.objects.with_validators().filter(id=1),
+            "MessageQuerySet.for_chat": messages,
+            "MessageQuerySet.from_user": Message.objects.from_user(1),
+            "MessageQuerySet.with_context": messages.with_context(),
+            "MessageQuerySet.without_context": messages.without_context(),
+            "MessageQuerySet.recent": messages.recent(),
+            "MessageQuerySet.oldest": messages.oldest(),
+            "MessageQuerySet.between_dates": messages.between_dates(now, now),
+            "MessageQuerySet.as_rows": messages.as_rows(),
+            "FileQuerySet.for_chat": files,
+            "FileQuerySet.uploaded_by_user": File.objects.uploaded_by_user(1),
+            "FileQuerySet.by_file_type": files.by_file_type("text/plain"),
+            "FileQuerySet.recent": files.recent(),
+            "FileQuerySet.oldest": files.oldest(),
+            "FileQuerySet.with_name": files.with_name("report"),
+            "FileQuerySet.larger_than": files.larger_than(1024),
+            "FileQuerySet.smaller_than": files.smaller_than(1024),
+            "UploadSessionQuerySet.stale": UploadSession.objects.stale(now),
+            "ChatInboxQuerySet.for_user": ChatInbox.objects.for_user(1).newest_first(),
+            "ChatInboxQuerySet.for_chat": ChatInbox.objects.for_chat(1),
+            "ChatInboxQuerySet.newest_first": ChatInbox.objects.for_user(1)
+            .newest_first()
+            .filter(last_activity_at__lt=now),
+            "MessageSegmentQuerySet.for_chat": segments,
+            "MessageSegmentQuerySet.after": segments.after(now, 1),
+            "MessageSegmentQuerySet.before": segments.before(now, 1),
+            "MessageSegmentQuerySet.oldest": segments.oldest(),
+            "MessageSegmentQuerySet.newest": segments.newest(),
+            "BlobQuerySet.with_hash": Blob.objects.with_hash("0" * 64),
+            "BlobQuerySet.unreferenced": Blob.objects.unreferenced(),
+            "JobQuerySet.claimable": Job.objects.claimable(now),
+            "JobQuerySet.failed": Job.objects.failed(),
+            "context lookup": messages.filter(context_index=3),
+        }
+
+    def explain(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def test_every_queryset_method_is_covered(self):
+        cases = self.get_cases()
+        for queryset_class in (
+            ChatQuerySet,
+            MessageQuerySet,
+            FileQuerySet,
+            UploadSessionQuerySet,
+            ChatInboxQuerySet,
+            MessageSegmentQuerySet,
+            BlobQuerySet,
+            JobQuerySet,
+        ):
+            for name, _ in inspect.getmembers(queryset_class, inspect.isfunction):
+                if name.startswith("_") or hasattr(models.QuerySet, name):
+                    continue
+                with self.subTest(method=f"{queryset_class.__name__}.{name}"):
+                    self.assertIn(f"{queryset_class.__name__}.{name}", cases)
+
+    def test_query_plans_use_indexes(self):
+        partial_indexes = {
+            index.name
+            for model in (
+                Chat,
+                Message,
+                File,
+                UploadSession,
+                ChatInbox,
+                MessageSegment,
+                Blob,
+                Job,
+            )
+            for index in model._meta.indexes
+            if index.condition is not None
+        }
+        full_scan = re.compile(r"^SCAN (\w+)(?: USING (?:COVERING )?INDEX (\w+))?")
+
+        for label, queryset in self.get_cases().items():
+            if label in self.KNOWN_SCANS:
+                continue
+            plan = self.explain(queryset)
+            with self.subTest(query=label, plan=plan):
+                for step in plan:
+                    self.assertNotIn("USE TEMP B-TREE", step)
+                    match = full_scan.match(step)
+                    if match:
+                        self.assertIn(match.group(2), partial_indexes)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("pager", password="x")
+        self.chat = Chat.objects.create(title="Pages", created_by=self.user)
+        self.chat.participants.add(self.user)
+        for index in range(8):
+            Message.objects.create(
+                chat=self.chat, sender=self.user, content=f"Message {index}"
+            )
+        # Ties in created_at are broken by id.
+        tied = timezone.now() - timezone.timedelta(hours=1)
+        Message.objects.filter(pk__in=Message.objects.values("pk")[2:7]).update(
+            created_at=tied
+        )
+        self.client.force_login(self.user)
+
+    def walk(self, url, link):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            pages.append([item["id"] for item in body["results"]])
+            url = body[link]
+        return pages
+
+    def test_pages_walk_ties_both_ways(self):
+        expected = list(
+            Message.objects.order_by("created_at", "id").values_list("id", flat=True)
+        )
+        url = reverse("message-list", kwargs={"chat_pk": self.chat.pk})
+        pages = self.walk(f"{url}?page_size=3", "next")
+        self.assertEqual([len(page) for page in pages], [3, 3, 2])
+        self.assertEqual(sum(pages, []), expected)
+
+        # Back from the last page with the previous links.
+        last = self.client.get(f"{url}?page_size=3").json()
+        while last["next"]:
+            last = self.client.get(last["next"]).json()
+        backwards = self.walk(last["previous"], "previous")
+        self.assertEqual(sum(reversed(backwards), []), expected[:6])
+
+    def test_chats_newest_first_with_ties(self):
+        Chat.objects.bulk_create(
+            Chat(title=f"Chat {index}", created_by=self.user) for index in range(4)
+        )
+        Chat.objects.update(updated_at=timezone.now())
+        expected = list(
+            Chat.objects.order_by("-updated_at", "-id").values_list("id", flat=True)
+        )
+        pages = self.walk(f"{reverse('chat-list')}?page_size=2", "next")
+        self.assertEqual(sum(pages, []), expected)
+
+    def test_invalid_cursor_is_not_found(self):
+        url = reverse("message-list", kwargs={"chat_pk": self.chat.pk})
+        self.assertEqual(self.client.get(f"{url}?cursor=bogus").status_code, 404)
+
+
+class ChatSummaryTests(TestCase):
+    def test_list_summarizes_counters_and_activity(self):
+        users = get_user_model().objects
+        owner = users.create_user("summary", password="x")
+        member = users.create_user("member", password="x")
+        chat = Chat.objects.create(title="Summary", created_by=owner)
+        chat.participants.add(owner, member)
+        for index in range(3):
+            message = Message.objects.create(
+                chat=chat, sender=member, content=f"Message {index}"
+            )
+        File.objects.create(
+            chat=chat,
+            file="chat_files/summary.txt",
+            file_name="summary.txt",
+            file_type="text/plain",
+            file_size=42,
+            uploaded_by=owner,
+        )
+        # Activity is the newest of the chat's own update and its last message.
+        Chat.objects.filter(pk=chat.pk).update(
+            updated_at=timezone.now() - timezone.timedelta(days=1)
+        )
+        self.client.force_login(owner)
+
+        [summary] = self.client.get(reverse("chat-list")).json()["results"]
+
+        message.refresh_from_db()
+        self.assertEqual(summary["id"], chat.pk)
+        self.assertEqual(summary["created_by"], owner.pk)
+        self.assertEqual(sorted(summary["participant_ids"]), [owner.pk, member.pk])
+        self.assertEqual(
+            (
+                summary["message_count"],
+                summary["file_count"],
+                summary["total_file_bytes"],
+                summary["last_message_id"],
+            ),
+            (3, 1, 42, message.pk),
+        )
+        self.assertEqual(
+            parse_datetime(summary["last_activity_at"]), message.created_at
+        )
+        self.assertEqual(summary["last_message_at"], summary["last_activity_at"])
+        self.assertNotIn("messages", summary)
+
+
+class FileDownloadTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        settings = override_settings(MEDIA_ROOT=self.media_root.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        user = get_user_model().objects.create_user("downloader", password="x")
+        chat = Chat.objects.create(title="Downloads", created_by=user)
+        chat.participants.add(user)
+        self.client.force_login(user)
+        response = self.client.post(
+            reverse("file-list", kwargs={"chat_pk": chat.pk}),
+            {"file": SimpleUploadedFile("digits.txt", b"0123456789")},
+        )
+        self.url = reverse(
+            "file-download", kwargs={"chat_pk": chat.pk, "pk": response.json()["id"]}
+        )
+
+    def download(self, **headers):
+        response = self.client.get(self.url, headers=headers)
+        body = b"".join(response.streaming_content) if response.streaming else b""
+        return response, body
+
+    async def test_ranges_stream_under_asgi(self):
+        user = await get_user_model().objects.aget(username="downloader")
+        await self.async_client.aforce_login(user)
+        messages, warned = await asgi_get(
+            self.url, self.async_client, [("Range", "bytes=1-7")]
+        )
+
+        self.assertEqual(messages[0]["status"], 206)
+        self.assertEqual(
+            b"".join(message.get("body", b"") for message in messages[1:]), b"1234567"
+        )
+        # A synchronous iterator would have been read whole, with a warning.
+        self.assertEqual([text for text in warned if "iterator" in text], [])
+
+    def test_parse_range(self):
+        cases = {
+            None: None,
+            "bytes=2-5": (2, 5),
+            "bytes=7-": (7, 9),
+            "bytes=8-100": (8, 9),
+            "bytes=-3": (7, 9),
+            "bytes=-100": (0, 9),
+            "bytes=10-": False,
+            "bytes=-0": False,
+            # Not a single valid range: ignored.
+            "bytes=5-3": None,
+            "bytes=0-1,4-5": None,
+            "items=0-1": None,
+            "bytes=-": None,
+        }
+        for header, expected in cases.items():
+            with self.subTest(header=header):
+                self.assertEqual(parse_range(header, 10), expected)
+        self.assertIs(parse_range("bytes=0-", 0), False)
+
+    def test_range_requests(self):
+        response, body = self.download()
+        self.assertEqual((response.status_code, body), (200, b"0123456789"))
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+
+        response, body = self.download(Range="bytes=2-5")
+        self.assertEqual((response.status_code, body), (206, b"2345"))
+        self.assertEqual(response["Content-Range"], "bytes 2-5/10")
+        self.assertEqual(response["Content-Length"], "4")
+
+        response, body = self.download(Range="bytes=-3")
+        self.assertEqual((response.status_code, body), (206, b"789"))
+
+        response, _ = self.download(Range="bytes=10-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */10")
+
+        response, body = self.download(Range="bytes=5-3")
+        self.assertEqual((response.status_code, body), (200, b"0123456789"))
+
+    def test_conditional_requests(self):
+        response, _ = self.download()
+        etag, last_modified = response["ETag"], response["Last-Modified"]
+
+        response, body = self.download(If_None_Match=etag)
+        self.assertEqual((response.status_code, body), (304, b""))
+        self.assertEqual(response["ETag"], etag)
+        response, _ = self.download(If_Modified_Since=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+        # A range is only honoured while If-Range still matches.
+        response, body = self.download(Range="bytes=0-1", If_Range=etag)
+        self.assertEqual((response.status_code, body), (206, b"01"))
+        response, body = self.download(Range="bytes=0-1", If_Range='"stale"')
+        self.assertEqual((response.status_code, body), (200, b"0123456789"))
+
+
+class UploadSessionTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        self.sessions_dir = Path(self.media_root.name) / "upload_sessions"
+        settings = override_settings(
+            MEDIA_ROOT=self.media_root.name, CHATS_UPLOAD_SESSIONS_DIR=self.sessions_dir
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        user = get_user_model().objects.create_user("uploader", password="x")
+        self.chat = Chat.objects.create(title="Uploads", created_by=user)
+        self.chat.participants.add(user)
+        self.client.force_login(user)
+        response = self.client.post(
+            reverse("upload-list", kwargs={"chat_pk": self.chat.pk}),
+            {
+                "file_name": "digits.txt",
+                "content_type": "text/plain",
+                "total_size": 10,
+                "chunk_size": 4,
+            },
+        )
+        self.session = response.json()
+        self.kwargs = {"chat_pk": self.chat.pk, "pk": self.session["id"]}
+
+    def put_chunk(self, index, data):
+        return self.client.put(
+            reverse("upload-chunk", kwargs={**self.kwargs, "index": index}),
+            data,
+            content_type="application/octet-stream",
+        )
+
+    def test_chunks_in_any_order_assemble_into_a_file(self):
+        self.assertEqual(self.session["total_chunks"], 3)
+        self.assertEqual(self.put_chunk(2, b"89").status_code, 200)
+        self.assertEqual(self.put_chunk(0, b"0123").status_code, 200)
+        self.assertEqual(self.put_chunk(1, b"456").status_code, 400)
+
+        detail = self.client.get(reverse("upload-detail", kwargs=self.kwargs))
+        self.assertEqual(detail.json()["received_chunks"], [0, 2])
+        response = self.client.post(reverse("upload-complete", kwargs=self.kwargs))
+        self.assertEqual(response.status_code, 400)
+
+        # Resending a chunk after a lost response is harmless.
+        self.assertEqual(self.put_chunk(1, b"4567").status_code, 200)
+        self.assertEqual(self.put_chunk(1, b"4567").status_code, 200)
+        response = self.client.post(reverse("upload-complete", kwargs=self.kwargs))
+        self.assertEqual(response.status_code, 201)
+
+        file_obj = File.objects.get(pk=response.json()["id"])
+        with file_obj.file.open("rb") as f:
+            self.assertEqual(f.read(), b"0123456789")
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertEqual(list(self.sessions_dir.iterdir()), [])
+
+    def test_session_sizes_are_bounded(self):
+        url = reverse("upload-list", kwargs={"chat_pk": self.chat.pk})
+        for sizes, field in (
+            ({"total_size": 2**31, "chunk_size": 2**26}, "total_size"),
+            ({"total_size": 10**6, "chunk_size": 1}, "chunk_size"),
+        ):
+            response = self.client.post(url, {"file_name": "big.bin", **sizes})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn(field, response.json())
+
+    def test_missing_chunks_follow_the_received_ones(self):
+        service = UploadSessionService()
+        session = UploadSession.objects.get(pk=self.session["id"])
+        self.put_chunk(1, b"4567")
+        self.assertEqual(service.missing_chunks(session, limit=20), [0, 2])
+
+        # Sessions predating the bounds are walked without listing every index.
+        session.total_size, session.chunk_size = 10**15, 1
+        self.assertEqual(service.missing_chunks(session, limit=3), [0, 2, 3])
+
+    def test_concurrent_completes_create_one_file(self):
+        for index, data in enumerate((b"0123", b"4567", b"89")):
+            self.put_chunk(index, data)
+        service = UploadSessionService()
+        assemble = service._assemble
+        calls = []
+
+        def assemble_then_race(session, assembled):
+            # The other complete runs to the end while this one has its
+            # assembled copy but has not claimed the session yet.
+            sha256 = assemble(session, assembled)
+            calls.append(session)
+            if len(calls) == 1:
+                other = UploadSession.objects.get(pk=session.pk)
+                calls.append(service.complete(other))
+            return sha256
+
+        session = UploadSession.objects.get(pk=self.session["id"])
+        with mock.patch.object(service, "_assemble", assemble_then_race):
+            with self.assertRaises(UploadSessionError):
+                service.complete(session)
+
+        winner = calls[-1]
+        self.assertEqual(File.objects.get().pk, winner.pk)
+        with winner.file.open("rb") as f:
+            self.assertEqual(f.read(), b"0123456789")
+        self.assertFalse(UploadSession.objects.exists())
+
+
+class BulkMessageTests(TestCase):
+    def setUp(self):
+        users = get_user_model().objects
+        self.user = users.create_user("bulk", password="x")
+        self.chat = Chat.objects.create(title="Bulk", created_by=self.user)
+        self.chat.participants.add(self.user)
+        self.client.force_login(self.user)
+
+    def post(self, name, data):
+        return self.client.post(
+            reverse(name, kwargs={"chat_pk": self.chat.pk}),
+            data,
+            content_type="application/json",
+        )
+
+    def test_create_reports_errors_by_position(self):
+        response = self.post(
+            "message-bulk-create",
+            {
+                "messages": [
+                    {"content": "fine"},
+                    {},
+                    "not an object",
+                    {"content": "x", "context_index": "three"},
+                ]
+            },
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json(),
+            {
+                "messages": {
+                    "1": {"content": ["This field is required."]},
+                    "2": {"non_field_errors": ["Expected an object."]},
+                    "3": {"context_index": ["A valid integer is required."]},
+                }
+            },
+        )
+        self.assertFalse(Message.objects.exists())
+
+    def test_create_holds_items_to_the_single_message_rules(self):
+        for item, field in (
+            ({"content": "   "}, "content"),
+            ({"content": "x", "context_index": 2**64}, "context_index"),
+        ):
+            single = self.post("message-list", {**item, "chat_id": self.chat.pk})
+            self.assertEqual(single.status_code, 400)
+            response = self.post("message-bulk-create", {"messages": [item]})
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(
+                response.json()["messages"]["0"][field], single.json()[field]
+            )
+        self.assertFalse(Message.objects.exists())
+
+        # Like single messages, content is stored stripped.
+        self.post("message-bulk-create", {"messages": [{"content": " hi "}]})
+        self.assertEqual(Message.objects.get().content, "hi")
+
+    def test_create_then_delete_a_context_index_range(self):
+        response = self.post(
+            "message-bulk-create",
+            {"messages": [{"content": f"m{i}", "context_index": i} for i in range(6)]},
+        )
+        self.assertEqual(response.json()["created"], 6)
+
+        response = self.post(
+            "message-bulk-delete", {"context_index_from": 1, "context_index_to": 3}
+        )
+
+        self.assertEqual(response.json(), {"deleted": 3})
+        remaining = Message.objects.order_by("context_index")
+        self.assertEqual(
+            list(remaining.values_list("content", flat=True)), ["m0", "m4", "m5"]
+        )
+        self.chat.refresh_from_db()
+        self.assertEqual(self.chat.message_count, 3)
+
+    def test_delete_needs_ids_or_a_range_but_not_both(self):
+        message = Message.objects.create(chat=self.chat, sender=self.user, content="a")
+
+        for data in ({}, {"ids": [message.pk], "context_index_from": 0}):
+            self.assertEqual(self.post("message-bulk-delete", data).status_code, 400)
+        self.assertTrue(Message.objects.filter(pk=message.pk).exists())
+
+        # Ids of other chats are ignored rather than deleted.
+        other = Chat.objects.create(title="Other", created_by=self.user)
+        foreign = Message.objects.create(chat=other, sender=self.user, content="b")
+        response = self.post("message-bulk-delete", {"ids": [message.pk, foreign.pk]})
+        self.assertEqual(response.json(), {"deleted": 1})
+        self.assertTrue(Message.objects.filter(pk=foreign.pk).exists())
+
+
+class RealtimeTests(TestCase):
+    def setUp(self):
+        users = get_user_model().objects
+        self.user = users.create_user("listener", password="x")
+        self.outsider = users.create_user("stranger", password="x")
+        self.chat = Chat.objects.create(title="Live", created_by=self.user)
+        self.chat.participants.add(self.user)
+
+    async def test_hub_fans_out_per_chat_and_drops_the_oldest(self):
+        hub = EventHub(DEFAULT_BACKEND, {}, queue_size=2)
+        with hub.subscribe(1) as subscription, hub.subscribe(2) as other:
+            # Published from another thread, as sync views and signals do.
+            for n in range(3):
+                await asyncio.to_thread(hub.publish, 1, "tick", n)
+
+            self.assertEqual([event["data"] for event in subscription.drain()], [1, 2])
+            self.assertEqual(subscription.dropped, 1)
+            self.assertEqual(other.drain(), [])
+            self.assertIsNone(await other.get(timeout=0.01))
+        self.assertFalse(hub.has_subscribers(1))
+
+    async def test_saved_messages_are_published_on_commit(self):
+        def send():
+            with self.captureOnCommitCallbacks(execute=True):
+                return Message.objects.create(
+                    chat=self.chat, sender=self.user, content="hello"
+                )
+
+        with get_hub().subscribe(self.chat.pk) as subscription:
+            message = await sync_to_async(send)()
+            event = await subscription.get(timeout=1)
+
+        self.assertEqual(event["type"], "message.created")
+        self.assertEqual(event["data"]["id"], message.pk)
+
+    @override_settings(CHATS_REALTIME={"HEARTBEAT_SECONDS": 0.01})
+    async def test_server_sent_events(self):
+        url = reverse("chat-events", kwargs={"chat_pk": self.chat.pk})
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 403)
+        await self.async_client.aforce_login(self.outsider)
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 404)
+
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(url)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        frames = aiter(response.streaming_content)
+        self.assertEqual(await anext(frames), b"retry: 3000\n\n")
+        self.assertEqual(await anext(frames), b": keepalive\n\n")
+        get_hub().publish(self.chat.pk, "message.created", {"id": 1})
+        self.assertEqual(
+            await anext(frames), b'event: message.created\ndata: {"id": 1}\n\n'
+        )
+        # A client disconnecting cancels the read in progress.
+        read = asyncio.ensure_future(anext(frames))
+        await asyncio.sleep(0)
+        read.cancel()
+        await asyncio.gather(read, return_exceptions=True)
+        self.assertFalse(get_hub().has_subscribers(self.chat.pk))
+
+    async def connect(self, path, **headers):
+        """Run the WebSocket application until it accepts or closes."""
+        incoming, outgoing = asyncio.Queue(), asyncio.Queue()
+        scope = {
+            "type": "websocket",
+            "path": path,
+            "headers": [
+                (name.encode(), value.encode())
+                for name, value in {"host": "testserver", **headers}.items()
+            ],
+        }
+        task = asyncio.ensure_future(
+            websocket_application(scope, incoming.get, outgoing.put)
+        )
+        self.addCleanup(task.cancel)
+        await incoming.put({"type": "websocket.connect"})
+        return task, incoming, outgoing, await outgoing.get()
+
+    # The test case's transaction must survive the handshake's cleanup.
+    @mock.patch("applications.chats.realtime.websocket.close_old_connections")
+    async def test_websocket(self, close_old_connections):
+        await self.async_client.aforce_login(self.user)
+        cookie = f"sessionid={self.async_client.cookies['sessionid'].value}"
+        path = f"/ws/chats/{self.chat.pk}/"
+
+        _, _, _, message = await self.connect(path)
+        self.assertEqual(message, {"type": "websocket.close", "code": 4403})
+        _, _, _, message = await self.connect(
+            path, cookie=cookie, origin="https://elsewhere.example"
+        )
+        self.assertEqual(message, {"type": "websocket.close", "code": 4403})
+        _, _, _, message = await self.connect("/ws/chats/x/", cookie=cookie)
+        self.assertEqual(message, {"type": "websocket.close", "code": 4404})
+
+        task, incoming, outgoing, message = await self.connect(path, cookie=cookie)
+        self.assertEqual(message, {"type": "websocket.accept"})
+        while not get_hub().has_subscribers(self.chat.pk):
+            await asyncio.sleep(0)
+        get_hub().publish(self.chat.pk, "message.created", {"id": 1})
+        self.assertEqual(
+            json.loads((await outgoing.get())["text"]),
+            {"type": "message.created", "data": {"id": 1}},
+        )
+        await incoming.put({"type": "websocket.disconnect"})
+        await asyncio.wait_for(task, 1)
+        self.assertFalse(get_hub().has_subscribers(self.chat.pk))
+
+
+# The view reads on pooled threads, which cannot see a TestCase transaction.
+class LongPollTests(TransactionTestCase):
+    def setUp(self):
+        users = get_user_model().objects
+        self.user = users.create_user("poller", password="x")
+        self.outsider = users.create_user("lurker", password="x")
+        self.chat = Chat.objects.create(title="Polls", created_by=self.user)
+        self.chat.participants.add(self.user)
+        self.first = Message.objects.create(
+            chat=self.chat, sender=self.user, content="first"
+        )
+        self.url = reverse("message-since", kwargs={"chat_pk": self.chat.pk})
+
+    async def poll(self, **params):
+        return await self.async_client.get(self.url, params)
+
+    async def test_access_and_parameters(self):
+        response = await self.poll(after=0, timeout=0)
+        self.assertEqual(response.status_code, 403)
+        await self.async_client.aforce_login(self.outsider)
+        response = await self.poll(after=0, timeout=0)
+        self.assertEqual(response.status_code, 404)
+
+        await self.async_client.aforce_login(self.user)
+        for params in ({}, {"after": 0, "cursor": "x"}, {"after": 0, "timeout": "x"}):
+            response = await self.poll(**params)
+            self.assertEqual(response.status_code, 400)
+
+    async def test_returns_newer_messages_at_once(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.poll(after=0)
+        self.assertEqual(
+            [message["id"] for message in response.json()["results"]], [self.first.pk]
+        )
+
+    async def test_times_out_with_nothing_new(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.poll(after=self.first.pk, timeout=0.05)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"], [])
+        self.assertEqual(
+            response.json()["next"],
+            f"http://testserver{self.url}?after={self.first.pk}&timeout=0.05",
+        )
+
+    async def test_wakes_up_on_a_new_message(self):
+        await self.async_client.aforce_login(self.user)
+        poll = asyncio.ensure_future(self.poll(after=self.first.pk, timeout=10))
+        while not get_hub().has_subscribers(self.chat.pk):
+            await asyncio.sleep(0.01)
+
+        second = await Message.objects.acreate(
+            chat=self.chat, sender=self.user, content="second"
+        )
+        response = await asyncio.wait_for(poll, 5)
+
+        results = response.json()["results"]
+        self.assertEqual([message["id"] for message in results], [second.pk])
+        self.assertEqual(results[0]["content"], "second")
+        # The next poll continues after it.
+        next_url = response.json()["next"]
+        self.assertNotIn("after=", next_url)
+        response = await self.async_client.get(f"{next_url}&timeout=0")
+        self.assertEqual(response.json()["results"], [])
+
+
+@skipUnless(connection.vendor == "sqlite", "The FTS5 index is SQLite specific")
+class SearchTests(TestCase):
+    def setUp(self):
+        users = get_user_model().objects
+        self.user = users.create_user("searcher", password="x")
+        self.chat = Chat.objects.create(title="Release plan", created_by=self.user)
+        self.chat.participants.add(self.user)
+        self.other = Chat.objects.create(title="Secret plan", created_by=self.user)
+        self.client.force_login(self.user)
+
+    def say(self, content, chat=None):
+        return Message.objects.create(
+            chat=chat or self.chat, sender=self.user, content=content
+        )
+
+    def search(self, name, **params):
+        response = self.client.get(reverse(name), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_messages_match_whole_words_in_the_users_chats(self):
+        hit = self.say("Ship the <b>plan</b> today")
+        self.say("Planning ahead")
+        self.say("plan", chat=self.other)
+
+        results = self.search("chat-search-messages", q="PLAN")["results"]
+
+        self.assertEqual([result["id"] for result in results], [hit.pk])
+        self.assertIn("&lt;b&gt;<mark>plan</mark>&lt;/b&gt;", results[0]["snippet"])
+        self.assertEqual(
+            self.client.get(reverse("chat-search-messages")).status_code, 400
+        )
+
+    def test_index_follows_edits_and_deletes(self):
+        message = self.say("draft")
+        Message.objects.filter(pk=message.pk).update(content="final")
+        self.assertEqual(self.search("chat-search-messages", q="draft")["results"], [])
+        self.assertEqual(
+            len(self.search("chat-search-messages", q="final")["results"]), 1
+        )
+
+        message.delete()
+        self.assertEqual(self.search("chat-search-messages", q="final")["results"], [])
+
+    def test_pages_survive_writes_between_requests(self):
+        # BM25 only weighs terms found in fewer than half of the rows.
+        for _ in range(20):
+            self.say("unrelated words", chat=self.other)
+        expected = [self.say("alpha beta").pk for _ in range(7)]
+
+        seen = []
+        page = self.search("chat-search-messages", q="alpha", page_size=3)
+        while True:
+            seen += [result["id"] for result in page["results"]]
+            if page["next"] is None:
+                break
+            # Indexing anything shifts every BM25 score a little.
+            self.say("unrelated words", chat=self.other)
+            page = self.client.get(page["next"]).json()
+
+        self.assertEqual(seen, expected)
+
+    def test_chats_rank_title_matches_first(self):
+        in_prompt = Chat.objects.create(
+            title="Misc", prompt="the launch date", created_by=self.user
+        )
+        in_title = Chat.objects.create(title="Launch", created_by=self.user)
+        for chat in (in_prompt, in_title):
+            chat.participants.add(self.user)
+        Chat.objects.create(title="Launch", created_by=self.user)
+
+        results = self.search("chat-search", q="launch")["results"]
+
+        self.assertEqual(
+            [result["id"] for result in results], [in_title.pk, in_prompt.pk]
+        )
+        self.assertEqual(results[0]["snippet"], "<mark>Launch</mark>")
+
+    def test_repository_search_matches_whole_title_words(self):
+        Chat.objects.create(title="Planning", created_by=self.user)
+
+        found = ChatRepository().search_chats("plan")
+
+        self.assertEqual(set(found), {self.chat, self.other})
+
+
+class InboxTests(TestCase):
+    def setUp(self):
+        users = get_user_model().objects
+        self.owner = users.create_user("owner", password="x")
+        self.member = users.create_user("member", password="x")
+        self.first = Chat.objects.create(title="First", created_by=self.owner)
+        self.second = Chat.objects.create(title="Second", created_by=self.owner)
+
+    def inbox(self, user):
+        return set(
+            ChatInbox.objects.filter(user=user).values_list("chat_id", flat=True)
+        )
+
+    def listed(self, user):
+        self.client.force_login(user)
+        response = self.client.get(reverse("inbox-list"))
+        self.assertEqual(response.status_code, 200)
+        return response.json()["results"]
+
+    def test_membership_changes_from_either_side(self):
+        self.assertEqual(self.inbox(self.owner), {self.first.pk, self.second.pk})
+
+        self.first.participants.add(self.member, self.owner)
+        self.member.participants_chats.add(self.second)
+        self.assertEqual(self.inbox(self.member), {self.first.pk, self.second.pk})
+
+        self.first.participants.remove(self.member)
+        self.assertEqual(self.inbox(self.member), {self.second.pk})
+        self.member.participants_chats.clear()
+        self.assertEqual(self.inbox(self.member), set())
+
+        # The creator keeps the chat even after leaving it.
+        self.first.participants.clear()
+        self.assertEqual(self.inbox(self.owner), {self.first.pk, self.second.pk})
+
+    def test_messages_order_the_inbox_and_deletes_repoint_it(self):
+        first, earlier, latest = [
+            Message.objects.create(chat=chat, sender=self.owner, content="hi")
+            for chat in (self.first, self.second, self.second)
+        ]
+
+        self.assertEqual(
+            [
+                (entry["chat"]["id"], entry["last_message_id"])
+                for entry in self.listed(self.owner)
+            ],
+            [(self.second.pk, latest.pk), (self.first.pk, first.pk)],
+        )
+
+        latest.delete()
+        self.assertEqual(self.listed(self.owner)[0]["last_message_id"], earlier.pk)
+        # Bulk deletes skip the per-row signals and repair the inbox at once.
+        MessageRepository().bulk_delete(self.second, ids=[earlier.pk])
+        entry = self.listed(self.owner)[0]
+        self.assertEqual(entry["chat"]["id"], self.second.pk)
+        self.assertIsNone(entry["last_message_id"])
+
+    def test_only_the_users_chats_are_listed(self):
+        self.first.participants.add(self.member)
+
+        self.assertEqual(
+            [entry["chat"]["id"] for entry in self.listed(self.member)], [self.first.pk]
+        )
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse("inbox-list")).status_code, 403)
+
+
+class ChatCounterTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("counter", password="x")
+        self.chat = Chat.objects.create(title="Counted", created_by=self.user)
+
+    def counters(self, chat=None):
+        return Chat.objects.values_list(
+            "message_count", "last_message_id", "file_count", "total_file_bytes"
+        ).get(pk=(chat or self.chat).pk)
+
+    def add_file(self, size):
+        return File.objects.create(
+            chat=self.chat,
+            file="chat_files/counted.txt",
+            file_name="counted.txt",
+            file_type="text/plain",
+            file_size=size,
+            uploaded_by=self.user,
+        )
+
+    def test_updates_are_applied_in_the_database(self):
+        service = ChatCounterService()
+        now = timezone.now()
+        service.messages_added(self.chat.pk, 2, 10, now)
+        # An older message is counted but does not become the newest.
+        service.messages_added(self.chat.pk, 3, 5, now - timezone.timedelta(days=1))
+        service.files_changed(self.chat.pk, 2, 100)
+        service.files_changed(self.chat.pk, -1, -40)
+
+        self.assertEqual(self.counters(), (5, 10, 1, 60))
+        # Nothing was read back into the instance and written from it.
+        self.assertEqual(self.chat.message_count, 0)
+
+    def test_signals_count_messages_and_files(self):
+        first, second, third = [
+            Message.objects.create(chat=self.chat, sender=self.user, content="x")
+            for _ in range(3)
+        ]
+        small, large = self.add_file(10), self.add_file(90)
+        self.assertEqual(self.counters(), (3, third.pk, 2, 100))
+
+        third.delete()
+        first.delete()
+        large.delete()
+        self.assertEqual(self.counters(), (1, second.pk, 1, 10))
+
+        small.delete()
+        second.delete()
+        self.assertEqual(self.counters(), (0, None, 0, 0))
+
+    def test_repair_chat_counters(self):
+        healthy = Chat.objects.create(title="Healthy", created_by=self.user)
+        for chat in (self.chat, healthy):
+            message = Message.objects.create(chat=chat, sender=self.user, content="x")
+        self.add_file(7)
+        expected = self.counters()
+        Chat.objects.filter(pk=self.chat.pk).update(
+            message_count=99, last_message_id=None, total_file_bytes=0
+        )
+
+        out = io.StringIO()
+        call_command("repair_chat_counters", "--dry-run", stdout=out)
+        self.assertIn("Found 1 chats", out.getvalue())
+        self.assertEqual(self.counters(), (99, None, 1, 0))
+
+        out = io.StringIO()
+        call_command("repair_chat_counters", "--batch-size", "1", stdout=out)
+        self.assertIn("Repaired 1 chats", out.getvalue())
+        self.assertEqual(self.counters(), expected)
+        self.assertEqual(self.counters(healthy), (1, message.pk, 0, 0))
+        self.assertEqual(ChatCounterService().repair(), [])
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        users = get_user_model().objects
+        self.owner = users.create_user("owner", "owner@example.com", "x")
+        self.sender = users.create_user("sender", "sender@example.com", "x")
+        self.chat = Chat.objects.create(title="Chat", created_by=self.owner)
+        self.chat.participants.add(self.owner, self.sender)
+        Message.objects.create(chat=self.chat, sender=self.sender, content="hi")
+        self.list_url = reverse("message-list", kwargs={"chat_pk": self.chat.pk})
+        self.detail_url = reverse("chat-detail", kwargs={"pk": self.chat.pk})
+        self.client.force_login(self.owner)
+
+    def revalidate(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code
+
+    def test_unchanged_representations_are_not_modified(self):
+        for url in (self.list_url, self.detail_url):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response["ETag"].startswith('W/"'))
+            self.assertNotIn("Last-Modified", response)
+            self.assertEqual(self.revalidate(url, response), 304)
+
+    def test_new_messages_are_modified(self):
+        response = self.client.get(self.list_url)
+        Message.objects.create(chat=self.chat, sender=self.owner, content="new")
+
+        self.assertEqual(self.revalidate(self.list_url, response), 200)
+
+    def test_deleting_the_newest_message_is_modified(self):
+        newest = Message.objects.create(chat=self.chat, sender=self.owner, content="x")
+        urls = (self.list_url, self.detail_url)
+        responses = {url: self.client.get(url) for url in urls}
+        response = self.client.delete(
+            reverse("message-detail", kwargs={"chat_pk": self.chat.pk, "pk": newest.pk})
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        for url, response in responses.items():
+            self.assertEqual(self.revalidate(url, response), 200)
+            # Without a Last-Modified to go by, dates alone never answer 304.
+            stale = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date())
+            self.assertEqual(stale.status_code, 200)
+
+    def test_renaming_a_rendered_user_is_modified(self):
+        urls = (self.list_url, self.detail_url)
+        responses = {url: self.client.get(url) for url in urls}
+        self.sender.email = "renamed@example.com"
+        self.sender.save()
+
+        for url, response in responses.items():
+            self.assertEqual(self.revalidate(url, response), 200)
+            self.assertContains(self.client.get(url), "renamed@example.com")
+
+    def test_saves_leaving_rendered_fields_alone_are_not_modified(self):
+        response = self.client.get(self.list_url)
+        self.sender.last_login = timezone.now()
+        self.sender.save(update_fields=["last_login"])
+        self.sender.save()
+
+        self.assertIsNone(Chat.objects.get(pk=self.chat.pk).users_updated_at)
+        self.assertEqual(self.revalidate(self.list_url, response), 304)
+
+
+class RendererTests(TestCase):
+    def setUp(self):
+        sender = get_user_model().objects.create_user(
+            "söndér", "sender@example.com", "x"
+        )
+        chat = Chat.objects.create(title="Render", created_by=sender)
+        for content in ("plain", "ünïcödé \u2028 and \u2029", 'quotes " \\ </'):
+            Message.objects.create(chat=chat, sender=sender, content=content)
+        # isoformat() drops the fraction of whole seconds.
+        Message.objects.filter(content="plain").update(
+            created_at=timezone.now().replace(microsecond=0)
+        )
+        self.messages = Message.objects.filter(chat=chat).order_by("id")
+
+    def rendered(self):
+        """``(fast, standard)`` renderings of the messages."""
+        rows = MessageRowSerializer(self.messages.as_rows(), many=True).data
+        instances = self.messages.select_related("sender")
+        return (
+            FastJSONRenderer().render(rows),
+            JSONRenderer().render(MessageSerializer(instances, many=True).data),
+        )
+
+    def test_rows_render_like_the_model_serializer(self):
+        self.assertEqual(*self.rendered())
+
+    @override_settings(TIME_ZONE="Europe/Paris")
+    def test_other_time_zones_render_alike(self):
+        with timezone.override("Europe/Paris"):
+            self.assertEqual(*self.rendered())
+
+    def test_without_orjson_the_standard_renderer_is_used(self):
+        with mock.patch("applications.chats.renderers.fast_json_renderer.orjson", None):
+            self.assertEqual(*self.rendered())
+
+
+@override_settings(**SHARED_CACHES)
+class ChatCacheTests(TestCase):
+    def setUp(self):
+        caches["chats"].clear()
+        users = get_user_model().objects
+        self.user = users.create_user("cached", password="x")
+        self.member = users.create_user("joiner", password="x")
+        self.chat = Chat.objects.create(title="Cached", created_by=self.user)
+        self.repository = ChatRepository()
+
+    def test_reads_are_served_from_the_cache(self):
+        self.assertEqual(self.repository.get_by_id(self.chat.pk), self.chat)
+        with self.assertNumQueries(0):
+            chat = self.repository.get_by_id(self.chat.pk)
+            self.assertEqual(chat.created_by, self.user)
+            self.assertEqual(list(chat.participants.all()), [])
+        self.assertEqual(self.repository.cache_stats()["hits"], 1)
+
+    def test_writes_invalidate_the_cached_chat(self):
+        self.repository.get_by_id(self.chat.pk)
+
+        self.chat.title = "Renamed"
+        self.chat.save()
+        self.assertEqual(self.repository.get_by_id(self.chat.pk).title, "Renamed")
+
+        self.chat.participants.add(self.member)
+        chat = self.repository.get_by_id(self.chat.pk)
+        self.assertEqual(list(chat.participants.all()), [self.member])
+        self.member.participants_chats.clear()
+        chat = self.repository.get_by_id(self.chat.pk)
+        self.assertEqual(list(chat.participants.all()), [])
+
+        Chat.all_objects.filter(pk=self.chat.pk).delete()
+        self.assertIsNone(self.repository.get_by_id(self.chat.pk))
+
+    def test_invalidations_reach_other_processes(self):
+        # Each cache has its own in-process layer, like separate workers.
+        here = ChatRepository(ChatCache("chats:chat", alias="chats"))
+        there = ChatRepository(ChatCache("chats:chat", alias="chats"))
+        here.get_by_id(self.chat.pk)
+        self.assertEqual(there.get_by_id(self.chat.pk).title, "Cached")
+
+        Chat.objects.filter(pk=self.chat.pk).update(title="Renamed")
+        here.invalidate(self.chat.pk)
+
+        self.assertEqual(there.get_by_id(self.chat.pk).title, "Renamed")
+
+    def test_is_off_by_default_and_needs_a_shared_backend(self):
+        with override_settings(CHATS_CHAT_CACHE={}):
+            self.assertIsNone(get_chat_cache())
+        with override_settings(CHATS_CHAT_CACHE={"ENABLED": True}):
+            with self.assertRaises(ImproperlyConfigured):
+                get_chat_cache()
+
+
+@override_settings(**SHARED_CACHES)
+class MembershipCacheTests(TestCase):
+    def setUp(self):
+        caches["chats"].clear()
+        users = get_user_model().objects
+        self.owner = users.create_user("host", password="x")
+        self.guest = users.create_user("guest", password="x")
+        self.chat = Chat.objects.create(title="Members", created_by=self.owner)
+        self.service = MembershipService()
+
+    def can_read(self, user):
+        self.client.force_login(user)
+        url = reverse("message-list", kwargs={"chat_pk": self.chat.pk})
+        return status.is_success(self.client.get(url).status_code)
+
+    def test_membership_is_answered_from_the_cache(self):
+        self.chat.participants.add(self.guest)
+        self.assertTrue(self.service.is_member(self.guest, self.chat.pk))
+        with self.assertNumQueries(0):
+            self.assertTrue(self.service.is_member(self.guest, self.chat.pk))
+            self.assertFalse(self.service.is_member(self.guest, self.chat.pk + 1))
+
+    def test_participant_changes_invalidate_access(self):
+        self.assertFalse(self.can_read(self.guest))
+        self.chat.participants.add(self.guest)
+        self.assertTrue(self.can_read(self.guest))
+        self.chat.participants.remove(self.guest)
+        self.assertFalse(self.can_read(self.guest))
+
+        self.guest.participants_chats.add(self.chat)
+        self.assertTrue(self.can_read(self.guest))
+        self.guest.participants_chats.clear()
+        self.assertFalse(self.can_read(self.guest))
+
+        self.chat.participants.set([self.guest, self.owner])
+        self.assertTrue(self.can_read(self.guest))
+        self.chat.participants.clear()
+        self.assertFalse(self.can_read(self.guest))
+        self.assertFalse(self.can_read(self.owner))
+
+    def test_deleting_a_chat_invalidates_access(self):
+        other = Chat.objects.create(title="Other", created_by=self.owner)
+        for chat in (self.chat, other):
+            chat.participants.add(self.guest)
+        self.assertEqual(self.service.chat_ids(self.guest.pk), {self.chat.pk, other.pk})
+
+        ChatDeletionService().tombstone(self.chat.pk)
+        self.assertEqual(self.service.chat_ids(self.guest.pk), {other.pk})
+        other.delete()
+        self.assertEqual(self.service.chat_ids(self.guest.pk), set())
+
+
+# The baseline was recorded with both caches on, as a deployment with a
+# shared cache runs them.
+@override_settings(**SHARED_CACHES)
+class QueryBudgetTests(TestCase):
+    """
+    No benchmark case may issue more queries than the stored baseline.
+
+    Latency budgets depend on the machine and are checked by
+    ``manage.py benchmark_chats`` instead.
+    """
+
+    def setUp(self):
+        # Ids are reused after other tests roll back; their entries are not.
+        caches["chats"].clear()
+
+    def test_query_counts_within_baseline(self):
+        baseline = load_baseline()
+        if baseline is None:
+            self.skipTest("No benchmark baseline stored")
+
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root):
+                data = seed_dataset(Dataset(**baseline["dataset"]))
+                results = BenchmarkRunner(repeat=1, warmup=0).run(all_cases(data))
+        self.assertEqual(compare(results, baseline, latency_threshold=None), [])
+        self.assertEqual(set(results), set(baseline["results"]))
+
+
+class QueryInstrumentationTests(TestCase):
+    def test_normalize_sql_ignores_literals_and_list_lengths(self):
+        self.assertEqual(
+            normalize_sql(
+                'SELECT "t"."id" FROM "t" WHERE "t"."id" IN (%s, %s) LIMIT 21'
+            ),
+            normalize_sql('SELECT "t"."id" FROM "t"  WHERE "t"."id" IN (%s) LIMIT 1'),
+        )
+
+    @override_settings(
+        CHATS_QUERY_INSTRUMENTATION={"SAMPLE_RATE": 1.0, "N_PLUS_ONE_THRESHOLD": 0}
+    )
+    def test_sampled_request_reports_queries(self):
+        user = get_user_model().objects.create_user("instrumented", password="x")
+        self.client.force_login(user)
+
+        with self.assertLogs("applications.chats.queries", "WARNING") as logs:
+            response = self.client.get(reverse("chat-list"))
+
+        self.assertRegex(
+            response["Server-Timing"], r'^db;dur=[\d.]+;desc="\d+ queries"'
+        )
+        self.assertIn("db-n-plus-one", response["Server-Timing"])
+        record = json.loads(logs.records[0].getMessage())
+        self.assertTrue(record["n_plus_one"])
+        self.assertGreater(record["queries"], 0)
+        self.assertLessEqual(len(record["top"]), 3)
+
+
+class SampleDataTests(TestCase):
+    def test_generated_data_is_consistent(self):
+        call_command(
+            "generate_sample_chats",
+            users=4,
+            chats=6,
+            messages=20,
+            participants=3,
+            files=2,
+            distribution="zipf",
+            seed=1,
+            verbosity=0,
+        )
+
+        self.assertEqual(Message.objects.count(), 120)
+        self.assertEqual(File.objects.count(), 12)
+        self.assertEqual(ChatInbox.objects.count(), 18)
+        self.assertEqual(ChatCounterService().repair(dry_run=True), [])
+        counts = sorted(Chat.objects.values_list("message_count", flat=True))
+        self.assertGreater(counts[-1], counts[0])
+        self.assertLess(
+            Message.objects.earliest("created_at").created_at,
+            Chat.objects.latest("created_at").created_at,
+        )
+
+
+@override_settings(
+    CHATS_DATABASE_ROUTING={"PRIMARY": "default", "REPLICAS": ["replica"]}
+)
+class ReplicaRoutingTests(SimpleTestCase):
+    router = ReplicaRouter()
+
+    def test_reads_stick_to_the_primary_after_a_write(self):
+        with pin_state(PinState()):
+            self.assertEqual(self.router.db_for_read(Message), "replica")
+            with use_primary():
+                self.assertEqual(self.router.db_for_read(Message), "default")
+            self.assertEqual(self.router.db_for_write(Message), "default")
+            self.assertEqual(self.router.db_for_read(Message), "default")
+        self.assertIsNone(self.router.db_for_read(get_user_model()))
+
+    def test_writes_pin_the_client_with_a_cookie(self):
+        def view(request):
+            if request.method == "POST":
+                self.router.db_for_write(Message)
+            return HttpResponse(self.router.db_for_read(Message))
+
+        middleware = ReadYourWritesMiddleware(view)
+        factory = RequestFactory()
+        response = middleware(factory.post("/"))
+        cookie = response.cookies["chats_primary_until"]
+        self.assertEqual(response.content, b"default")
+
+        request = factory.get("/")
+        request.COOKIES["chats_primary_until"] = cookie.value
+        self.assertEqual(middleware(request).content, b"default")
+        self.assertEqual(middleware(factory.get("/")).content, b"replica")
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("archivist", password="x")
+        self.chat = Chat.objects.create(title="Archive", created_by=self.user)
+        self.chat.participants.add(self.user)
+        Chat.objects.filter(pk=self.chat.pk).update(
+            created_at=timezone.now() - timezone.timedelta(days=30)
+        )
+        # The first 20 are old enough to archive.
+        archivable = 20
+        for index in range(30):
+            message = Message.objects.create(
+                chat=self.chat,
+                sender=self.user,
+                content=f"Message {index}",
+                context_index=index % 3,
+            )
+            age = timezone.timedelta(
+                days=archivable - index if index < archivable else 0
+            )
+            Message.objects.filter(pk=message.pk).update(
+                created_at=timezone.now() - age
+            )
+        # Backdating bypasses the counters; settle them before archiving.
+        ChatCounterService().repair()
+        self.client.force_login(self.user)
+        self.url = reverse("message-list", kwargs={"chat_pk": self.chat.pk})
+
+    def page_through(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url).json()
+            ids += [message["id"] for message in response["results"]]
+            url = response["next"]
+        return ids
+
+    def test_pages_read_both_tiers(self):
+        before = self.page_through(f"{self.url}?page_size=7")
+
+        archived = ArchiveService(segment_size=8).archive(
+            timezone.now() - timezone.timedelta(days=5)
+        )
+
+        self.assertEqual(archived, 16)
+        self.assertEqual(Message.objects.filter(chat=self.chat).count(), 14)
+        self.assertEqual(
+            list(MessageSegment.objects.values_list("message_count", flat=True)),
+            [8, 8],
+        )
+        self.assertEqual(self.page_through(f"{self.url}?page_size=7"), before)
+        self.assertEqual(ChatCounterService().repair(dry_run=True), [])
+
+        # Paging backwards from the newest page crosses into the cold tier.
+        response = self.client.get(f"{self.url}?page_size=20").json()
+        ids = [message["id"] for message in response["results"]]
+        response = self.client.get(response["next"]).json()
+        previous = self.client.get(response["previous"]).json()
+        self.assertEqual([message["id"] for message in previous["results"]], ids)
+
+    def test_archived_messages_are_found_by_id_and_context(self):
+        oldest = Message.objects.filter(chat=self.chat).earliest("created_at")
+        context = self.client.get(
+            reverse("message-context", kwargs={"chat_pk": self.chat.pk}),
+            {"context_index": 0},
+        ).json()
+        ArchiveService(segment_size=8).archive(
+            timezone.now() - timezone.timedelta(days=5)
+        )
+        self.assertFalse(Message.objects.filter(pk=oldest.pk).exists())
+
+        url = reverse(
+            "message-detail", kwargs={"chat_pk": self.chat.pk, "pk": oldest.pk}
+        )
+        # The async view, then DRF's.
+        for suffix in ("", "?format=json"):
+            response = self.client.get(url + suffix)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()["content"], oldest.content)
+        self.assertEqual(
+            self.client.get(
+                reverse("message-context", kwargs={"chat_pk": self.chat.pk}),
+                {"context_index": 0},
+            ).json(),
+            context,
+        )
+
+        missing = reverse("message-detail", kwargs={"chat_pk": self.chat.pk, "pk": 0})
+        self.assertEqual(self.client.get(missing).status_code, 404)
+
+    def test_backdated_hot_messages_merge_into_the_archive(self):
+        service = ArchiveService(segment_size=8)
+        service.archive(timezone.now() - timezone.timedelta(days=5))
+        # Imported after archival, yet older than every archived message.
+        imported = Message.objects.create(
+            chat=self.chat, sender=self.user, content="Imported"
+        )
+        Message.objects.filter(pk=imported.pk).update(
+            created_at=timezone.now() - timezone.timedelta(days=25)
+        )
+
+        # Archival leaves it hot rather than overlap the segments.
+        self.assertEqual(service.archive(timezone.now()), 14)
+        self.assertEqual(list(Message.objects.filter(chat=self.chat)), [imported])
+
+        ids = self.page_through(f"{self.url}?page_size=7")
+        self.assertEqual(ids[0], imported.pk)
+        self.assertEqual(sorted(ids[1:]), ids[1:])
+        self.assertEqual(len(set(ids)), 31)
+        self.assertEqual(
+            [
+                record["id"]
+                for record in ChatExportService(chunk_size=4).records(self.chat.pk)
+            ],
+            ids,
+        )
+
+        # Walking back from the last page reads newest first.
+        page = self.client.get(f"{self.url}?page_size=7").json()
+        while page["next"]:
+            page = self.client.get(page["next"]).json()
+        backwards = [message["id"] for message in page["results"]]
+        while page["previous"]:
+            page = self.client.get(page["previous"]).json()
+            backwards = [message["id"] for message in page["results"]] + backwards
+        self.assertEqual(backwards, ids)
+
+
+class BlobTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        settings = override_settings(MEDIA_ROOT=self.media_root.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.user = get_user_model().objects.create_user("uploader", password="x")
+        self.chats = [
+            Chat.objects.create(title=f"Chat {i}", created_by=self.user)
+            for i in range(2)
+        ]
+        for chat in self.chats:
+            chat.participants.add(self.user)
+        self.client.force_login(self.user)
+
+    def upload(self, chat, name, content):
+        response = self.client.post(
+            reverse("file-list", kwargs={"chat_pk": chat.pk}),
+            {"file": SimpleUploadedFile(name, content)},
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        return File.objects.get(pk=response.json()["id"])
+
+    def test_same_content_is_stored_once(self):
+        first = self.upload(self.chats[0], "report.pdf", b"quarterly numbers")
+        second = self.upload(self.chats[1], "copy.pdf", b"quarterly numbers")
+        other = self.upload(self.chats[1], "report.pdf", b"other numbers")
+
+        blob = first.blob
+        self.assertEqual(second.blob, blob)
+        self.assertNotEqual(other.blob, blob)
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 2)
+        self.assertEqual(second.file.name, blob.file.name)
+        self.assertEqual(
+            (first.file_name, second.file_name), ("report.pdf", "copy.pdf")
+        )
+
+        response = self.client.get(
+            reverse(
+                "file-download", kwargs={"chat_pk": self.chats[1].pk, "pk": second.pk}
+            )
+        )
+        self.assertEqual(b"".join(response.streaming_content), b"quarterly numbers")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 1)
+        self.assertTrue(blob.file.storage.exists(blob.file.name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.chats[1].delete()
+        self.assertFalse(Blob.objects.exists())
+        self.assertFalse(blob.file.storage.exists(blob.file.name))
+
+    def test_migrate_legacy_files(self):
+        storage = File._meta.get_field("file").storage
+        names = [
+            storage.save(f"chat_files/{chat.pk}/notes.txt", ContentFile(b"shared"))
+            for chat in self.chats
+        ]
+        File.objects.bulk_create(
+            File(
+                chat=chat,
+                file=name,
+                file_name="notes.txt",
+                file_type="text/plain",
+                file_size=6,
+                uploaded_by=self.user,
+            )
+            for chat, name in zip(self.chats, names)
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            totals = BlobService().migrate_legacy()
+
+        self.assertEqual(totals, {"files": 2, "blobs": 1, "missing": 0, "reclaimed": 6})
+        blob = Blob.objects.get()
+        self.assertEqual(blob.ref_count, 2)
+        self.assertEqual(
+            set(File.objects.values_list("file", flat=True)), {blob.file.name}
+        )
+        self.assertFalse(any(storage.exists(name) for name in names))
+
+
+class JobTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        settings = override_settings(MEDIA_ROOT=self.media_root.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.user = get_user_model().objects.create_user("worker", password="x")
+        self.chat = Chat.objects.create(title="Jobs", created_by=self.user)
+        self.chat.participants.add(self.user)
+
+    def test_upload_is_inspected_in_the_background(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("file-list", kwargs={"chat_pk": self.chat.pk}),
+            {
+                "file": SimpleUploadedFile(
+                    "scan", b"%PDF-1.7 ...", content_type="application/octet-stream"
+                )
+            },
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        job = Job.objects.get()
+        self.assertEqual(job.payload, {"file_id": response.json()["id"]})
+
+        self.assertEqual(JobService().run_batch(), 1)
+        self.assertFalse(Job.objects.exists())
+        self.assertEqual(File.objects.get().file_type, "application/pdf")
+
+    def test_failed_jobs_back_off_then_give_up(self):
+        file_obj = File.objects.bulk_create(
+            [
+                File(
+                    chat=self.chat,
+                    file="chat_files/missing.bin",
+                    file_name="missing.bin",
+                    file_type="application/octet-stream",
+                    file_size=1,
+                    uploaded_by=self.user,
+                )
+            ]
+        )[0]
+        service = JobService()
+        job = service.enqueue(
+            "chats.inspect_file", {"file_id": file_obj.pk}, max_attempts=2
+        )
+
+        service.run_batch()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.PENDING, 1))
+        self.assertGreater(job.available_at, timezone.now())
+        self.assertIn("FileNotFoundError", job.last_error)
+        self.assertEqual(service.run_batch(), 0)
+
+        Job.objects.update(available_at=timezone.now())
+        service.run_batch()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+        self.assertEqual(service.retry_failed(), 1)
+        self.assertEqual(Job.objects.claimable(timezone.now()).count(), 1)
+
+    def test_expired_lease_passes_the_job_on(self):
+        first, second = JobService("first"), JobService("second")
+        first.enqueue("chats.inspect_file", {"file_id": 0})
+
+        [job] = first.claim()
+        self.assertEqual(second.claim(), [])
+
+        Job.objects.update(available_at=timezone.now())
+        [taken_over] = second.claim()
+        self.assertEqual((taken_over.attempts, taken_over.locked_by), (2, "second"))
+        first.complete(job)
+        self.assertTrue(Job.objects.exists())
+        second.complete(taken_over)
+        self.assertFalse(Job.objects.exists())
+
+
+class DeletionTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        settings = override_settings(MEDIA_ROOT=self.media_root.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.user = get_user_model().objects.create_user("deleter", password="x")
+        self.chat = Chat.objects.create(title="Doomed", created_by=self.user)
+        self.chat.participants.add(self.user)
+        for index in range(5):
+            Message.objects.create(
+                chat=self.chat, sender=self.user, content=f"Archived {index}"
+            )
+        ArchiveService().archive_segment(
+            self.chat.pk, timezone.now() + timezone.timedelta(seconds=1)
+        )
+        for index in range(7):
+            Message.objects.create(
+                chat=self.chat, sender=self.user, content=f"Message {index}"
+            )
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("file-list", kwargs={"chat_pk": self.chat.pk}),
+            {"file": SimpleUploadedFile("notes.txt", b"notes")},
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        Job.objects.all().delete()
+
+    def test_delete_hides_the_chat_then_purges_it_in_batches(self):
+        blob = Blob.objects.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(
+                reverse("chat-detail", kwargs={"pk": self.chat.pk})
+            )
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Chat.objects.filter(pk=self.chat.pk).exists())
+        self.assertEqual(list(Chat.all_objects.deleted()), [self.chat])
+        self.assertFalse(ChatInbox.objects.exists())
+        response = self.client.get(
+            reverse("message-list", kwargs={"chat_pk": self.chat.pk})
+        )
+        self.assertEqual(response.status_code, 404)
+
+        # 7 messages: the first job stops after two full batches and queues
+        # the second, which purges the rest.
+        service = JobService()
+        with override_settings(CHATS_DELETION={"BATCH_SIZE": 2, "BATCHES_PER_JOB": 2}):
+            for remaining in (1, 0):
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.assertEqual(service.run_batch(), 1)
+                self.assertEqual(Job.objects.count(), remaining)
+        self.assertFalse(Chat.all_objects.filter(pk=self.chat.pk).exists())
+        self.assertFalse(Message.objects.exists())
+        self.assertFalse(MessageSegment.objects.exists())
+        self.assertFalse(File.objects.exists())
+        self.assertFalse(Blob.objects.exists())
+        self.assertFalse(blob.file.storage.exists(blob.file.name))
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        users = get_user_model().objects
+        self.user = users.create_user("exporter", password="x")
+        self.outsider = users.create_user("outsider", password="x")
+        self.chat = Chat.objects.create(title="Export", created_by=self.user)
+        self.chat.participants.add(self.user)
+        for index in range(5):
+            Message.objects.create(
+                chat=self.chat, sender=self.user, content=f"Archived, {index}"
+            )
+        ArchiveService().archive_segment(
+            self.chat.pk, timezone.now() + timezone.timedelta(seconds=1)
+        )
+        for index in range(4):
+            Message.objects.create(
+                chat=self.chat, sender=self.user, content=f'Message "{index}"'
+            )
+        File.objects.bulk_create(
+            [
+                File(
+                    chat=self.chat,
+                    file="chat_files/notes.txt",
+                    file_name="notes.txt",
+                    file_type="text/plain",
+                    file_size=5,
+                    uploaded_by=self.user,
+                )
+            ]
+        )
+        self.client.force_login(self.user)
+        self.url = reverse("chat-export", kwargs={"pk": self.chat.pk})
+
+    def export(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content)
+
+    @override_settings(CHATS_EXPORT={"CHUNK_SIZE": 2})
+    def test_export_streams_both_tiers(self):
+        api = self.client.get(
+            reverse("message-list", kwargs={"chat_pk": self.chat.pk}),
+            {"page_size": 100},
+        ).json()["results"]
+        lines = self.export(files="1").decode().splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual(
+            records[:-1], [{"type": "message", **message} for message in api]
+        )
+        self.assertEqual(len(api), 9)
+        self.assertEqual(
+            (records[-1]["type"], records[-1]["file_name"]), ("file", "notes.txt")
+        )
+
+        self.assertEqual(
+            gzip.decompress(self.export(files="1", gzip="1")).decode().splitlines(),
+            lines,
+        )
+        rows = list(csv.DictReader(io.StringIO(self.export(output="csv").decode())))
+        self.assertEqual(
+            [(row["id"], row["content"]) for row in rows],
+            [(str(message["id"]), message["content"]) for message in api],
+        )
+
+    def test_export_checks_membership_and_format(self):
+        response = self.client.get(self.url, {"output": "xml"})
+        self.assertEqual(response.status_code, 400)
+        self.client.force_login(self.outsider)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_csv_cells_never_start_a_formula(self):
+        contents = ("=HYPERLINK(1)", "+1", "-1", "@SUM(A1)", "a = b")
+        for content in contents:
+            Message.objects.create(chat=self.chat, sender=self.user, content=content)
+
+        rows = list(csv.DictReader(io.StringIO(self.export(output="csv").decode())))
+        self.assertEqual(
+            [row["content"] for row in rows[-len(contents) :]],
+            ["'=HYPERLINK(1)", "'+1", "'-1", "'@SUM(A1)", "a = b"],
+        )
+        # NDJSON keeps the text as it is.
+        record = json.loads(self.export().decode().splitlines()[-1])
+        self.assertEqual(record["content"], "a = b")
+
+    # Small buffers, so the export takes several chunks.
+    @mock.patch("applications.chats.services.export_service.BUFFER_BYTES", 16)
+    async def test_export_streams_under_asgi(self):
+        await self.async_client.aforce_login(self.user)
+        messages, warned = await asgi_get(self.url, self.async_client)
+
+        self.assertEqual(messages[0]["status"], 200)
+        bodies = [message for message in messages[1:] if message.get("body")]
+        self.assertGreater(len(bodies), 1)
+        lines = b"".join(message["body"] for message in bodies).splitlines()
+        self.assertEqual(len(lines), 9)
+        # A synchronous iterator would have been read whole, with a warning.
+        self.assertEqual([text for text in warned if "iterator" in text], [])
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        users = get_user_model().objects
+        self.user = users.create_user("async", password="x")
+        self.outsider = users.create_user("outsider", password="x")
+        self.chat = Chat.objects.create(title="Async", created_by=self.user)
+        self.chat.participants.add(self.user)
+        for index in range(5):
+            self.message = Message.objects.create(
+                chat=self.chat, sender=self.user, content=f"Message {index}"
+            )
+        self.client.force_login(self.user)
+
+    def both(self, method, url, **kwargs):
+        """Responses of the DRF viewset and of the async view, in that order."""
+        responses = []
+        for enabled in (False, True):
+            with override_settings(CHATS_ASYNC_VIEWS={"ENABLED": enabled}):
+                response = getattr(self.client, method)(url, **kwargs)
+            responses.append(
+                (
+                    response.status_code,
+                    response.content,
+                    response.get("ETag"),
+                    response.get("Vary"),
+                )
+            )
+        return responses
+
+    def test_responses_match_drf(self):
+        chat = {"pk": self.chat.pk}
+        messages = {"chat_pk": self.chat.pk}
+        urls = [
+            reverse("chat-list"),
+            reverse("chat-detail", kwargs=chat),
+            reverse("chat-detail", kwargs={"pk": 0}),
+            reverse("message-list", kwargs=messages),
+            reverse("message-list", kwargs=messages) + "?page_size=2",
+            reverse("message-list", kwargs=messages) + "?cursor=bogus",
+            reverse("message-list", kwargs={"chat_pk": 0}),
+            reverse("message-detail", kwargs={**messages, "pk": self.message.pk}),
+            reverse("message-detail", kwargs={**messages, "pk": 0}),
+        ]
+        for url in urls:
+            drf, native = self.both("get", url)
+            self.assertEqual(native, drf, url)
+
+        url = reverse("message-list", kwargs=messages)
+        etag = self.client.get(url)["ETag"]
+        drf, native = self.both("get", url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(native[0], 304)
+        self.assertEqual(native, drf)
+
+        for body in ({"content": ""}, "{"):
+            drf, native = self.both(
+                "post", url, data=body, content_type="application/json"
+            )
+            self.assertEqual(native, drf)
+
+    def test_create_validates_off_the_event_loop(self):
+        def validate(serializer, attrs):
+            # A database-backed validator, which the event loop would refuse.
+            self.assertTrue(Chat.objects.filter(pk=self.chat.pk).exists())
+            return attrs
+
+        url = reverse("message-list", kwargs={"chat_pk": self.chat.pk})
+        with mock.patch.object(MessageSerializer, "validate", validate):
+            response = self.client.post(
+                url,
+                {"chat_id": self.chat.pk, "content": "Checked"},
+                content_type="application/json",
+            )
+        self.assertEqual(response.status_code, 201)
+
+    def test_create_checks_csrf_and_membership(self):
+        url = reverse("message-list", kwargs={"chat_pk": self.chat.pk})
+        data = {"chat_id": self.chat.pk, "content": "Hello"}
+        response = self.client.post(url, data, content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["sender"]["id"], self.user.pk)
+        self.assertEqual(self.chat.messages.filter(content="Hello").count(), 1)
+
+        client = self.client_class(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        response = client.post(url, data, content_type="application/json")
+        self.assertEqual(response.status_code, 403)
+        self.assertIn("CSRF Failed", response.json()["detail"])
+
+        self.client.force_login(self.outsider)
+        response = self.client.post(url, data, content_type="application/json")
+        self.assertEqual(response.status_code, 404)
+
+        # Requests the async views cannot answer like DRF are left to it.
+        self.client.logout()
+        response = self.client.get(url, HTTP_AUTHORIZATION="Basic YXN5bmM6eA==")
+        self.assertEqual(response.status_code, 200)
+        self.client.force_login(self.user)
+        response = self.client.get(url, HTTP_ACCEPT="text/html")
+        self.assertEqual(response["Content-Type"], "text/html; charset=utf-8")
@@ -0,0 +1,11 @@
+from .hashing_upload_handler import (
+    HashingMemoryFileUploadHandler,
+    HashingTemporaryFileUploadHandler,
+    HashingUploadHandler,
+)
+
+__all__ = [
+    "HashingUploadHandler",
+    "HashingMemoryFileUploadHandler",
+    "HashingTemporaryFileUploadHandler",
+]
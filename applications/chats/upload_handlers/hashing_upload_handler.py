@@ -0,0 +1,43 @@
+import hashlib
+
+from django.core.files.uploadhandler import (
+    MemoryFileUploadHandler,
+    TemporaryFileUploadHandler,
+)
+
+
+class HashingUploadHandler:
+    """
+    Hash uploaded files while they stream in.
+
+    Mixed into Django's upload handlers: the handler that keeps a file's
+    chunks also feeds them to SHA-256, and the finished upload carries the
+    hex digest in ``sha256``, so storing it as a blob does not read it again.
+    """
+
+    def new_file(self, *args, **kwargs):
+        # Before super(): the memory handler stops the handler chain there.
+        self.sha256 = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        passed_on = super().receive_data_chunk(raw_data, start)
+        if passed_on is None:
+            self.sha256.update(raw_data)
+        return passed_on
+
+    def file_complete(self, file_size):
+        upload = super().file_complete(file_size)
+        if upload is not None:
+            upload.sha256 = self.sha256.hexdigest()
+        return upload
+
+
+class HashingMemoryFileUploadHandler(HashingUploadHandler, MemoryFileUploadHandler):
+    """``MemoryFileUploadHandler`` that hashes what it keeps."""
+
+
+class HashingTemporaryFileUploadHandler(
+    HashingUploadHandler, TemporaryFileUploadHandler
+):
+    """``TemporaryFileUploadHandler`` that hashes what it keeps."""
@@ -1,11 +1,56 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import ChatViewSet, MessageViewSet, FileViewSet
+from .views import (
+    ChatViewSet,
+    MessageViewSet,
+    FileViewSet,
+    UploadSessionViewSet,
+    InboxViewSet,
+    async_route,
+    chat_detail,
+    chat_events,
+    chat_list,
+    message_create,
+    message_detail,
+    message_list,
+    message_since,
+)
 
 # Create the main router
 router = DefaultRouter()
 router.register(r"chats", ChatViewSet, basename="chat")
-router.register(r"messages", MessageViewSet, basename="message")
-router.register(r"files", FileViewSet, basename="file")
+router.register(r"inbox", InboxViewSet, basename="inbox")
+router.register(
+    r"chats/(?P<chat_pk>[^/.]+)/messages", MessageViewSet, basename="message"
+)
+router.register(r"chats/(?P<chat_pk>[^/.]+)/files", FileViewSet, basename="file")
+router.register(
+    r"chats/(?P<chat_pk>[^/.]+)/uploads", UploadSessionViewSet, basename="upload"
+)
+
+
+def router_view(name):
+    """The view the router serves a named route with."""
+    return next(pattern.callback for pattern in router.urls if pattern.name == name)
+
 
 # Combine the URL patterns
-urlpatterns = router.urls
+urlpatterns = [
+    path("chats/<int:chat_pk>/events/", chat_events, name="chat-events"),
+    # Ahead of the router, whose message detail route would match "since".
+    path("chats/<int:chat_pk>/messages/since/", message_since, name="message-since"),
+    # The busiest routes, answered by async views that hand whatever they do
+    # not serve natively to the router's views. Unnamed: reverse() finds the
+    # router's patterns, which match the same paths.
+    path("chats/", async_route(router_view("chat-list"), get=chat_list)),
+    path("chats/<int:pk>/", async_route(router_view("chat-detail"), get=chat_detail)),
+    path(
+        "chats/<int:chat_pk>/messages/",
+        async_route(router_view("message-list"), get=message_list, post=message_create),
+    ),
+    path(
+        "chats/<int:chat_pk>/messages/<int:pk>/",
+        async_route(router_view("message-detail"), get=message_detail),
+    ),
+    *router.urls,
+]
@@ -1,9 +1,26 @@
 from .chat_view import ChatViewSet
 from .message_view import MessageViewSet
 from .file_view import FileViewSet
+from .upload_session_view import UploadSessionViewSet
+from .inbox_view import InboxViewSet
+from .chat_events_view import chat_events
+from .message_since_view import message_since
+from .async_route import async_route
+from .chat_async_view import chat_detail, chat_list
+from .message_async_view import message_create, message_detail, message_list
 
 __all__ = [
     "ChatViewSet",
     "MessageViewSet",
     "FileViewSet",
+    "UploadSessionViewSet",
+    "InboxViewSet",
+    "chat_events",
+    "message_since",
+    "async_route",
+    "chat_detail",
+    "chat_list",
+    "message_create",
+    "message_detail",
+    "message_list",
 ]
@@ -0,0 +1,142 @@
+from io import BytesIO
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.authentication import CSRFCheck
+from rest_framework.exceptions import APIException
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from ..renderers import FastJSONRenderer
+
+JSON = "application/json"
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Accept headers DRF answers with JSON; anything else, like a browser asking
+# for the browsable API, is left to it.
+JSON_ACCEPT = ("", "*/*", JSON)
+
+renderer = FastJSONRenderer()
+
+
+def async_views_config() -> dict:
+    """``CHATS_ASYNC_VIEWS`` with defaults filled in."""
+    config = getattr(settings, "CHATS_ASYNC_VIEWS", {})
+    return {"ENABLED": config.get("ENABLED", True)}
+
+
+def serves_natively(request) -> bool:
+    """
+    Whether an async handler can answer a request exactly like DRF would.
+
+    That takes session authentication, a JSON response and, with a body, a
+    JSON request. Basic authentication, format suffixes and other media
+    types go through DRF's own authentication and negotiation instead.
+    """
+    if "HTTP_AUTHORIZATION" in request.META or "format" in request.GET:
+        return False
+    if request.headers.get("Accept", "").replace(" ", "") not in JSON_ACCEPT:
+        return False
+    return request.method in SAFE_METHODS or request.content_type == JSON
+
+
+def api_request(request) -> Request:
+    """
+    Wrap a request like DRF's content negotiation would for JSON.
+
+    Paginators read query parameters from the wrapper, and entity tags cover
+    its ``accepted_media_type``, so they match the DRF view's.
+    """
+    api = Request(request)
+    api.accepted_renderer = renderer
+    api.accepted_media_type = JSON
+    return api
+
+
+def parse_json(request):
+    """
+    Parse a JSON request body like DRF's ``JSONParser``.
+
+    Raises:
+        ParseError: The body is not valid JSON
+    """
+    if not request.body:
+        return {}
+    return JSONParser().parse(BytesIO(request.body))
+
+
+def json_response(data, status: int = 200) -> HttpResponse:
+    """Render data to the same bytes as a DRF ``Response``."""
+    return HttpResponse(renderer.render(data), content_type=JSON, status=status)
+
+
+def csrf_failure(request):
+    """Why a session-authenticated unsafe request fails CSRF, or None."""
+    check = CSRFCheck(lambda request: None)
+    check.process_request(request)
+    return check.process_view(request, None, (), {})
+
+
+async def _serve(handler, request, *args, **kwargs) -> HttpResponse:
+    user = await request.auser()
+    if not user.is_authenticated:
+        return json_response(
+            {"detail": "Authentication credentials were not provided."}, status=403
+        )
+    if request.method not in SAFE_METHODS:
+        reason = csrf_failure(request)
+        if reason:
+            return json_response({"detail": f"CSRF Failed: {reason}"}, status=403)
+    try:
+        return await handler(request, user, *args, **kwargs)
+    except Http404 as e:
+        return json_response({"detail": str(e) or "Not found."}, status=404)
+    except APIException as e:
+        # Like DRF's exception handler: invalid cursors, malformed JSON.
+        data = e.detail if isinstance(e.detail, (list, dict)) else {"detail": e.detail}
+        return json_response(data, status=e.status_code)
+
+
+def async_route(fallback, **handlers):
+    """
+    Serve some methods of a DRF route with native async handlers.
+
+    A handler is called as ``handler(request, user, **kwargs)`` for the
+    method it is registered under (``get=...``, ``post=...``) once the user
+    is authenticated from the session, and CSRF checked for unsafe methods,
+    on the event loop. It reads through the async ORM, so the request holds
+    a thread only while one of its queries runs. Other methods, and requests a handler
+    cannot answer exactly like DRF (see ``serves_natively``), are passed to
+    the synchronous ``fallback`` view, as are all requests when
+    ``CHATS_ASYNC_VIEWS`` is disabled.
+
+    Args:
+        fallback: DRF view of the route
+        handlers: Async handlers keyed by lowercase HTTP method
+
+    Returns:
+        Async view for the URL pattern
+    """
+    fallback = sync_to_async(fallback)
+
+    # Like DRF views, CSRF is only enforced for session-authenticated users,
+    # which ``_serve`` does.
+    @csrf_exempt
+    async def view(request, *args, **kwargs):
+        handler = handlers.get(request.method.lower())
+        if (
+            handler is None
+            or not async_views_config()["ENABLED"]
+            or not serves_natively(request)
+        ):
+            return await fallback(request, *args, **kwargs)
+
+        response = await _serve(handler, request, *args, **kwargs)
+        # Negotiated like DRF's responses, 304s included.
+        patch_vary_headers(response, ["Accept"])
+        return response
+
+    return view
@@ -0,0 +1,43 @@
+from django.http import Http404
+from ..models import Chat
+from ..pagination import ChatKeysetPagination
+from ..repositories.chat_repository import ChatRepository
+from ..responses import (
+    add_validators,
+    not_modified_response,
+    representation_validators,
+)
+from ..serializers import ChatSerializer, ChatSummarySerializer
+from .async_route import api_request, json_response
+from .chat_view import DETAIL_VALIDATORS
+
+chat_repository = ChatRepository()
+
+
+async def chat_list(request, user):
+    """``ChatViewSet.list`` on the async ORM."""
+    request = api_request(request)
+    paginator = ChatKeysetPagination()
+    page = await paginator.apaginate_queryset(Chat.objects.with_summary(), request)
+    data = ChatSummarySerializer(page, many=True, context={"request": request}).data
+    return json_response(paginator.get_paginated_response(data).data)
+
+
+async def chat_detail(request, user, pk):
+    """``ChatViewSet.retrieve`` on the async ORM."""
+    request = api_request(request)
+    state = await chat_repository.aget_validators(pk, *DETAIL_VALIDATORS)
+    if state is None:
+        raise Http404("No Chat matches the given query.")
+
+    etag, last_modified = representation_validators(request, state)
+    response = not_modified_response(request, etag, last_modified)
+    if response is not None:
+        return response
+    try:
+        # The nested relations are prefetched in the same thread hop.
+        chat = await Chat.objects.with_details().aget(pk=pk)
+    except Chat.DoesNotExist:
+        raise Http404("No Chat matches the given query.")
+    data = ChatSerializer(chat, context={"request": request}).data
+    return add_validators(json_response(data), etag, last_modified)
@@ -0,0 +1,57 @@
+import json
+
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from ..models import Chat
+from ..realtime import get_hub
+
+DEFAULT_HEARTBEAT_SECONDS = 15
+
+
+def format_sse(event: dict) -> str:
+    """Encode a hub event as a Server-Sent Events frame."""
+    return f"event: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+async def stream_events(chat_id: int, heartbeat: float):
+    """
+    Yield SSE frames for a chat until the client disconnects.
+
+    A comment line is sent whenever the chat has been quiet for ``heartbeat``
+    seconds, so proxies keep the connection open.
+    """
+    with get_hub().subscribe(chat_id) as subscription:
+        yield "retry: 3000\n\n"
+        while True:
+            event = await subscription.get(timeout=heartbeat)
+            yield format_sse(event) if event is not None else ": keepalive\n\n"
+
+
+@require_GET
+async def chat_events(request, chat_pk):
+    """
+    Stream a chat's events to a participant as Server-Sent Events.
+
+    Emits ``message.created``, ``message.updated``, ``messages.bulk_created``
+    and ``file.created`` events, each with the same JSON representation the REST
+    endpoints return. Needs an ASGI server: the connection waits on an asyncio
+    queue, not on a thread.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse(
+            {"detail": "Authentication credentials were not provided."}, status=403
+        )
+    if not await Chat.objects.filter(id=chat_pk, participants=user).aexists():
+        return JsonResponse({"detail": "Not found."}, status=404)
+
+    heartbeat = getattr(settings, "CHATS_REALTIME", {}).get(
+        "HEARTBEAT_SECONDS", DEFAULT_HEARTBEAT_SECONDS
+    )
+    response = StreamingHttpResponse(
+        stream_events(chat_pk, heartbeat), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
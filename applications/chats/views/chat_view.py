@@ -1,12 +1,73 @@
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from ..models import Chat
-from ..serializers import ChatSerializer
+from ..serializers import (
+    ChatSerializer,
+    ChatSummarySerializer,
+    ChatSearchResultSerializer,
+    MessageSearchResultSerializer,
+)
+from ..pagination import ChatKeysetPagination, SearchPagination
+from ..renderers import PassthroughRenderer
 from django.contrib.auth.models import User
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from drf_spectacular.types import OpenApiTypes
 from ..repositories.chat_repository import ChatRepository
+from ..responses import (
+    add_validators,
+    not_modified_response,
+    representation_validators,
+)
+from ..services import ChatExportService, MembershipService, SearchService
+from ..services.export_service import FORMATS
+
+# What the detail representation is built from: the chat row, its counters
+# and the newest message edit for messages, participants and files, and the
+# last rename of a user it shows. Deleting the newest message edit rewinds
+# those times, so revalidation goes by the ETag alone.
+DETAIL_VALIDATORS = (
+    "updated_at",
+    "message_count",
+    "last_message_id",
+    "messages_updated_at",
+    "file_count",
+    "total_file_bytes",
+    "files_max_id",
+    "files_uploaded_at",
+    "participant_count",
+    "participants_max_id",
+    "participants_user_sum",
+    "users_updated_at",
+)
+
+FLAG_VALUES = ("1", "true", "yes")
+
+SEARCH_PARAMETERS = [
+    OpenApiParameter(
+        name="q",
+        type=OpenApiTypes.STR,
+        location=OpenApiParameter.QUERY,
+        description="Words to search for; all of them must match",
+        required=True,
+    ),
+    OpenApiParameter(
+        name="cursor",
+        type=OpenApiTypes.STR,
+        location=OpenApiParameter.QUERY,
+        description="Pagination cursor from the previous page's next link",
+    ),
+    OpenApiParameter(
+        name="page_size",
+        type=OpenApiTypes.INT,
+        location=OpenApiParameter.QUERY,
+        description="Number of results per page (max 100)",
+    ),
+]
 
 
 @extend_schema(
@@ -23,14 +84,133 @@ class ChatViewSet(viewsets.ModelViewSet):
 
     serializer_class = ChatSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ChatKeysetPagination
     chat_repository = ChatRepository()
+    search_service = SearchService()
+    membership_service = MembershipService()
 
     def get_queryset(self):
-        return Chat.objects.all()
+        if self.action == "list":
+            return Chat.objects.with_summary()
+        return Chat.objects.with_details()
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return ChatSummarySerializer
+        return ChatSerializer
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
+    def perform_destroy(self, instance):
+        # Hidden at once, purged in the background: a chat with a long
+        # history is not deleted in the request's transaction.
+        self.chat_repository.delete_chat(instance.pk)
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        # The update drops the prefetched relations; reload them all at once
+        # instead of letting the nested serializers query message by message.
+        serializer.instance = self.get_queryset().get(pk=serializer.instance.pk)
+
+    @extend_schema(
+        description=(
+            "Retrieve a chat room with its participants, messages and files. "
+            "Responses carry a weak ETag; send it back in If-None-Match to "
+            "get 304 when nothing changed."
+        ),
+        responses={200: ChatSerializer, 304: {"description": "Not modified"}},
+    )
+    def retrieve(self, request, *args, **kwargs):
+        state = self.chat_repository.get_validators(
+            kwargs[self.lookup_url_kwarg or self.lookup_field], *DETAIL_VALIDATORS
+        )
+        if state is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        # Read before the body: a change in between yields a body newer than
+        # its ETag, which only costs the client one more full response.
+        etag, last_modified = representation_validators(request, state)
+        response = not_modified_response(request, etag, last_modified)
+        if response is not None:
+            return response
+        return add_validators(
+            super().retrieve(request, *args, **kwargs), etag, last_modified
+        )
+
+    @extend_schema(
+        description=(
+            "Download the chat's whole history, archived messages included, "
+            "oldest first. The export is streamed as it is read, so it can be "
+            "as long as the chat."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="output",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description="ndjson (default) or csv",
+                enum=list(FORMATS),
+            ),
+            OpenApiParameter(
+                name="files",
+                type=OpenApiTypes.BOOL,
+                location=OpenApiParameter.QUERY,
+                description="Also export the metadata of the chat's files",
+            ),
+            OpenApiParameter(
+                name="gzip",
+                type=OpenApiTypes.BOOL,
+                location=OpenApiParameter.QUERY,
+                description="Compress the export with gzip",
+            ),
+        ],
+        responses={
+            200: {
+                "type": "string",
+                "format": "binary",
+                "description": "One record per line, or CSV rows",
+            },
+            400: {
+                "type": "object",
+                "properties": {
+                    "error": {"type": "string", "example": "output must be one of ..."}
+                },
+            },
+            404: {"description": "Chat not found"},
+        },
+    )
+    @action(
+        detail=True,
+        methods=["get"],
+        renderer_classes=[*api_settings.DEFAULT_RENDERER_CLASSES, PassthroughRenderer],
+    )
+    def export(self, request, pk=None):
+        chat_id = self.membership_service.require_membership(request.user, pk)
+        # Not "format": DRF reads that one for content negotiation.
+        output = request.query_params.get("output", "ndjson")
+        if output not in FORMATS:
+            return Response(
+                {"error": f"output must be one of {', '.join(FORMATS)}"}, status=400
+            )
+        include_files = request.query_params.get("files", "").lower() in FLAG_VALUES
+        compress = request.query_params.get("gzip", "").lower() in FLAG_VALUES
+
+        export_service = ChatExportService()
+        # Under ASGI, Django would read a synchronous iterator whole first.
+        if isinstance(request._request, ASGIRequest):
+            export = export_service.aexport
+        else:
+            export = export_service.export
+        response = StreamingHttpResponse(
+            export(chat_id, output, include_files, compress),
+            content_type=export_service.content_type(output, compress),
+        )
+        filename = export_service.filename(chat_id, output, compress)
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        response["X-Accel-Buffering"] = "no"
+        return response
+
     @extend_schema(
         description="Add a user as a participant to the chat room",
         request={
@@ -118,3 +298,62 @@ class ChatViewSet(viewsets.ModelViewSet):
             return Response({"error": "Chat not found"}, status=404)
 
         return Response({"status": "participant removed"})
+
+    @extend_schema(
+        description=(
+            "Full-text search over the titles and prompts of the user's chats, "
+            "most relevant first"
+        ),
+        parameters=SEARCH_PARAMETERS,
+        responses={200: ChatSearchResultSerializer(many=True)},
+    )
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        text = request.query_params.get("q", "").strip()
+        if not text:
+            return Response({"error": "q is required"}, status=400)
+
+        paginator = SearchPagination()
+        results = paginator.paginate_search(
+            lambda after, limit: self.search_service.search_chats(
+                request.user, text, after=after, limit=limit
+            ),
+            request,
+        )
+        serializer = ChatSearchResultSerializer(results, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @extend_schema(
+        description=(
+            "Full-text search over the messages of the user's chats, most "
+            "relevant first, with highlighted snippets"
+        ),
+        parameters=[
+            *SEARCH_PARAMETERS,
+            OpenApiParameter(
+                name="chat",
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description="Only search this chat",
+            ),
+        ],
+        responses={200: MessageSearchResultSerializer(many=True)},
+    )
+    @action(detail=False, methods=["get"], url_path="search/messages")
+    def search_messages(self, request):
+        text = request.query_params.get("q", "").strip()
+        if not text:
+            return Response({"error": "q is required"}, status=400)
+        chat_id = request.query_params.get("chat")
+        if chat_id is not None and not chat_id.isdigit():
+            return Response({"error": "chat must be a chat ID"}, status=400)
+
+        paginator = SearchPagination()
+        results = paginator.paginate_search(
+            lambda after, limit: self.search_service.search_messages(
+                request.user, text, chat_id=chat_id, after=after, limit=limit
+            ),
+            request,
+        )
+        serializer = MessageSearchResultSerializer(results, many=True)
+        return paginator.get_paginated_response(serializer.data)
@@ -1,11 +1,15 @@
+from django.db import transaction
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.shortcuts import get_object_or_404
-from ..models import File, Chat
+from rest_framework.settings import api_settings
+from ..models import File
 from ..serializers import FileSerializer
+from ..renderers import PassthroughRenderer
+from ..responses import ranged_file_response
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
+from ..services import JobService, MembershipService
 
 
 @extend_schema(
@@ -36,43 +40,70 @@ class FileViewSet(viewsets.ModelViewSet):
 
     serializer_class = FileSerializer
     permission_classes = [permissions.IsAuthenticated]
+    membership_service = MembershipService()
+    job_service = JobService()
 
     def get_queryset(self):
-        chat_id = self.kwargs.get("chat_pk")
-        return File.objects.filter(
-            chat_id=chat_id, chat__participants=self.request.user
+        chat_id = self.membership_service.require_membership(
+            self.request.user, self.kwargs.get("chat_pk")
         )
+        return File.objects.filter(chat_id=chat_id).select_related("uploaded_by")
 
     def perform_create(self, serializer):
-        chat_id = self.kwargs.get("chat_pk")
-        chat = get_object_or_404(Chat, id=chat_id, participants=self.request.user)
-        serializer.save(chat=chat, uploaded_by=self.request.user)
+        chat_id = self.membership_service.require_membership(
+            self.request.user, self.kwargs.get("chat_pk")
+        )
+        with transaction.atomic():
+            file_obj = serializer.save(chat_id=chat_id, uploaded_by=self.request.user)
+            self.job_service.enqueue("chats.inspect_file", {"file_id": file_obj.pk})
 
     @extend_schema(
-        description="Download a file from the chat room",
+        description=(
+            "Download a file from the chat room. Supports single byte ranges "
+            "(206 Partial Content) and conditional requests via ETag and "
+            "Last-Modified."
+        ),
         responses={
             200: {
                 "type": "string",
                 "format": "binary",
                 "description": "The file content with appropriate headers for download",
             },
+            206: {
+                "type": "string",
+                "format": "binary",
+                "description": "The requested byte range of the file",
+            },
+            304: {"description": "The file has not changed"},
+            416: {"description": "The requested range cannot be satisfied"},
             500: {
                 "type": "object",
                 "properties": {"error": {"type": "string", "example": "Error message"}},
             },
         },
     )
-    @action(detail=True, methods=["get"])
+    @action(
+        detail=True,
+        methods=["get"],
+        renderer_classes=[*api_settings.DEFAULT_RENDERER_CLASSES, PassthroughRenderer],
+    )
     def download(self, request, chat_pk=None, pk=None):
         file_obj = self.get_object()
         try:
-            response = Response()
-            response["Content-Disposition"] = (
-                f'attachment; filename="{file_obj.file_name}"'
+            response = ranged_file_response(
+                request,
+                file_obj.file,
+                filename=file_obj.file_name,
+                content_type=file_obj.file_type,
+                etag=f'"{file_obj.pk}-{file_obj.file_size}-{int(file_obj.uploaded_at.timestamp())}"',
+                last_modified=file_obj.uploaded_at,
             )
-            response["Content-Type"] = file_obj.file_type
             response["X-Accel-Buffering"] = "no"
             return response
+        except FileNotFoundError:
+            return Response(
+                {"error": "File content not found"}, status=status.HTTP_404_NOT_FOUND
+            )
         except Exception as e:
             return Response(
                 {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
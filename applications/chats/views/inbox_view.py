@@ -0,0 +1,25 @@
+from rest_framework import mixins, permissions, viewsets
+from ..models import ChatInbox
+from ..serializers import ChatInboxSerializer
+from ..pagination import InboxKeysetPagination
+from drf_spectacular.utils import extend_schema
+
+
+@extend_schema(
+    tags=["Chats"],
+    description="The requesting user's chats, most recently active first",
+)
+class InboxViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    ViewSet listing the chats a user created or participates in.
+
+    Reads the denormalized ``ChatInbox`` rows, so a page is one range scan of
+    the user's inbox index whatever the number of chats or participants.
+    """
+
+    serializer_class = ChatInboxSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = InboxKeysetPagination
+
+    def get_queryset(self):
+        return ChatInbox.objects.for_user(self.request.user).select_related("chat")
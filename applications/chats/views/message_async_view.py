@@ -0,0 +1,67 @@
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from ..models import Message
+from ..pagination import MessageKeysetPagination
+from ..repositories.chat_repository import ChatRepository
+from ..responses import (
+    add_validators,
+    not_modified_response,
+    representation_validators,
+)
+from ..serializers import MessageRowSerializer, MessageSerializer
+from ..services import MembershipService, MessageHistory
+from .async_route import api_request, json_response, parse_json
+from .message_view import LIST_VALIDATORS
+
+chat_repository = ChatRepository()
+membership_service = MembershipService()
+
+
+async def message_list(request, user, chat_pk):
+    """``MessageViewSet.list`` on the async ORM."""
+    chat_id = await membership_service.arequire_membership(user, chat_pk)
+    request = api_request(request)
+    state = await chat_repository.aget_validators(chat_id, *LIST_VALIDATORS)
+    if state is None:
+        return await _list_rows(request, chat_id)
+
+    etag, last_modified = representation_validators(request, state)
+    response = not_modified_response(request, etag, last_modified)
+    if response is not None:
+        return response
+    return add_validators(await _list_rows(request, chat_id), etag, last_modified)
+
+
+async def _list_rows(request, chat_id):
+    paginator = MessageKeysetPagination()
+    queryset = Message.objects.filter(chat_id=chat_id).as_rows()
+    page = await paginator.apaginate_queryset(
+        MessageHistory(chat_id, queryset), request
+    )
+    data = MessageRowSerializer(page, many=True).data
+    return json_response(paginator.get_paginated_response(data).data)
+
+
+async def message_create(request, user, chat_pk):
+    """``MessageViewSet.create`` on the async ORM."""
+    serializer = MessageSerializer(data=parse_json(request))
+    # Validators may query the database, which needs a thread.
+    if not await sync_to_async(serializer.is_valid)():
+        return json_response(serializer.errors, status=400)
+    chat_id = await membership_service.arequire_membership(user, chat_pk)
+    message = await Message.objects.acreate(
+        **{**serializer.validated_data, "chat_id": chat_id, "sender": user}
+    )
+    return json_response(MessageSerializer(message).data, status=201)
+
+
+async def message_detail(request, user, chat_pk, pk):
+    """``MessageViewSet.retrieve`` on the async ORM."""
+    chat_id = await membership_service.arequire_membership(user, chat_pk)
+    # The list's read-only fast path, which renders the same fields and
+    # finds archived messages too.
+    queryset = Message.objects.filter(chat_id=chat_id).as_rows()
+    row = await MessageHistory(chat_id, queryset).aget(pk)
+    if row is None:
+        raise Http404("No Message matches the given query.")
+    return json_response(MessageRowSerializer(row).data)
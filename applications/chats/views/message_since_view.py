@@ -0,0 +1,195 @@
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework import status
+from rest_framework.exceptions import NotFound
+from rest_framework.utils.urls import remove_query_param
+from ..models import Message
+from ..pagination import MessageKeysetPagination
+from ..realtime import get_hub
+from ..serializers import MessageRowSerializer
+from ..services import MembershipService
+
+DEFAULT_POLL_TIMEOUT_SECONDS = 25
+DEFAULT_POLL_MAX_TIMEOUT_SECONDS = 60
+
+# Events meaning "the chat has messages the poller has not seen yet".
+WAKE_EVENTS = {"message.created", "messages.bulk_created"}
+
+membership_service = MembershipService()
+
+
+class SinceQuery:
+    """Parsed ``since`` parameters: where to start, how many and how long."""
+
+    def __init__(self, request):
+        config = getattr(settings, "CHATS_REALTIME", {})
+        self.paginator = MessageKeysetPagination()
+        self.after = request.GET.get("after")
+        self.cursor = request.GET.get("cursor")
+        if (self.after is None) == (self.cursor is None):
+            raise ValueError("Provide exactly one of after or cursor")
+
+        if self.after is not None:
+            self.after = self._parse_int(self.after, "after")
+            self.filter = Q(id__gt=self.after)
+            # Served by the chat_id index, whose entries are ordered by id.
+            self.ordering = ("id",)
+        else:
+            try:
+                position, _ = self.paginator.parse_cursor(self.cursor, Message)
+            except NotFound:
+                raise ValueError("Invalid cursor")
+            self.filter = self.paginator.get_keyset_filter(position, descending=False)
+            self.ordering = self.paginator.ordering
+
+        page_size = request.GET.get(self.paginator.page_size_query_param)
+        self.limit = (
+            min(
+                self._parse_int(page_size, "page_size", 1), self.paginator.max_page_size
+            )
+            if page_size is not None
+            else self.paginator.page_size
+        )
+
+        max_timeout = config.get(
+            "POLL_MAX_TIMEOUT_SECONDS", DEFAULT_POLL_MAX_TIMEOUT_SECONDS
+        )
+        timeout = request.GET.get("timeout")
+        try:
+            self.timeout = (
+                float(timeout)
+                if timeout is not None
+                else config.get("POLL_TIMEOUT_SECONDS", DEFAULT_POLL_TIMEOUT_SECONDS)
+            )
+        except ValueError:
+            raise ValueError("timeout must be a number of seconds")
+        if not 0 <= self.timeout < float("inf"):
+            raise ValueError("timeout must be a number of seconds")
+        self.timeout = min(self.timeout, max_timeout)
+
+    @staticmethod
+    def _parse_int(value, name, minimum=0):
+        try:
+            value = int(value)
+        except ValueError:
+            raise ValueError(f"{name} must be an integer")
+        if value < minimum:
+            raise ValueError(f"{name} must be at least {minimum}")
+        return value
+
+    def next_link(self, request, results):
+        """URL to poll next: a cursor after the newest returned message."""
+        if not results:
+            return request.build_absolute_uri()
+        self.paginator.base_url = remove_query_param(
+            request.build_absolute_uri(), "after"
+        )
+        self.paginator.fields = ["created_at", "id"]
+        return self.paginator.encode_cursor(self.paginator.get_position(results[-1]))
+
+
+def _detached(func):
+    """
+    Run blocking ORM code on the shared executor and hand its connection back.
+
+    Unlike Django's own async ORM calls, which pin each request to a dedicated
+    thread holding a connection until the response is sent, this borrows a
+    pooled thread only for the duration of the query. A parked poller
+    therefore holds neither a thread nor a database connection.
+    """
+
+    def run(*args):
+        try:
+            return func(*args)
+        finally:
+            connection.close()
+
+    return sync_to_async(run, thread_sensitive=False)
+
+
+def _fetch_messages(chat_id, query):
+    messages = (
+        Message.objects.filter(chat_id=chat_id)
+        .filter(query.filter)
+        .order_by(*query.ordering)
+        .as_rows()[: query.limit]
+    )
+    return MessageRowSerializer(messages, many=True).data
+
+
+def _authorize_and_fetch(request, chat_id, query):
+    if not request.user.is_authenticated:
+        return status.HTTP_403_FORBIDDEN, None
+    if not membership_service.is_member(request.user, chat_id):
+        return status.HTTP_404_NOT_FOUND, None
+    return status.HTTP_200_OK, _fetch_messages(chat_id, query)
+
+
+def _results_from_events(events, query):
+    """
+    Build the response straight from ``message.created`` payloads.
+
+    Returns ``None`` when the events do not describe the new messages fully
+    (a bulk insert, or events lost to queue overflow), so the caller must read
+    them from the database instead.
+    """
+    if any(event["type"] != "message.created" for event in events):
+        return None
+    results = sorted((event["data"] for event in events), key=lambda data: data["id"])
+    return results if len(results) <= query.limit else None
+
+
+@require_GET
+async def message_since(request, chat_pk):
+    """
+    Long-poll a chat for messages newer than a given id or cursor.
+
+    Returns at once when such messages exist. Otherwise the request is parked
+    on the realtime hub, without a thread or a database connection, until a
+    new message arrives or ``timeout`` seconds pass; then the new messages (or
+    an empty list) are returned along with a ``next`` URL to poll again.
+    Payloads of single-message events are returned as they are, so waking a
+    crowd of pollers does not turn into a crowd of queries.
+    """
+    try:
+        query = SinceQuery(request)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    deadline = time.monotonic() + query.timeout
+    # Subscribe before the first read: anything committed after that read
+    # is then guaranteed to show up as an event.
+    with get_hub().subscribe(chat_pk) as subscription:
+        code, results = await _detached(_authorize_and_fetch)(request, chat_pk, query)
+        if code == status.HTTP_403_FORBIDDEN:
+            return JsonResponse(
+                {"detail": "Authentication credentials were not provided."},
+                status=code,
+            )
+        if code == status.HTTP_404_NOT_FOUND:
+            return JsonResponse({"detail": "Not found."}, status=code)
+
+        while not results:
+            remaining = deadline - time.monotonic()
+            event = await subscription.get(timeout=remaining) if remaining > 0 else None
+            if event is None:
+                break
+            if event["type"] not in WAKE_EVENTS:
+                continue
+            events = [event, *subscription.drain()]
+            events = [event for event in events if event["type"] in WAKE_EVENTS]
+            results = (
+                None if subscription.dropped else _results_from_events(events, query)
+            )
+            if results is None:
+                results = await _detached(_fetch_messages)(chat_pk, query)
+
+    return JsonResponse(
+        {"results": list(results), "next": query.next_link(request, results)}
+    )
@@ -1,11 +1,42 @@
-from rest_framework import viewsets, permissions
+from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from ..models import Message, Chat
-from ..serializers import MessageSerializer
+from ..serializers import (
+    MessageRowSerializer,
+    MessageSerializer,
+    MessageBulkCreateSerializer,
+    MessageBulkDeleteSerializer,
+)
+from ..pagination import MessageKeysetPagination
+from ..renderers import FastJSONRenderer
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
+from ..repositories.chat_repository import ChatRepository
+from ..repositories.message_repository import MessageRepository
+from ..responses import (
+    add_validators,
+    not_modified_response,
+    representation_validators,
+)
+from ..services import MembershipService, MessageHistory
+
+
+# What a page of messages is built from: counters change with every insert
+# or delete, the newest ``updated_at`` with every edit, and
+# ``users_updated_at`` when a sender's username or email changes. None of
+# them only moves forward (deleting the newest edit rewinds
+# ``messages_updated_at``), so revalidation goes by the ETag alone.
+LIST_VALIDATORS = (
+    "message_count",
+    "last_message_id",
+    "messages_updated_at",
+    "users_updated_at",
+)
 
 
 @extend_schema(
@@ -36,17 +67,74 @@ class MessageViewSet(viewsets.ModelViewSet):
 
     serializer_class = MessageSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = MessageKeysetPagination
+    renderer_classes = [
+        FastJSONRenderer if renderer is JSONRenderer else renderer
+        for renderer in api_settings.DEFAULT_RENDERER_CLASSES
+    ]
+    message_repository = MessageRepository()
+    chat_repository = ChatRepository()
+    membership_service = MembershipService()
 
     def get_queryset(self):
-        chat_id = self.kwargs.get("chat_pk")
-        return Message.objects.filter(
-            chat_id=chat_id, chat__participants=self.request.user
+        chat_id = self.membership_service.require_membership(
+            self.request.user, self.kwargs.get("chat_pk")
         )
+        return Message.objects.filter(chat_id=chat_id).select_related("sender")
 
     def perform_create(self, serializer):
-        chat_id = self.kwargs.get("chat_pk")
-        chat = get_object_or_404(Chat, id=chat_id, participants=self.request.user)
-        serializer.save(chat=chat, sender=self.request.user)
+        chat_id = self.membership_service.require_membership(
+            self.request.user, self.kwargs.get("chat_pk")
+        )
+        serializer.save(chat_id=chat_id, sender=self.request.user)
+
+    @extend_schema(
+        description=(
+            "List the chat's messages. Responses carry a weak ETag; send it "
+            "back in If-None-Match to get 304 when no message was added, "
+            "edited or deleted."
+        ),
+    )
+    def list(self, request, *args, **kwargs):
+        chat_id = self.membership_service.require_membership(
+            request.user, self.kwargs.get("chat_pk")
+        )
+        state = self.chat_repository.get_validators(chat_id, *LIST_VALIDATORS)
+        if state is None:
+            return self._list_rows(request, chat_id)
+
+        etag, last_modified = representation_validators(request, state)
+        response = not_modified_response(request, etag, last_modified)
+        if response is not None:
+            return response
+        return add_validators(self._list_rows(request, chat_id), etag, last_modified)
+
+    def _list_rows(self, request, chat_id):
+        # Read-only fast path: rows straight from .values(), senders joined
+        # in the same query, no model instances or nested serializers.
+        # Pages run on into the archived messages when they reach them.
+        queryset = self.filter_queryset(self.get_queryset()).as_rows()
+        page = self.paginate_queryset(MessageHistory(chat_id, queryset))
+        return self.get_paginated_response(MessageRowSerializer(page, many=True).data)
+
+    def retrieve(self, request, *args, **kwargs):
+        # Rows rather than instances, so archived messages are found too.
+        chat_id = self.membership_service.require_membership(
+            request.user, self.kwargs.get("chat_pk")
+        )
+        try:
+            pk = int(self.kwargs["pk"])
+        except ValueError:
+            raise Http404("No Message matches the given query.")
+        row = self._history(chat_id).get(pk)
+        if row is None:
+            raise Http404("No Message matches the given query.")
+        return Response(MessageRowSerializer(row).data)
+
+    def _history(self, chat_id):
+        return MessageHistory(
+            chat_id, Message.objects.filter(chat_id=chat_id).as_rows()
+        )
 
     @extend_schema(
         description="Retrieve messages by their context index",
@@ -77,7 +165,73 @@ class MessageViewSet(viewsets.ModelViewSet):
         context_index = request.query_params.get("context_index")
         if not context_index:
             return Response({"error": "context_index is required"}, status=400)
+        try:
+            context_index = int(context_index)
+        except ValueError:
+            return Response({"error": "context_index must be an integer"}, status=400)
+
+        chat_id = self.membership_service.require_membership(request.user, chat_pk)
+        messages = self._history(chat_id).with_context_index(context_index)
+        return Response(MessageRowSerializer(messages, many=True).data)
+
+    @extend_schema(
+        description=(
+            "Create many messages in one request. The whole batch is validated "
+            "first and inserted in a single transaction."
+        ),
+        request=MessageBulkCreateSerializer,
+        responses={
+            201: {
+                "type": "object",
+                "properties": {
+                    "created": {"type": "integer", "example": 2},
+                    "ids": {
+                        "type": "array",
+                        "items": {"type": "integer"},
+                        "example": [101, 102],
+                    },
+                },
+            },
+            400: {"description": "Validation errors keyed by message position"},
+            404: {"description": "Chat not found"},
+        },
+    )
+    @action(detail=False, methods=["post"])
+    def bulk_create(self, request, chat_pk=None):
+        self.membership_service.require_membership(request.user, chat_pk)
+        chat = get_object_or_404(Chat, id=chat_pk)
+        serializer = MessageBulkCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        messages = self.message_repository.bulk_create(
+            chat, request.user, serializer.validated_data["messages"]
+        )
+        return Response(
+            {"created": len(messages), "ids": [message.pk for message in messages]},
+            status=status.HTTP_201_CREATED,
+        )
+
+    @extend_schema(
+        description=(
+            "Delete messages of the chat, either by a list of ids or by an "
+            "inclusive context index range"
+        ),
+        request=MessageBulkDeleteSerializer,
+        responses={
+            200: {
+                "type": "object",
+                "properties": {"deleted": {"type": "integer", "example": 2}},
+            },
+            400: {"description": "Neither or both of ids and a range were given"},
+            404: {"description": "Chat not found"},
+        },
+    )
+    @action(detail=False, methods=["post"])
+    def bulk_delete(self, request, chat_pk=None):
+        self.membership_service.require_membership(request.user, chat_pk)
+        chat = get_object_or_404(Chat, id=chat_pk)
+        serializer = MessageBulkDeleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
-        messages = self.get_queryset().filter(context_index=context_index)
-        serializer = self.get_serializer(messages, many=True)
-        return Response(serializer.data)
+        deleted = self.message_repository.bulk_delete(chat, **serializer.validated_data)
+        return Response({"deleted": deleted})
@@ -0,0 +1,138 @@
+from rest_framework import mixins, permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from django.shortcuts import get_object_or_404
+from ..models import Chat, UploadSession
+from ..serializers import FileSerializer, UploadSessionSerializer
+from ..services import MembershipService, UploadSessionError, UploadSessionService
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from drf_spectacular.types import OpenApiTypes
+
+
+@extend_schema(
+    tags=["Files"],
+    description="Resumable chunked uploads of chat files",
+    parameters=[
+        OpenApiParameter(
+            name="chat_pk",
+            type=OpenApiTypes.INT,
+            location=OpenApiParameter.PATH,
+            description="ID of the chat room",
+        ),
+        OpenApiParameter(
+            name="id",
+            type=OpenApiTypes.UUID,
+            location=OpenApiParameter.PATH,
+            description="Upload session ID",
+        ),
+    ],
+)
+class UploadSessionViewSet(
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet,
+):
+    """
+    ViewSet for resumable chunked file uploads.
+
+    Open a session with the file's name, size and chunk size, PUT each chunk's
+    raw bytes to ``chunks/{index}/`` in any order (re-sending a chunk is safe),
+    then POST ``complete/`` to assemble the chunks into a chat file. Users can
+    only see their own sessions in chats they are participants in.
+    """
+
+    serializer_class = UploadSessionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    upload_service = UploadSessionService()
+    membership_service = MembershipService()
+
+    def get_queryset(self):
+        chat_id = self.membership_service.require_membership(
+            self.request.user, self.kwargs.get("chat_pk")
+        )
+        return UploadSession.objects.filter(
+            chat_id=chat_id, created_by=self.request.user
+        ).select_related("chat", "created_by")
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["upload_service"] = self.upload_service
+        return context
+
+    def perform_create(self, serializer):
+        chat_id = self.membership_service.require_membership(
+            self.request.user, self.kwargs.get("chat_pk")
+        )
+        chat = get_object_or_404(Chat, id=chat_id)
+        serializer.save(chat=chat, created_by=self.request.user)
+
+    def perform_destroy(self, instance):
+        self.upload_service.discard(instance)
+
+    @extend_schema(
+        description="Upload one chunk of the file as the raw request body",
+        request={"application/octet-stream": {"type": "string", "format": "binary"}},
+        parameters=[
+            OpenApiParameter(
+                name="index",
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.PATH,
+                description="Zero-based chunk number",
+            )
+        ],
+        responses={
+            200: {
+                "type": "object",
+                "properties": {
+                    "index": {"type": "integer", "example": 0},
+                    "size": {"type": "integer", "example": 8388608},
+                },
+            },
+            400: {
+                "type": "object",
+                "properties": {
+                    "error": {
+                        "type": "string",
+                        "example": "Chunk 3 must be 8388608 bytes, got 1024",
+                    }
+                },
+            },
+        },
+    )
+    @action(detail=True, methods=["put"], url_path=r"chunks/(?P<index>\d+)")
+    def chunk(self, request, chat_pk=None, pk=None, index=None):
+        session = self.get_object()
+        try:
+            length = int(request.headers.get("Content-Length") or 0)
+            size = self.upload_service.write_chunk(
+                session, int(index), request.stream, length
+            )
+        except (UploadSessionError, ValueError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({"index": int(index), "size": size})
+
+    @extend_schema(
+        description="Assemble the uploaded chunks into a chat file",
+        request=None,
+        responses={
+            201: FileSerializer,
+            400: {
+                "type": "object",
+                "properties": {
+                    "error": {"type": "string", "example": "Missing chunks: [2, 5]"}
+                },
+            },
+        },
+    )
+    @action(detail=True, methods=["post"])
+    def complete(self, request, chat_pk=None, pk=None):
+        session = self.get_object()
+        try:
+            file_obj = self.upload_service.complete(session)
+        except UploadSessionError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = FileSerializer(file_obj, context=self.get_serializer_context())
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
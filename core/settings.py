@@ -45,6 +45,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'applications.chats.middleware.QueryInstrumentationMiddleware',
+    'applications.chats.middleware.ReadYourWritesMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -85,6 +87,26 @@ DATABASES = {
     }
 }
 
+DATABASE_ROUTERS = ['applications.chats.routing.ReplicaRouter']
+
+# Reads of the chats app go to REPLICAS, writes to PRIMARY. After a write,
+# the client's reads stay on the primary for STICKY_SECONDS, through a cookie
+# named COOKIE_NAME. To try it locally with a second SQLite file standing in
+# for the replica, add
+#   DATABASES['replica'] = {
+#       'ENGINE': 'django.db.backends.sqlite3',
+#       'NAME': BASE_DIR / 'replica.sqlite3',
+#       'TEST': {'MIRROR': 'default'},
+#   }
+# list 'replica' in REPLICAS, and refresh it from the primary with
+#   sqlite3 db.sqlite3 ".backup replica.sqlite3"
+CHATS_DATABASE_ROUTING = {
+    'PRIMARY': 'default',
+    'REPLICAS': [],
+    'STICKY_SECONDS': 5,
+    'COOKIE_NAME': 'chats_primary_until',
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -122,6 +144,28 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Uploaded files
+# https://docs.djangoproject.com/en/5.1/topics/files/
+
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Django's upload handlers, hashing uploads as they stream in so chat files
+# can be stored once per content (see applications.chats.models.Blob).
+FILE_UPLOAD_HANDLERS = [
+    'applications.chats.upload_handlers.HashingMemoryFileUploadHandler',
+    'applications.chats.upload_handlers.HashingTemporaryFileUploadHandler',
+]
+
+# Resumable chunked uploads: where chunks wait until a session is completed,
+# and how long an idle session is kept before cleanup_upload_sessions drops it.
+CHATS_UPLOAD_SESSIONS_DIR = MEDIA_ROOT / 'upload_sessions'
+CHATS_UPLOAD_SESSION_TTL_HOURS = 24
+# Largest upload a session accepts (File.file_size is a 32-bit column), and
+# most chunks it may be split into.
+CHATS_UPLOAD_MAX_SIZE = 2**31 - 1
+CHATS_UPLOAD_MAX_CHUNKS = 10_000
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -139,4 +183,95 @@ SPECTACULAR_SETTINGS = {
 REST_FRAMEWORK = {
     # YOUR SETTINGS
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
-}
\ No newline at end of file
+}
+
+# Realtime chat events (Server-Sent Events and WebSocket, ASGI only).
+# LocalBackend fans out within one process; use
+# 'applications.chats.realtime.backends.RedisBackend' with
+# OPTIONS {'url': 'redis://...'} to share events between worker processes.
+CHATS_REALTIME = {
+    'BACKEND': 'applications.chats.realtime.backends.LocalBackend',
+    'OPTIONS': {},
+    'QUEUE_SIZE': 256,
+    'HEARTBEAT_SECONDS': 15,
+    # Long-poll /messages/since/: default and upper bound of ?timeout=.
+    'POLL_TIMEOUT_SECONDS': 25,
+    'POLL_MAX_TIMEOUT_SECONDS': 60,
+}
+
+# Native async views for the busiest routes: chat list and detail, message
+# list and detail, and message creation. Requests they cannot answer exactly
+# like DRF (Basic auth, the browsable API, other methods) are passed to the
+# DRF viewsets; set ENABLED to False to pass every request to them.
+CHATS_ASYNC_VIEWS = {
+    'ENABLED': True,
+}
+
+# Read-through cache of chats in ChatRepository. Enabling it requires BACKEND,
+# the alias of a CACHES entry shared by every process (Redis, Memcached), so
+# that invalidations reach all of them; a locmem alias only suits a single
+# process. Off by default, as CACHES holds no shared cache here.
+CHATS_CHAT_CACHE = {
+    'ENABLED': False,
+    'MAX_ENTRIES': 1024,
+    'TTL_SECONDS': 300,
+    'BACKEND': None,
+}
+
+# Cached chat ids per user, used to authorize message and file requests.
+# Like CHATS_CHAT_CACHE, it can only be enabled with a shared BACKEND.
+CHATS_MEMBERSHIP_CACHE = {
+    'ENABLED': False,
+    'MAX_ENTRIES': 4096,
+    'TTL_SECONDS': 60,
+    'BACKEND': None,
+}
+
+# Background jobs of the chats app, kept in the database and run by
+# run_chat_jobs workers. A claimed batch is leased for LEASE_SECONDS, after
+# which another worker may run it again; failed jobs are retried after
+# BACKOFF_SECONDS, doubling up to MAX_BACKOFF_SECONDS, MAX_ATTEMPTS times.
+CHATS_JOBS = {
+    'BATCH_SIZE': 10,
+    'LEASE_SECONDS': 300,
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF_SECONDS': 10,
+    'MAX_BACKOFF_SECONDS': 3600,
+}
+
+# Deleting a chat hides it at once and queues a chats.purge_chat job, which
+# deletes its messages, segments and files BATCH_SIZE rows per transaction and
+# requeues itself after BATCHES_PER_JOB batches.
+CHATS_DELETION = {
+    'BATCH_SIZE': 1000,
+    'BATCHES_PER_JOB': 20,
+}
+
+# Chat exports (GET /chats/<id>/export/, export_chat) read CHUNK_SIZE rows per
+# query and stream them out as they are encoded, so memory stays flat however
+# long the chat is.
+CHATS_EXPORT = {
+    'CHUNK_SIZE': 2000,
+}
+
+# Cold storage of old messages: archive_messages moves messages older than
+# ARCHIVE_AFTER_DAYS into per-chat segments of up to SEGMENT_SIZE messages,
+# compressed with CODEC ('zlib', or 'zstd' with the zstandard package).
+# Archived messages stay listed but are read-only and not searchable.
+CHATS_ARCHIVE = {
+    'CODEC': 'zlib',
+    'SEGMENT_SIZE': 500,
+    'ARCHIVE_AFTER_DAYS': 180,
+}
+
+# Per-request SQL instrumentation: a Server-Timing header and a JSON log line
+# on the 'applications.chats.queries' logger for a SAMPLE_RATE fraction of
+# requests. A request running one statement shape more than
+# N_PLUS_ONE_THRESHOLD times is flagged as N+1 and logged as a warning.
+CHATS_QUERY_INSTRUMENTATION = {
+    'ENABLED': True,
+    'SAMPLE_RATE': 0.05,
+    'N_PLUS_ONE_THRESHOLD': 10,
+    'TOP_STATEMENTS': 3,
+    'SERVER_TIMING': True,
+}